@@ -6,7 +6,7 @@ import sys
 import glob
 import time
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 import argparse
 import sqlite3
 import traceback
@@ -14,6 +14,9 @@ import traceback
 # Import our modules
 from spotify_token_manager import SpotifyTokenManager
 from spotify_partner_api import SpotifyPartnerAPI
+from src.spotify_mcp import schedule
+from src.spotify_mcp.artists import ensure_refresh_schedule, select_due_artists
+from src.spotify_mcp.archive import ResponseArchive
 
 # Setup logging
 logging.basicConfig(
@@ -26,16 +29,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger("batch_processing")
 
+# The batch processor refreshes Partner API data more often than the configured
+# schedule: (label, popularity threshold, days between refreshes), top tier first
+PARTNER_TIERS = (
+    ("Top Tier (3 days)", 75, 3),
+    ("Mid Tier (7 days)", 50, 7),
+    ("Lower Tier (14 days)", 0, 14),
+)
+
 class BatchProcessor:
     """Process multiple artists and update database with enhanced metrics"""
     
-    def __init__(self, db_path, output_dir=None, max_workers=1, delay=1):
+    def __init__(self, db_path, output_dir=None, max_workers=1, delay=1, archive_dir=None):
         """Initialize the batch processor"""
         self.db_path = db_path
         self.output_dir = output_dir or os.path.join(os.getcwd(), "output")
         self.max_workers = max_workers
         self.delay = delay
         
+        # Raw responses and metrics are kept, compressed and deduplicated, for re-processing
+        self.archive = ResponseArchive(archive_dir or os.path.join(self.output_dir, "archive"))
+        
         # Create a single token manager to be shared
         token_path = os.path.join(self.output_dir, "batch_spotify_tokens.json")
         self.token_manager = SpotifyTokenManager(token_path)
@@ -65,52 +79,36 @@ class BatchProcessor:
             logger.error(f"Error checking token health: {str(e)}")
     
     async def get_artists_needing_update(self, limit=None):
-        """Get artists that need updates based on tier"""
+        """Get artists whose Partner API data is due for refresh based on tier"""
         try:
             conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            query = """
-            SELECT 
-                id, name, popularity, 
-                COALESCE(enhanced_data_updated, '1970-01-01') as enhanced_data_updated,
-                CASE 
-                    WHEN popularity >= 75 THEN 'Top Tier (3 days)'
-                    WHEN popularity >= 50 THEN 'Mid Tier (7 days)'
-                    ELSE 'Lower Tier (14 days)'
-                END as tier
-            FROM artists
-            WHERE 
-                (popularity >= 75 AND (enhanced_data_updated IS NULL OR enhanced_data_updated < datetime('now', '-3 days')))
-                OR (popularity >= 50 AND popularity < 75 AND (enhanced_data_updated IS NULL OR enhanced_data_updated < datetime('now', '-7 days')))
-                OR (popularity < 50 AND (enhanced_data_updated IS NULL OR enhanced_data_updated < datetime('now', '-14 days')))
-            ORDER BY 
-                CASE 
-                    WHEN popularity >= 75 THEN 1
-                    WHEN popularity >= 50 THEN 2
-                    ELSE 3
-                END,
-                popularity DESC
-            """
-            
-            if limit:
-                query += f" LIMIT {limit}"
-                
-            cursor.execute(query)
-            artists = cursor.fetchall()
-            conn.close()
-            
-            # Format as list of dictionaries
             result = []
-            for row in artists:
-                result.append({
-                    "id": row[0],
-                    "name": row[1],
-                    "popularity": row[2],
-                    "enhanced_data_updated": row[3],
-                    "tier": row[4]
-                })
-                
+            now = datetime.utcnow()
+            try:
+                ensure_refresh_schedule(conn)
+                upper = None
+                for label, threshold, days in PARTNER_TIERS:
+                    remaining = limit - len(result) if limit else None
+                    if remaining == 0:
+                        break
+                    # partner_due_at is enhanced_data_updated plus the configured interval, so
+                    # moving now forward by the difference applies this tier's interval instead
+                    shift = timedelta(days=schedule.tier_for(threshold).partner_api_days - days)
+                    artists = select_due_artists(conn, standard=False, partner=True, limit=remaining,
+                                                 min_popularity=threshold, max_popularity=upper, now=now + shift)
+                    
+                    # Format as list of dictionaries
+                    result.extend({
+                        "id": artist["id"],
+                        "name": artist["name"],
+                        "popularity": artist["popularity"],
+                        "enhanced_data_updated": artist["enhanced_data_updated"] or '1970-01-01',
+                        "tier": label
+                    } for artist in artists)
+                    upper = threshold
+            finally:
+                conn.close()
+            
             return result
                 
         except sqlite3.Error as e:
@@ -157,26 +155,17 @@ class BatchProcessor:
             return {"success": False, "error": str(e)}
     
     def save_artist_data(self, artist_id, artist_data, metrics):
-        """Save artist data to output files"""
+        """Archive the full API response and the extracted metrics"""
         try:
-            # Create timestamp for filenames
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            fetched_at = datetime.utcnow()
+            self.archive.put(artist_id, "response", artist_data, fetched_at=fetched_at)
+            self.archive.put(artist_id, "metrics", metrics, fetched_at=fetched_at)
             
-            # Save full API response
-            response_file = os.path.join(self.output_dir, f"{artist_id}_response_{timestamp}.json")
-            with open(response_file, "w") as f:
-                json.dump(artist_data, f, indent=2)
-            
-            # Save extracted metrics
-            metrics_file = os.path.join(self.output_dir, f"{artist_id}_metrics_{timestamp}.json")
-            with open(metrics_file, "w") as f:
-                json.dump(metrics, f, indent=2)
-                
-            logger.info(f"Saved data files for artist {artist_id}")
+            logger.info(f"Archived data for artist {artist_id}")
             return True
             
         except Exception as e:
-            logger.error(f"Error saving data files: {str(e)}")
+            logger.error(f"Error archiving artist data: {str(e)}")
             return False
     
     def update_database(self, artist_id, metrics):
@@ -248,45 +237,13 @@ class BatchProcessor:
             logger.error(f"Error updating database: {str(e)}")
             return False
     
-    def cleanup_output_files(self, successful_artist_ids):
-        """
-        Clean up JSON output files after successful processing
-        
-        Args:
-            successful_artist_ids: List of artist IDs that were successfully processed
-        """
+    def cleanup_output_files(self):
+        """Clean up batch results files older than 7 days"""
         try:
-            logger.info(f"Cleaning up output files for {len(successful_artist_ids)} successfully processed artists")
-            
-            cleaned_response_files = 0
-            cleaned_metrics_files = 0
-            errors = 0
-            
-            # Immediate cleanup for response and metrics files of successful artists
-            for artist_id in successful_artist_ids:
-                try:
-                    # Find all response and metrics files for this artist
-                    response_pattern = os.path.join(self.output_dir, f"{artist_id}_response_*.json")
-                    metrics_pattern = os.path.join(self.output_dir, f"{artist_id}_metrics_*.json")
-                    
-                    # Delete response files (larger files)
-                    for filepath in glob.glob(response_pattern):
-                        os.remove(filepath)
-                        cleaned_response_files += 1
-                    
-                    # Delete metrics files
-                    for filepath in glob.glob(metrics_pattern):
-                        os.remove(filepath)
-                        cleaned_metrics_files += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error cleaning up files for artist {artist_id}: {str(e)}")
-                    errors += 1
-            
-            # For batch results files, only clean up old ones (older than 7 days)
             batch_pattern = os.path.join(self.output_dir, "batch_results_*.json")
             cutoff_time = time.time() - (7 * 24 * 60 * 60)  # 7 days
             cleaned_batch_files = 0
+            errors = 0
             
             for filepath in glob.glob(batch_pattern):
                 try:
@@ -298,7 +255,7 @@ class BatchProcessor:
                     logger.error(f"Error cleaning up batch file {filepath}: {str(e)}")
                     errors += 1
             
-            logger.info(f"Cleanup complete: {cleaned_response_files} response files and {cleaned_metrics_files} metrics files removed, {cleaned_batch_files} old batch files removed, {errors} errors")
+            logger.info(f"Cleanup complete: {cleaned_batch_files} old batch files removed, {errors} errors")
             
         except Exception as e:
             logger.error(f"Error during output file cleanup: {str(e)}")
@@ -334,6 +291,14 @@ class BatchProcessor:
             results["end_time"] = datetime.now().isoformat()
             return results
         
+        # Drop duplicate IDs so each artist is fetched from the Partner API once
+        unique_artists = {}
+        for artist in artist_list:
+            unique_artists.setdefault(artist['id'], artist)
+        if len(unique_artists) < len(artist_list):
+            logger.info(f"Skipping {len(artist_list) - len(unique_artists)} duplicate artist IDs")
+        artist_list = list(unique_artists.values())
+        
         # Process based on concurrency settings
         try:
             if self.max_workers > 1:
@@ -423,9 +388,9 @@ class BatchProcessor:
             results["stopped_early"] = True
             results["stop_reason"] = f"Batch error: {str(e)}"
         
-        # Clean up files for successfully processed artists
+        # Clean up old batch results
         if results['success_count'] > 0:
-            self.cleanup_output_files(results['successful'])
+            self.cleanup_output_files()
         
         # Update end time
         results['end_time'] = datetime.now().isoformat()
@@ -448,6 +413,7 @@ async def main():
     
     # Processing options
     parser.add_argument("--output-dir", help="Directory for output files", default="output")
+    parser.add_argument("--archive-dir", help="Directory of the response archive (default: OUTPUT_DIR/archive)")
     parser.add_argument("--max-workers", "-w", type=int, default=1, help="Maximum concurrent workers")
     parser.add_argument("--delay", type=float, default=1, help="Delay between API requests in seconds")
     parser.add_argument("--limit", "-l", type=int, help="Limit the number of artists to process")
@@ -459,7 +425,8 @@ async def main():
         db_path=args.db_path,
         output_dir=args.output_dir,
         max_workers=args.max_workers,
-        delay=args.delay
+        delay=args.delay,
+        archive_dir=args.archive_dir
     )
     
     # Get artist list based on selection method
@@ -0,0 +1,306 @@
+import logging
+import json
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+# Import our modules
+from spotify_partner_api import SpotifyPartnerAPI
+from src.spotify_mcp.archive import ResponseArchive
+
+logger = logging.getLogger("reprocess_responses")
+
+# Saved response file names: {id}_spotify_response.json and {id}_response_{YYYYmmdd_HHMMSS}.json
+RESPONSE_FILE = re.compile(r'^([0-9A-Za-z]{22})_(?:spotify_response|response_(\d{8}_\d{6}))\.json$')
+
+# Fields the Partner API owns, recorded in each artist's data_sources
+PARTNER_SOURCES = json.dumps({
+    "monthly_listeners": "partner_api",
+    "social_links_json": "partner_api",
+    "top_tracks_total_plays": "partner_api",
+    "upcoming_tours_count": "partner_api",
+    "upcoming_tours_json": "partner_api"
+})
+
+# Trigger that snapshots artist stats into artist_stats_history on every change.
+# Re-derived values are not a new observation, so it is held off while they
+# are written.
+HISTORY_TRIGGER = "track_artist_updates"
+
+# A response saved up to this long before enhanced_data_updated is taken to be
+# the fetch that set it: the update tools save the response, then the row
+SAME_FETCH_WINDOW = "-5 minutes"
+
+UPDATE_ARTIST = """
+    UPDATE artists SET
+        monthly_listeners = ?,
+        social_links_json = ?,
+        top_tracks_total_plays = ?,
+        upcoming_tours_count = ?,
+        upcoming_tours_json = ?,
+        data_sources = json_patch(CASE WHEN json_valid(data_sources) THEN data_sources ELSE '{}' END, ?)
+    WHERE id = ?
+"""
+
+
+def find_response_files(directory):
+    """Latest saved response file per artist: {artist_id: (path, fetched_at)}, fetched_at in UTC"""
+    latest = {}
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        match = RESPONSE_FILE.match(os.path.basename(path))
+        if not match:
+            continue
+        artist_id, stamp = match.groups()
+        # File name stamps are local time, like the file's modification time
+        saved = time.mktime(time.strptime(stamp, "%Y%m%d_%H%M%S")) if stamp else os.path.getmtime(path)
+        fetched_at = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(saved))
+        if artist_id not in latest or fetched_at > latest[artist_id][1]:
+            latest[artist_id] = (path, fetched_at)
+    return latest
+
+
+def find_archived_responses(archive_dir):
+    """Latest archived response per artist: {artist_id: ((archive_dir, hash), fetched_at)}"""
+    archive = ResponseArchive(archive_dir)
+    try:
+        latest = {}
+        for entry in archive.entries(kind="response"):
+            fetched_at = entry["fetched_at"].replace("T", " ")[:19]
+            if entry["artist_id"] not in latest or fetched_at >= latest[entry["artist_id"]][1]:
+                latest[entry["artist_id"]] = ((archive_dir, entry["hash"]), fetched_at)
+        return latest
+    finally:
+        archive.close()
+
+
+# Archives opened by this worker process, by directory
+_archives = {}
+
+
+def _load(source):
+    if isinstance(source, tuple):
+        archive_dir, digest = source
+        if archive_dir not in _archives:
+            _archives[archive_dir] = ResponseArchive(archive_dir)
+        return _archives[archive_dir].get(digest)
+    with open(source, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def extract_row(task):
+    """
+    Re-run metric extraction on one saved response (runs in a worker process)
+
+    Args:
+        task: (artist_id, source, fetched_at); source is a file path or (archive_dir, hash)
+
+    Returns:
+        (artist_id, row, error): row holds the artist column values and top cities, or is None on error
+    """
+    artist_id, source, fetched_at = task
+    try:
+        artist_data = _load(source)
+        metrics = SpotifyPartnerAPI.extract_artist_metrics(artist_data)
+        if not metrics:
+            return artist_id, None, "Failed to extract metrics"
+
+        concerts = metrics.get("upcoming_concerts", [])
+        row = {
+            "fetched_at": fetched_at,
+            "artist": (
+                metrics.get("monthly_listeners"),
+                json.dumps(metrics.get("social_links", {})),
+                SpotifyPartnerAPI.calculate_top_tracks_plays(artist_data),
+                len(concerts),
+                json.dumps({"total_count": len(concerts), "dates": concerts}),
+                PARTNER_SOURCES,
+                artist_id
+            ),
+            "cities": [
+                (artist_id, city.get("city"), city.get("country"), city.get("region"), city.get("listeners"), fetched_at)
+                for city in metrics.get("top_cities", [])
+                if city.get("city") and city.get("country") and city.get("listeners") is not None
+            ]
+        }
+        return artist_id, row, None
+    except Exception as e:
+        return artist_id, None, str(e)
+
+
+def ensure_schema(conn):
+    """Add the columns and table written here to databases created before they existed"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(artists)")}
+    if "top_tracks_total_plays" not in columns:
+        conn.execute("ALTER TABLE artists ADD COLUMN top_tracks_total_plays BIGINT")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS artist_top_cities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            artist_id TEXT NOT NULL,
+            city TEXT NOT NULL,
+            country TEXT NOT NULL,
+            region TEXT,
+            listeners INTEGER NOT NULL,
+            snapshot_date TIMESTAMP NOT NULL,
+            FOREIGN KEY (artist_id) REFERENCES artists(id)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_top_cities_artist_id ON artist_top_cities(artist_id)")
+    conn.commit()
+
+
+def write_batch(conn, rows):
+    """
+    Write extracted rows in one transaction
+
+    Rows are skipped for artists not in the artists table, and for artists
+    whose Partner API data was refreshed after the response was fetched.
+    HISTORY_TRIGGER is dropped for the transaction and restored before it
+    commits, so no history rows are written.
+
+    Returns:
+        (missing, stale): IDs not in the artists table, and IDs with newer data
+    """
+    ids = [row["artist"][-1] for row in rows]
+    placeholders = ",".join("?" * len(ids))
+    refreshed = dict(conn.execute(
+        f"SELECT id, datetime(enhanced_data_updated, ?) FROM artists WHERE id IN ({placeholders})",
+        [SAME_FETCH_WINDOW, *ids]))
+    stale = {row["artist"][-1] for row in rows
+             if refreshed.get(row["artist"][-1]) is not None and row["fetched_at"] < refreshed[row["artist"][-1]]}
+    rows = [row for row in rows if row["artist"][-1] in refreshed and row["artist"][-1] not in stale]
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        trigger = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                               (HISTORY_TRIGGER,)).fetchone()
+        if trigger:
+            conn.execute(f"DROP TRIGGER {HISTORY_TRIGGER}")
+        conn.executemany(UPDATE_ARTIST, [row["artist"] for row in rows])
+        conn.executemany("DELETE FROM artist_top_cities WHERE artist_id = ?", [(row["artist"][-1],) for row in rows])
+        conn.executemany("""
+            INSERT INTO artist_top_cities (artist_id, city, country, region, listeners, snapshot_date)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [city for row in rows for city in row["cities"]])
+        if trigger:
+            conn.execute(trigger[0])
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return [artist_id for artist_id in ids if artist_id not in refreshed], [
+        artist_id for artist_id in ids if artist_id in stale]
+
+
+def reprocess(db_path, sources, workers=None, batch_size=500):
+    """
+    Re-derive Partner API fields and top cities from saved responses
+
+    Extraction runs in a pool of worker processes; the results are written by
+    this process in transactions of batch_size artists while the workers
+    carry on. Nothing is fetched from Spotify, and last_updated and
+    enhanced_data_updated are left alone, so the refresh schedule is not
+    affected. A response older than the artist's Partner API data is not
+    applied, and artist_stats_history is not written to.
+
+    Args:
+        db_path: Path to SQLite database file
+        sources: {artist_id: (source, fetched_at)} from find_response_files or find_archived_responses
+        workers: Worker processes (default: one per CPU; 1 extracts in this process)
+        batch_size: Artists written per transaction
+
+    Returns:
+        Dict with updated, missing (not in the database), stale (newer data stored) and failed IDs,
+        errors and elapsed seconds
+    """
+    start = time.perf_counter()
+    results = {"updated": [], "missing": [], "stale": [], "failed": [], "errors": {}, "elapsed": None}
+    tasks = [(artist_id, source, fetched_at) for artist_id, (source, fetched_at) in sorted(sources.items())]
+    workers = workers or os.cpu_count() or 1
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        ensure_schema(conn)
+        pending = []
+
+        def flush():
+            missing, stale = write_batch(conn, pending)
+            skipped = set(missing) | set(stale)
+            results["missing"].extend(missing)
+            results["stale"].extend(stale)
+            results["updated"].extend(row["artist"][-1] for row in pending if row["artist"][-1] not in skipped)
+            logger.info(f"Wrote {len(results['updated'])} artists ({len(results['missing'])} not in the database, "
+                        f"{len(results['stale'])} with newer data)")
+            pending.clear()
+
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            extracted = pool.map(extract_row, tasks, chunksize=max(1, min(32, len(tasks) // (workers * 4))))
+        else:
+            pool = None
+            extracted = map(extract_row, tasks)
+        try:
+            for artist_id, row, error in extracted:
+                if row is None:
+                    results["failed"].append(artist_id)
+                    results["errors"][artist_id] = error
+                    continue
+                pending.append(row)
+                if len(pending) >= batch_size:
+                    flush()
+            if pending:
+                flush()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    finally:
+        conn.close()
+
+    results["elapsed"] = round(time.perf_counter() - start, 3)
+    return results
+
+
+def main():
+    """Main entry point for re-processing saved responses"""
+    parser = argparse.ArgumentParser(description="Re-derive Partner API metrics from saved responses without refetching")
+    parser.add_argument("--db-path", required=True, help="Path to SQLite database file")
+
+    # Source options (choose one)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--archive-dir", help="Response archive written by batch_processor.py")
+    group.add_argument("--response-dir", help="Directory of *_spotify_response.json / *_response_*.json files")
+
+    parser.add_argument("--artist-ids", help="Comma-separated list of artist IDs (default: every saved artist)")
+    parser.add_argument("--workers", "-w", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Artists written per transaction")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    if args.archive_dir:
+        sources = find_archived_responses(args.archive_dir)
+    else:
+        sources = find_response_files(args.response_dir)
+    if args.artist_ids:
+        wanted = {artist_id.strip() for artist_id in args.artist_ids.split(",")}
+        sources = {artist_id: source for artist_id, source in sources.items() if artist_id in wanted}
+
+    logger.info(f"Re-processing saved responses for {len(sources)} artists")
+    results = reprocess(args.db_path, sources, workers=args.workers, batch_size=args.batch_size)
+    logger.info(f"Re-processing complete in {results['elapsed']} s: {len(results['updated'])} updated, "
+                f"{len(results['missing'])} not in the database, {len(results['stale'])} with newer data, "
+                f"{len(results['failed'])} failed")
+    for artist_id, error in results["errors"].items():
+        logger.warning(f"  {artist_id}: {error}")
+    return 0 if not results["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
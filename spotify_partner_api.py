@@ -14,13 +14,17 @@ class SpotifyPartnerAPI:
     Provides access to enhanced artist data including monthly listeners.
     """
     
-    def __init__(self, tokens_file_path=None, token_manager=None):
+    def __init__(self, tokens_file_path=None, token_manager=None, single_flight=None, metrics=None):
         """
         Initialize the API client with token management
         
         Args:
             tokens_file_path: Path to token file (if not using existing token manager)
             token_manager: Existing token manager instance (preferred)
+            single_flight: Optional shared SingleFlight so concurrent requests
+                for the same artist make one upstream call
+            metrics: Optional MetricsRegistry that request latency, retries
+                and failures are reported to
         """
         # Use provided token manager or create a new one
         if token_manager:
@@ -31,6 +35,12 @@ class SpotifyPartnerAPI:
         self.base_url = "https://api-partner.spotify.com/pathfinder/v1/query"
         self.max_retries = 3
         self.retry_delay = 2  # seconds
+        self.single_flight = single_flight
+        self.metrics = metrics
+    
+    def _count(self, name):
+        if self.metrics is not None:
+            self.metrics.increment(name)
     
     def get_artist_details(self, artist_id):
         """
@@ -42,11 +52,21 @@ class SpotifyPartnerAPI:
         Returns:
             Dict: Artist data if successful, None otherwise
         """
+        fetch = self._get_artist_details
+        if self.metrics is not None:
+            fetch = self.metrics.timed("partner.get_artist_details")(fetch)
+        if self.single_flight is not None:
+            return self.single_flight.do_sync(("partner", artist_id), fetch, artist_id)
+        return fetch(artist_id)
+    
+    def _get_artist_details(self, artist_id):
+        """Fetch artist details from the Partner API, retrying on failure"""
         for attempt in range(self.max_retries):
             try:
                 if attempt > 0:
                     # Add delay between retries with exponential backoff
                     delay = self.retry_delay * (2 ** (attempt - 1))
+                    self._count("partner.retries")
                     logger.info(f"Retry {attempt+1}/{self.max_retries} for artist {artist_id} in {delay} seconds")
                     time.sleep(delay)
                 
@@ -92,6 +112,7 @@ class SpotifyPartnerAPI:
                 
                 # Make the request
                 response = requests.get(self.base_url, headers=headers, params=params)
+                self._count(f"partner.status.{response.status_code}")
                 
                 if response.status_code == 200:
                     return response.json()
@@ -142,9 +163,11 @@ class SpotifyPartnerAPI:
         # Should not reach here
         return None
     
-    def extract_artist_metrics(self, artist_data):
+    @staticmethod
+    def extract_artist_metrics(artist_data):
         """
-        Extract key metrics from the artist data
+        Extract key metrics from the artist data.
+        Needs no API access, so saved responses can be re-processed offline.
         
         Args:
             artist_data: API response data
@@ -221,3 +244,25 @@ class SpotifyPartnerAPI:
             logger.error(f"Error extracting metrics: {str(e)}")
             logger.debug(f"Error details: {error_stack}")
             return None
+    
+    @staticmethod
+    def calculate_top_tracks_plays(artist_data):
+        """
+        Calculate the total play count of the artist's top tracks
+        
+        Args:
+            artist_data: API response data
+            
+        Returns:
+            int: Sum of the top tracks' play counts (0 if none are listed)
+        """
+        artist = (artist_data or {}).get("data", {}).get("artistUnion", {})
+        top_tracks = artist.get("discography", {}).get("topTracks", {}).get("items", [])
+        total_plays = 0
+        for track_item in top_tracks:
+            playcount = (track_item.get("track") or {}).get("playcount", "0")
+            try:
+                total_plays += int(playcount)
+            except (TypeError, ValueError):
+                logger.warning(f"Invalid playcount: {playcount}")
+        return total_plays
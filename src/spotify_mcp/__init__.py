@@ -1,10 +1,18 @@
 from .models import Artist, ArtistAlbum, AlbumType, Image, ExternalUrl, Followers
-from .spotify_api import Client
-from . import server
 import asyncio
 
 __all__ = ['Artist', 'ArtistAlbum', 'AlbumType', 'Image', 'ExternalUrl', 'Followers', 'Client']
 
+
+def __getattr__(name):
+    # Client pulls in the database and Spotify layers; only load them when asked for
+    if name == "Client":
+        from .spotify_api import Client
+        return Client
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def main():
     """Main entry point for the package."""
-    asyncio.run(server.main())
\ No newline at end of file
+    from . import server
+    asyncio.run(server.main())
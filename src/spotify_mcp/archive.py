@@ -0,0 +1,228 @@
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install "spotify-mcp[archive]"; zlib is used without it
+    zstandard = None
+
+INDEX_FILE = 'index.db'
+SEGMENT_PATTERN = 'segment-{:06d}.dat'
+
+# A new segment is started once the current one reaches this size
+SEGMENT_SIZE = 64 * 1024 * 1024
+
+
+def encode(data: Any) -> bytes:
+    """Canonical JSON bytes of a document: equal content always gives equal bytes, and so the same hash."""
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class ResponseArchive:
+    """Append-only store for raw Partner API responses and their extracted metrics.
+
+    Documents are compressed (zstd when the zstandard package is installed,
+    zlib otherwise) and appended to segment files, each stored once per
+    distinct content: fetching an unchanged response again only adds an
+    index entry. index.db (SQLite) maps each document's SHA-256 to its
+    segment, offset and length, and lists the entries (artist, kind, time
+    fetched) that refer to it. Reads go through memory maps of the segments.
+
+    Writers in several threads or processes are serialized by the index's
+    write lock; bytes appended by a writer that dies before committing its
+    index entry are never referenced and are simply skipped.
+    """
+
+    def __init__(self, directory: str, segment_size: int = SEGMENT_SIZE, level: Optional[int] = None):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.codec = 'zstd' if zstandard is not None else 'zlib'
+        self.level = level if level is not None else (10 if self.codec == 'zstd' else 6)
+        os.makedirs(directory, exist_ok=True)
+        self._compressor = zstandard.ZstdCompressor(level=self.level) if self.codec == 'zstd' else None
+        # Reads use a connection per thread; writes, the segment maps and the compressor share one lock
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._maps: Dict[int, Tuple[Any, mmap.mmap]] = {}
+        self._index = self._connect()
+        self._index.executescript('''
+            CREATE TABLE IF NOT EXISTS documents (
+                hash TEXT PRIMARY KEY,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                raw_length INTEGER NOT NULL,
+                codec TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_documents_segment ON documents(segment);
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                artist_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                fetched_at TIMESTAMP NOT NULL,
+                hash TEXT NOT NULL REFERENCES documents(hash)
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_artist ON entries(artist_id, kind, fetched_at);
+        ''')
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(os.path.join(self.directory, INDEX_FILE), timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, SEGMENT_PATTERN.format(segment))
+
+    def _compress(self, raw: bytes) -> bytes:
+        if self.codec == 'zstd':
+            return self._compressor.compress(raw)
+        return zlib.compress(raw, self.level)
+
+    @staticmethod
+    def _decompress(codec: str, data: bytes) -> bytes:
+        if codec == 'zstd':
+            if zstandard is None:
+                raise RuntimeError("This archive holds zstd-compressed documents; install zstandard to read them")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    def put(self, artist_id: str, kind: str, data: Any, fetched_at: Optional[datetime] = None) -> str:
+        """Archive one document (e.g. kind 'response' or 'metrics') for an artist; returns its hash.
+
+        fetched_at is in UTC, like the database's refresh timestamps.
+        """
+        raw = encode(data)
+        digest = hashlib.sha256(raw).hexdigest()
+        fetched = (fetched_at or datetime.utcnow()).isoformat()
+        with self._lock:
+            conn = self._index
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if conn.execute('SELECT 1 FROM documents WHERE hash = ?', (digest,)).fetchone() is None:
+                    compressed = self._compress(raw)
+                    segment, offset = self._append(conn, compressed)
+                    conn.execute('INSERT INTO documents (hash, segment, offset, length, raw_length, codec) '
+                                 'VALUES (?, ?, ?, ?, ?, ?)',
+                                 (digest, segment, offset, len(compressed), len(raw), self.codec))
+                conn.execute('INSERT INTO entries (artist_id, kind, fetched_at, hash) VALUES (?, ?, ?, ?)',
+                             (artist_id, kind, fetched, digest))
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        return digest
+
+    def _append(self, conn: sqlite3.Connection, data: bytes) -> Tuple[int, int]:
+        """Append to the newest segment (starting a new one when it is full); returns (segment, offset)."""
+        segment = conn.execute('SELECT MAX(segment) FROM documents').fetchone()[0] or 1
+        path = self._segment_path(segment)
+        offset = os.path.getsize(path) if os.path.exists(path) else 0
+        if offset and offset + len(data) > self.segment_size:
+            segment += 1
+            path = self._segment_path(segment)
+            offset = os.path.getsize(path) if os.path.exists(path) else 0
+        with open(path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return segment, offset
+
+    def _view(self, segment: int, end: int) -> mmap.mmap:
+        """A memory map of a segment covering at least its first `end` bytes."""
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped[1]) < end:
+            if mapped is not None:
+                mapped[1].close()
+                mapped[0].close()
+            f = open(self._segment_path(segment), 'rb')
+            mapped = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            self._maps[segment] = mapped
+        return mapped[1]
+
+    def read(self, digest: str) -> bytes:
+        """The canonical JSON bytes of a document."""
+        row = self._reader().execute(
+            'SELECT segment, offset, length, codec FROM documents WHERE hash = ?', (digest,)).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        segment, offset, length, codec = row
+        with self._lock:
+            view = self._view(segment, offset + length)
+            data = view[offset:offset + length]
+        return self._decompress(codec, data)
+
+    def get(self, digest: str) -> Any:
+        return json.loads(self.read(digest))
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._lock:
+                self._readers.append(conn)
+        return conn
+
+    def latest(self, artist_id: str, kind: str = 'response') -> Optional[Any]:
+        """The most recently archived document of a kind for an artist, or None."""
+        row = self._reader().execute(
+            'SELECT hash FROM entries WHERE artist_id = ? AND kind = ? ORDER BY fetched_at DESC, id DESC LIMIT 1',
+            (artist_id, kind)).fetchone()
+        return self.get(row[0]) if row else None
+
+    def entries(self, artist_id: Optional[str] = None, kind: Optional[str] = None,
+                since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Index entries in the order they were archived, optionally for one artist/kind or after a fetch time."""
+        query = 'SELECT id, artist_id, kind, fetched_at, hash FROM entries WHERE 1 = 1'
+        params: List[Any] = []
+        for column, value in (('artist_id', artist_id), ('kind', kind)):
+            if value is not None:
+                query += f' AND {column} = ?'
+                params.append(value)
+        if since is not None:
+            query += ' AND fetched_at > ?'
+            params.append(since)
+        query += ' ORDER BY id'
+        columns = ('id', 'artist_id', 'kind', 'fetched_at', 'hash')
+        return [dict(zip(columns, row)) for row in self._reader().execute(query, params)]
+
+    def iter_documents(self, kind: str = 'response', since: Optional[str] = None) -> Iterator[Tuple[Dict, Any]]:
+        """(entry, document) for every archived document of a kind, oldest first; for re-processing."""
+        for entry in self.entries(kind=kind, since=since):
+            yield entry, self.get(entry['hash'])
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._reader()
+        documents, raw, stored = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(raw_length), 0), COALESCE(SUM(length), 0) FROM documents').fetchone()
+        entries = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        segments = conn.execute('SELECT COUNT(DISTINCT segment) FROM documents').fetchone()[0]
+        return {
+            'entries': entries,
+            'documents': documents,
+            'segments': segments,
+            'raw_bytes': raw,
+            'stored_bytes': stored,
+            'ratio': round(raw / stored, 2) if stored else None,
+            'codec': self.codec,
+        }
+
+    def close(self):
+        with self._lock:
+            for f, view in self._maps.values():
+                view.close()
+                f.close()
+            self._maps = {}
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+        self._local = threading.local()
+        self._index.close()
@@ -1,29 +1,319 @@
 import logging
+import os
 import sqlite3
-from typing import List, Optional, Dict, Any
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime
 from contextlib import contextmanager
 
-from .models import Artist, ArtistAlbum, AlbumType, ExternalUrl, Followers, Image
+from . import schedule
+from .cache import LRUCache
+from .history import HISTORY_TABLE, ensure_history_triggers, has_history
+from .metrics import registry
+from .models import Artist, ArtistAlbum, ArtistSummary, AlbumType, ExternalUrl, Followers, Image
+
+# Applied to every connection. WAL lets readers run while another process
+# writes; NORMAL sync is safe in WAL mode and avoids an fsync per commit.
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-16000',
+    'PRAGMA mmap_size=67108864',
+)
+
+# Columns read to load an Artist: all of them, and whether the JSON columns
+# Artist decodes on first read hold valid JSON, which Artist.from_db_dict
+# checks so a corrupt row is rejected when it is loaded without decoding it.
+ARTIST_COLUMNS = ('*, json_valid(external_urls) AND json_valid(followers) '
+                  'AND json_valid(genres) AND json_valid(images) AS json_ok')
+
+REFRESH_TRIGGERS = {
+    'artists_refresh_due_insert': 'AFTER INSERT ON artists',
+    'artists_refresh_due_update': 'AFTER UPDATE OF popularity, last_updated, enhanced_data_updated ON artists',
+}
+
+
+def _refresh_due_updates(prefix: str, tiers: Tuple[schedule.Tier, ...]) -> str:
+    return (
+        f"standard_due_at = {schedule.due_at_sql(prefix + 'last_updated', prefix + 'popularity', 'standard_api_days', tiers)}, "
+        f"partner_due_at = {schedule.due_at_sql(prefix + 'enhanced_data_updated', prefix + 'popularity', 'partner_api_days', tiers)}"
+    )
+
+
+def ensure_refresh_schedule(conn: sqlite3.Connection, tiers: Optional[Tuple[schedule.Tier, ...]] = None) -> bool:
+    """Maintain artists.standard_due_at/partner_due_at from the tier schedule.
+    
+    Adds the columns and their indexes if needed, and triggers that recompute
+    both on every insert and on updates of popularity or either refresh
+    timestamp, whichever code does the write. When the schedule differs from
+    the one the triggers were built with, they are replaced and every row is
+    recomputed. Returns True if anything changed.
+    """
+    tiers = tiers or schedule.load_tiers()
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(artists)')}
+    existing = dict(conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN (?, ?)", tuple(REFRESH_TRIGGERS)
+    ).fetchall())
+    expected = {
+        name: f"CREATE TRIGGER {name} {event} BEGIN "
+              f"UPDATE artists SET {_refresh_due_updates('NEW.', tiers)} WHERE id = NEW.id; END"
+        for name, event in REFRESH_TRIGGERS.items()
+    }
+    if {'standard_due_at', 'partner_due_at'} <= columns and existing == expected:
+        return False
+    
+    for column in ('standard_due_at', 'partner_due_at'):
+        if column not in columns:
+            conn.execute(f'ALTER TABLE artists ADD COLUMN {column} TIMESTAMP')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{column} ON artists({column})')
+    for name, sql in expected.items():
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+        conn.execute(sql)
+    conn.execute(f'UPDATE artists SET {_refresh_due_updates("", tiers)}')
+    conn.commit()
+    return True
+
+
+def select_due_artists(conn: sqlite3.Connection, standard: bool = True, partner: bool = True,
+                       limit: Optional[int] = None, min_popularity: Optional[int] = None,
+                       max_popularity: Optional[int] = None, now: Optional[datetime] = None,
+                       tiers: Optional[Tuple[schedule.Tier, ...]] = None) -> List[Dict[str, Any]]:
+    """Artists due for a standard and/or Partner API refresh, top tier first.
+    
+    This is the one staleness query every update tool uses. Each check is a
+    range scan on the standard_due_at/partner_due_at index; the due rows are
+    ordered by tier, then popularity, then most overdue. The query only reads:
+    the due columns must already exist, so connections not opened through
+    ArtistDatabase call ensure_refresh_schedule once at startup. Popularity
+    bounds are inclusive min and exclusive max, for selecting a single tier.
+    """
+    if not (standard or partner):
+        return []
+    tiers = tiers or schedule.load_tiers()
+    
+    now = (now or datetime.utcnow()).strftime('%Y-%m-%d %H:%M:%S')
+    due_columns = [column for column, wanted in (('standard_due_at', standard), ('partner_due_at', partner)) if wanted]
+    conditions = [f"({' OR '.join(f'{column} <= ?' for column in due_columns)})"]
+    params: List[Any] = [now] * len(due_columns)
+    if min_popularity is not None:
+        conditions.append('popularity >= ?')
+        params.append(min_popularity)
+    if max_popularity is not None:
+        conditions.append('popularity < ?')
+        params.append(max_popularity)
+    overdue = due_columns[0] if len(due_columns) == 1 else 'MIN(standard_due_at, partner_due_at)'
+    order_by = f"{schedule.tier_rank_sql('popularity', tiers)}, popularity DESC, {overdue}"
+    
+    query = f"""
+        SELECT id, name, popularity, last_updated, enhanced_data_updated, standard_due_at, partner_due_at
+        FROM artists
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {order_by}
+    """
+    if limit:
+        query += ' LIMIT ?'
+        params.append(int(limit))
+    
+    artists = []
+    for row in conn.execute(query, params):
+        artist = dict(zip(('id', 'name', 'popularity', 'last_updated', 'enhanced_data_updated',
+                           'standard_due_at', 'partner_due_at'), row))
+        artist['tier'] = schedule.tier_for(artist['popularity'], tiers).name
+        artist['needs_standard'] = artist['standard_due_at'] <= now
+        artist['needs_partner'] = artist['partner_due_at'] <= now
+        artists.append(artist)
+    return artists
+
+
+# Rows of artist_genres for one artist's genres JSON (a list of strings)
+_GENRE_ROWS = ("SELECT {row}.id, lower(trim(g.value)) FROM {tables}json_each("
+               "CASE WHEN json_valid({row}.genres) THEN {row}.genres ELSE '[]' END) AS g "
+               "WHERE g.type = 'text' AND trim(g.value) != ''")
+
+GENRE_TRIGGERS = {
+    'artist_genres_insert': (
+        'AFTER INSERT ON artists',
+        f"INSERT OR IGNORE INTO artist_genres (artist_id, genre) {_GENRE_ROWS.format(row='NEW', tables='')};"
+    ),
+    'artist_genres_update': (
+        'AFTER UPDATE OF genres ON artists WHEN OLD.genres IS NOT NEW.genres',
+        'DELETE FROM artist_genres WHERE artist_id = OLD.id; '
+        f"INSERT OR IGNORE INTO artist_genres (artist_id, genre) {_GENRE_ROWS.format(row='NEW', tables='')};"
+    ),
+    'artist_genres_delete': (
+        'AFTER DELETE ON artists',
+        'DELETE FROM artist_genres WHERE artist_id = OLD.id;'
+    ),
+}
+
+
+def ensure_genre_index(conn: sqlite3.Connection) -> bool:
+    """Maintain artist_genres, one row per (artist, genre), from artists.genres.
+    
+    Creates the table with lookups indexed both ways (by artist through the
+    primary key, by genre through idx_artist_genres_genre) and triggers that
+    keep it in step with every insert, genre change and delete, whichever
+    code does the write. Genres are stored lowercased. When the table or
+    its triggers are missing or out of date it is rebuilt from every row.
+    Returns True if anything changed.
+    """
+    expected = {
+        name: f"CREATE TRIGGER {name} {event} BEGIN {body} END"
+        for name, (event, body) in GENRE_TRIGGERS.items()
+    }
+    existing = dict(conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({','.join('?' * len(expected))})",
+        tuple(expected)
+    ).fetchall())
+    has_table = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'artist_genres'"
+    ).fetchone() is not None
+    if has_table and existing == expected:
+        return False
+    
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS artist_genres (
+            artist_id TEXT NOT NULL,
+            genre TEXT NOT NULL,
+            PRIMARY KEY (artist_id, genre)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_artist_genres_genre ON artist_genres(genre, artist_id)')
+    for name, sql in expected.items():
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+        conn.execute(sql)
+    conn.execute('DELETE FROM artist_genres')
+    conn.execute(f"INSERT OR IGNORE INTO artist_genres (artist_id, genre) {_GENRE_ROWS.format(row='artists', tables='artists, ')}")
+    conn.commit()
+    return True
+
 
 class ArtistDatabase:
-    def __init__(self, db_path: str, logger: logging.Logger):
+    # Bound variables per IN (...) lookup, well under SQLite's limit
+    MAX_QUERY_PARAMS = 500
+
+    def __init__(self, db_path: str, logger: logging.Logger, busy_timeout: float = 10.0,
+                 tiers: Optional[Tuple[schedule.Tier, ...]] = None, cache_size: int = 1024):
         self.db_path = db_path
         self.logger = logger
+        # Refresh schedule behind standard_due_at/partner_due_at (config.json by default)
+        self.tiers = tiers or schedule.load_tiers()
+        # Seconds a statement waits for another writer's lock before failing
+        self.busy_timeout = busy_timeout
+        # One persistent connection per thread, opened on first use
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # Saves from every thread share one write connection, one at a time
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_pid: Optional[int] = None
+        self._write_lock = threading.RLock()
+        # Decoded artists by ID. Saves drop the entries they write; commits
+        # made by any other connection are caught by the write connection's
+        # PRAGMA data_version, which our own saves do not change
+        self.cache = LRUCache(maxsize=cache_size, copy=Artist.copy)
+        self._data_version: Optional[int] = None
+        # (history version, per-artist trends) of the last get_trends call
+        self._trends: Optional[Tuple[Any, Dict[str, Any]]] = None
         self.initialize_db()
 
+    def _connect(self) -> sqlite3.Connection:
+        # check_same_thread is off only so close() can run from any thread;
+        # each connection is otherwise used by the thread that opened it
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Context manager yielding this thread's connection.
+        
+        The connection stays open for reuse. Anything left uncommitted when
+        the outermost block exits (e.g. after an exception) is rolled back.
+        """
+        local = self._local
+        # A forked child must not share its parent's connection
+        if getattr(local, 'pid', None) != os.getpid():
+            local.conn = self._connect()
+            local.pid = os.getpid()
+            local.depth = 0
+        conn = local.conn
+        if local.depth == 0 and len(self.cache):
+            self._check_foreign_commits(blocking=False)
+        local.depth += 1
         try:
             yield conn
         finally:
-            conn.close()
+            local.depth -= 1
+            if local.depth == 0 and conn.in_transaction:
+                conn.rollback()
 
+    @contextmanager
+    def write_connection(self):
+        """Context manager yielding the shared write connection, holding the write lock.
+        
+        Writes from all threads are serialized here, so they never wait on
+        each other's SQLite write lock. Anything left uncommitted on exit is
+        rolled back.
+        """
+        with self._write_lock:
+            conn = self._check_foreign_commits()
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+
+    def _check_foreign_commits(self, blocking: bool = True) -> Optional[sqlite3.Connection]:
+        """Clear the artist cache if any other connection has committed since the last check.
+        
+        data_version on the write connection changes only for commits made by
+        other connections (the batch tools, or code writing through
+        get_connection), not for our own saves. Reads call this without
+        blocking and skip the check while a save holds the lock, since that
+        save has just made the same check. Returns the write connection.
+        """
+        if not self._write_lock.acquire(blocking=blocking):
+            return None
+        try:
+            # A forked child must not share its parent's connection
+            if self._writer is None or self._writer_pid != os.getpid():
+                self._writer = self._connect()
+                self._writer_pid = os.getpid()
+                self._data_version = None
+            version = self._writer.execute('PRAGMA data_version').fetchone()[0]
+            if version != self._data_version:
+                self.cache.clear()
+                self._data_version = version
+            return self._writer
+        finally:
+            self._write_lock.release()
+
+    def close(self):
+        """Close every connection opened by this database."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                self.logger.error(f"Error closing database connection: {str(e)}")
+        # Threads reconnect on their next use
+        self._local = threading.local()
+        with self._write_lock:
+            self._writer = None
+            self._data_version = None
+        self.cache.clear()
+
+    @registry.timed("sqlite.initialize_db")
     def initialize_db(self):
-        """Create artists table if it doesn't exist."""
+        """Create artists table if it doesn't exist, with its refresh schedule."""
         with self.get_connection() as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS artists (
@@ -43,14 +333,127 @@ class ArtistDatabase:
                     upcoming_tours_count INTEGER,
                     upcoming_tours_json TEXT,
                     enhanced_data_updated TIMESTAMP,
-                    data_sources TEXT
+                    data_sources TEXT,
+                    standard_due_at TIMESTAMP,
+                    partner_due_at TIMESTAMP
                 )
             ''')
             conn.commit()
+            if ensure_refresh_schedule(conn, self.tiers):
+                self.logger.info("Updated artist refresh schedule columns and triggers")
+            if ensure_genre_index(conn):
+                self.logger.info("Rebuilt artist_genres index and triggers")
+            if ensure_history_triggers(conn):
+                self.logger.info("Updated artist_stats_history triggers to replace same-second snapshots")
+
+    @staticmethod
+    def _normalize_genres(genres: Sequence[str]) -> List[str]:
+        return list(dict.fromkeys(g.strip().lower() for g in genres if g and g.strip()))
+
+    @registry.timed("sqlite.get_artists_by_genre")
+    def get_artists_by_genre(self, genres: Sequence[str], partial: bool = False,
+                             min_popularity: Optional[int] = None, limit: Optional[int] = None) -> List[Artist]:
+        """
+        Artists tagged with any of `genres`, most popular first.
+        Matching is case-insensitive. With partial, a genre matches if it
+        contains one of the terms ('house' finds 'deep house' and
+        'tech house'); that check runs over the distinct genres only, and
+        the artists are then found through the genre index.
+        """
+        terms = self._normalize_genres(genres)
+        if not terms:
+            return []
+        
+        if partial:
+            match = ' OR '.join('instr(genre, ?) > 0' for _ in terms)
+            genre_filter = f'SELECT DISTINCT genre FROM artist_genres WHERE {match}'
+        else:
+            genre_filter = ','.join('?' * len(terms))
+        query = f'''
+            SELECT {ARTIST_COLUMNS} FROM artists
+            WHERE id IN (SELECT artist_id FROM artist_genres WHERE genre IN ({genre_filter}))
+        '''
+        params: List[Any] = list(terms)
+        if min_popularity is not None:
+            query += ' AND popularity >= ?'
+            params.append(min_popularity)
+        query += ' ORDER BY popularity DESC, id'
+        if limit:
+            query += ' LIMIT ?'
+            params.append(int(limit))
+        
+        artists = []
+        with self.get_connection() as conn:
+            for row in conn.execute(query, params):
+                try:
+                    artists.append(Artist.from_db_dict(dict(row)))
+                except Exception as e:
+                    self.logger.error(f"Error parsing artist {row['id']}: {str(e)}")
+        return artists
 
+    @registry.timed("sqlite.get_genre_counts")
+    def get_genre_counts(self, contains: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Genres with the number of artists tagged with each, most common first."""
+        query = 'SELECT genre, COUNT(*) AS artists FROM artist_genres'
+        params: List[Any] = []
+        if contains and contains.strip():
+            query += ' WHERE instr(genre, ?) > 0'
+            params.append(contains.strip().lower())
+        query += ' GROUP BY genre ORDER BY artists DESC, genre'
+        if limit:
+            query += ' LIMIT ?'
+            params.append(int(limit))
+        with self.get_connection() as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    @registry.timed("sqlite.get_trends")
+    def get_trends(self, metric: str = 'monthly_listeners', window: int = 30, limit: int = 10,
+                   rank_by: str = 'pct', min_value: Optional[float] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Artists rising and falling most over a window of artist_stats_history; see trends.top_movers.
+        
+        Trends for every artist are computed in one vectorized pass and reused
+        until rows are added to or removed from the history.
+        """
+        # Imported here: trends needs numpy, which the server should not load at startup
+        from . import trends
+
+        with self.get_connection() as conn:
+            if not has_history(conn):
+                return {'risers': [], 'fallers': []}
+            version = tuple(conn.execute(f'SELECT MAX(id), COUNT(*) FROM {HISTORY_TABLE}').fetchone())
+            cached = self._trends
+            if cached is None or cached[0] != version:
+                cached = (version, trends.compute_trends(trends.load_history(conn)))
+                self._trends = cached
+            movers = trends.top_movers(cached[1], metric=metric, window=window, limit=limit,
+                                       rank_by=rank_by, min_value=min_value)
+            ids = [entry['id'] for entries in movers.values() for entry in entries]
+            if ids:
+                names = dict(tuple(row) for row in conn.execute(
+                    f"SELECT id, name FROM artists WHERE id IN ({','.join('?' * len(ids))})", ids))
+                for entries in movers.values():
+                    for entry in entries:
+                        entry['name'] = names.get(entry['id'])
+            return movers
+
+    @registry.timed("sqlite.get_artists_due")
+    def get_artists_due(self, standard: bool = True, partner: bool = True, limit: Optional[int] = None,
+                        min_popularity: Optional[int] = None, max_popularity: Optional[int] = None,
+                        now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Artists due for refresh under this database's schedule; see select_due_artists."""
+        with self.get_connection() as conn:
+            return select_due_artists(conn, standard=standard, partner=partner, limit=limit,
+                                      min_popularity=min_popularity, max_popularity=max_popularity,
+                                      now=now, tiers=self.tiers)
+
+    @registry.timed("sqlite.save_artists_batch")
     def save_artists_batch(self, artists: List[Artist]) -> Dict[str, List[str]]:
         """
         Save multiple artists in one transaction.
+        Rows are encoded up front and written with executemany using the same
+        upsert as save_artist, so stored Partner API fields are preserved.
+        A row that fails is reported in 'failed'/'errors' without aborting
+        the others.
         Returns dict with successful and failed IDs.
         """
         results = {
@@ -61,119 +464,149 @@ class ArtistDatabase:
         
         if not artists:
             return results
+        
+        # Artists carrying different optional columns need different statements
+        groups: Dict[tuple, List[tuple]] = {}
+        for artist in artists:
+            try:
+                data = artist.to_db_dict()
+            except Exception as e:
+                self.logger.error(f"Error encoding artist {artist.id}: {str(e)}")
+                results['failed'].append(artist.id)
+                results['errors'][artist.id] = str(e)
+                continue
+            groups.setdefault(tuple(data), []).append((artist.id, tuple(data.values())))
             
         try:
-            with self.get_connection() as conn:
-                for artist in artists:
+            with self.write_connection() as conn:
+                if not conn.in_transaction:
+                    conn.execute('BEGIN')
+                for columns, rows in groups.items():
+                    query = self._upsert_query(list(columns))
+                    conn.execute('SAVEPOINT save_artists_batch')
                     try:
-                        data = artist.to_db_dict()
-                        placeholders = ', '.join('?' * len(data))
-                        columns = ', '.join(data.keys())
-                        values = tuple(data.values())
-                        
-                        query = f'''
-                            INSERT OR REPLACE INTO artists ({columns})
-                            VALUES ({placeholders})
-                        '''
-                        conn.execute(query, values)
-                        results['successful'].append(artist.id)
-                        
-                    except Exception as e:
-                        self.logger.error(f"Error saving artist {artist.id}: {str(e)}")
-                        results['failed'].append(artist.id)
-                        results['errors'][artist.id] = str(e)
+                        conn.executemany(query, [values for _, values in rows])
+                        conn.execute('RELEASE save_artists_batch')
+                        results['successful'].extend(artist_id for artist_id, _ in rows)
+                        continue
+                    except sqlite3.Error as e:
+                        self.logger.warning(f"Batch upsert failed ({str(e)}), retrying {len(rows)} rows one by one")
+                        conn.execute('ROLLBACK TO save_artists_batch')
+                        conn.execute('RELEASE save_artists_batch')
+                    
+                    # Find the rows that fail; a failed statement only undoes itself
+                    for artist_id, values in rows:
+                        try:
+                            conn.execute(query, values)
+                            results['successful'].append(artist_id)
+                        except sqlite3.Error as e:
+                            if not conn.in_transaction:
+                                raise
+                            self.logger.error(f"Error saving artist {artist_id}: {str(e)}")
+                            results['failed'].append(artist_id)
+                            results['errors'][artist_id] = str(e)
                 
                 conn.commit()
+                self.cache.pop(*(artist.id for artist in artists))
                 self.logger.info(f"Batch save completed: {len(results['successful'])} successful, {len(results['failed'])} failed")
                 
         except Exception as e:
             self.logger.error(f"Batch save transaction failed: {str(e)}")
             # If transaction fails, all unsaved artists are considered failed
+            results['successful'] = []
             pending = [artist.id for artist in artists 
-                      if artist.id not in results['successful']]
+                      if artist.id not in results['failed']]
             results['failed'].extend(pending)
             results['errors']['transaction'] = str(e)
             
         return results
 
+    @staticmethod
+    def _upsert_query(columns: List[str]) -> str:
+        """INSERT ... ON CONFLICT(id) DO UPDATE for the given columns.
+        
+        Only the columns supplied are written, so Partner API columns (and
+        any others this save does not carry) keep their stored values, and
+        data_sources is merged key by key. Unlike INSERT OR REPLACE this
+        updates the row in place, so the insert trigger does not fire again.
+        Its conflict policy also applies inside triggers, so the history
+        triggers are made to replace same-second snapshots without relying
+        on one (see ensure_history_triggers).
+        """
+        updates = [f'{column} = excluded.{column}' for column in columns if column not in ('id', 'data_sources')]
+        if 'data_sources' in columns:
+            updates.append(
+                'data_sources = CASE WHEN json_valid(artists.data_sources) '
+                'THEN json_patch(artists.data_sources, excluded.data_sources) '
+                'ELSE excluded.data_sources END'
+            )
+        return f'''
+            INSERT INTO artists ({', '.join(columns)})
+            VALUES ({', '.join('?' * len(columns))})
+            ON CONFLICT(id) DO UPDATE SET {', '.join(updates)}
+        '''
+
+    @registry.timed("sqlite.save_artist")
     def save_artist(self, artist: Artist) -> bool:
-        """Save or update single artist in database with smart field preservation."""
+        """Save or update single artist in database, preserving stored Partner API fields."""
         try:
-            # Check if artist already exists with extended data
-            existing = self.get_artist(artist.id)
-            
-            if existing:
-                # Smart merge: preserve extended fields from Partner API
-                if artist.data_sources.get('id', 'api') == 'api':
-                    # This is a standard API update
-                    self.logger.info(f"Smart merging artist {artist.name} to preserve extended data")
-                    
-                    # Copy extended fields from existing record if they exist
-                    if existing.monthly_listeners is not None:
-                        artist.monthly_listeners = existing.monthly_listeners
-                        artist.data_sources['monthly_listeners'] = existing.data_sources.get('monthly_listeners', 'partner_api')
-                        
-                    if existing.social_links_json is not None:
-                        artist.social_links_json = existing.social_links_json
-                        artist.data_sources['social_links_json'] = existing.data_sources.get('social_links_json', 'partner_api')
-                        
-                    if existing.upcoming_tours_count is not None:
-                        artist.upcoming_tours_count = existing.upcoming_tours_count
-                        artist.data_sources['upcoming_tours_count'] = existing.data_sources.get('upcoming_tours_count', 'partner_api')
-                        
-                    if existing.upcoming_tours_json is not None:
-                        artist.upcoming_tours_json = existing.upcoming_tours_json
-                        artist.data_sources['upcoming_tours_json'] = existing.data_sources.get('upcoming_tours_json', 'partner_api')
-                        
-                    if existing.enhanced_data_updated is not None:
-                        artist.enhanced_data_updated = existing.enhanced_data_updated
-                        artist.data_sources['enhanced_data_updated'] = existing.data_sources.get('enhanced_data_updated', 'partner_api')
-            
-            # Perform the database save
-            with self.get_connection() as conn:
-                data = artist.to_db_dict()
-                placeholders = ', '.join('?' * len(data))
-                columns = ', '.join(data.keys())
-                values = tuple(data.values())
-                
-                query = f'''
-                    INSERT OR REPLACE INTO artists ({columns})
-                    VALUES ({placeholders})
-                '''
-                conn.execute(query, values)
+            data = artist.to_db_dict()
+            with self.write_connection() as conn:
+                conn.execute(self._upsert_query(list(data)), tuple(data.values()))
                 conn.commit()
-                
-                if existing and existing.monthly_listeners is not None:
-                    self.logger.info(f"Saved artist {artist.name} ({artist.id}) to database while preserving extended data")
-                else:    
-                    self.logger.info(f"Saved artist {artist.name} ({artist.id}) to database")
-                return True
+                # The stored row may differ from `artist` (merged data_sources,
+                # preserved Partner API columns), so the next read decodes it again
+                self.cache.pop(artist.id)
+            self.logger.info(f"Saved artist {artist.name} ({artist.id}) to database")
+            return True
                 
         except Exception as e:
             self.logger.error(f"Error saving artist {artist.id}: {str(e)}")
             return False
 
+    @registry.timed("sqlite.get_artist")
     def get_artist(self, artist_id: str) -> Optional[Artist]:
-        """Retrieve artist from database by ID."""
+        """Retrieve artist from database by ID, from the decoded-artist cache when possible."""
         try:
             with self.get_connection() as conn:
+                artist = self.cache.get(artist_id)
+                if artist is not None:
+                    return artist
+                generation = self.cache.generation
                 cursor = conn.execute(
-                    'SELECT * FROM artists WHERE id = ?',
+                    f'SELECT {ARTIST_COLUMNS} FROM artists WHERE id = ?',
                     (artist_id,)
                 )
                 row = cursor.fetchone()
                 if row:
-                    return Artist.from_db_dict(dict(row))
+                    artist = Artist.from_db_dict(dict(row))
+                    self.cache.set(artist_id, artist, generation)
+                    return artist
                 return None
                 
         except Exception as e:
             self.logger.error(f"Error retrieving artist {artist_id}: {str(e)}")
             return None
 
+    @registry.timed("sqlite.get_artist_summary")
+    def get_artist_summary(self, artist_id: str) -> Optional[ArtistSummary]:
+        """The scalar columns of one artist, for refresh checks; no JSON is read or decoded."""
+        try:
+            with self.get_connection() as conn:
+                row = conn.execute(f'SELECT {", ".join(ArtistSummary.COLUMNS)} FROM artists WHERE id = ?',
+                                   (artist_id,)).fetchone()
+                return ArtistSummary.from_db_row(row) if row else None
+        except Exception as e:
+            self.logger.error(f"Error retrieving artist summary {artist_id}: {str(e)}")
+            return None
+
+    @registry.timed("sqlite.get_artists_batch")
     def get_artists_batch(self, artist_ids: List[str]) -> Dict[str, Any]:
         """
         Retrieve multiple artists from database.
-        Returns dict with found artists and missing IDs.
+        IDs are looked up MAX_QUERY_PARAMS at a time, so any number can be
+        requested. Returns dict with found artists and missing IDs, both in
+        request order (duplicate IDs appear once).
         """
         results = {
             'found': [],
@@ -183,35 +616,100 @@ class ArtistDatabase:
         
         if not artist_ids:
             return results
+        
+        unique_ids = list(dict.fromkeys(artist_ids))
+        by_id: Dict[str, Artist] = {}
             
         try:
             with self.get_connection() as conn:
-                # Use single query with IN clause for efficiency
-                placeholders = ','.join('?' * len(artist_ids))
-                cursor = conn.execute(
-                    f'SELECT * FROM artists WHERE id IN ({placeholders})',
-                    artist_ids
-                )
-                
-                rows = cursor.fetchall()
-                found_ids = set()
-                
-                for row in rows:
-                    try:
-                        artist = Artist.from_db_dict(dict(row))
-                        results['found'].append(artist)
-                        found_ids.add(row['id'])
-                    except Exception as e:
-                        self.logger.error(f"Error parsing artist {row['id']}: {str(e)}")
-                        results['errors'][row['id']] = str(e)
-                
-                # Identify missing artists
-                results['missing'] = [aid for aid in artist_ids 
-                                    if aid not in found_ids]
+                for artist_id in unique_ids:
+                    artist = self.cache.get(artist_id)
+                    if artist is not None:
+                        by_id[artist_id] = artist
+                uncached = [artist_id for artist_id in unique_ids if artist_id not in by_id]
+                generation = self.cache.generation
+                for i in range(0, len(uncached), self.MAX_QUERY_PARAMS):
+                    chunk = uncached[i:i + self.MAX_QUERY_PARAMS]
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor = conn.execute(
+                        f'SELECT {ARTIST_COLUMNS} FROM artists WHERE id IN ({placeholders})',
+                        chunk
+                    )
+                    
+                    for row in cursor:
+                        try:
+                            artist = by_id[row['id']] = Artist.from_db_dict(dict(row))
+                            self.cache.set(row['id'], artist, generation)
+                        except Exception as e:
+                            self.logger.error(f"Error parsing artist {row['id']}: {str(e)}")
+                            results['errors'][row['id']] = str(e)
                 
         except Exception as e:
             self.logger.error(f"Batch retrieval failed: {str(e)}")
             results['errors']['query'] = str(e)
-            results['missing'] = artist_ids
+            results['missing'] = unique_ids
+            return results
+        
+        for artist_id in unique_ids:
+            if artist_id in by_id:
+                results['found'].append(by_id[artist_id])
+            else:
+                results['missing'].append(artist_id)
             
-        return results
\ No newline at end of file
+        return results
+
+    def _iter_rows(self, query: str, params: Sequence[Any], batch_size: int) -> Iterator[sqlite3.Row]:
+        """Rows of `query`, fetched batch_size at a time."""
+        with self.get_connection() as conn:
+            # A separate cursor, so the caller can use the connection between batches
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, tuple(params))
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield from rows
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _scan_query(columns: str, where: Optional[str], order_by: str) -> str:
+        query = f'SELECT {columns} FROM artists'
+        if where:
+            query += f' WHERE {where}'
+        if order_by:
+            query += f' ORDER BY {order_by}'
+        return query
+
+    def iter_artists(self, where: Optional[str] = None, params: Sequence[Any] = (),
+                     batch_size: int = 500, order_by: str = 'id') -> Iterator[Artist]:
+        """
+        Yield every artist matching an optional SQL `where` clause.
+        Rows are read batch_size at a time with fetchmany, so memory use stays
+        flat however many rows match. Rows with invalid JSON are logged and
+        skipped; the JSON fields are only decoded when first read (see
+        Artist.from_db_dict). Scans that need none of them should use
+        iter_artist_summaries.
+        
+        Example: db.iter_artists('popularity >= ?', (75,))
+        """
+        for row in self._iter_rows(self._scan_query(ARTIST_COLUMNS, where, order_by), params, batch_size):
+            try:
+                artist = Artist.from_db_dict(dict(row))
+            except Exception as e:
+                self.logger.error(f"Error parsing artist {row['id']}: {str(e)}")
+                continue
+            yield artist
+
+    def iter_artist_summaries(self, where: Optional[str] = None, params: Sequence[Any] = (),
+                              batch_size: int = 500, order_by: str = 'id') -> Iterator[ArtistSummary]:
+        """
+        Like iter_artists, but yields ArtistSummary: only the scalar columns
+        are read, and nothing is decoded from JSON.
+        
+        Example: db.iter_artist_summaries('monthly_listeners >= ?', (1000000,))
+        """
+        query = self._scan_query(', '.join(ArtistSummary.COLUMNS), where, order_by)
+        for row in self._iter_rows(query, params, batch_size):
+            yield ArtistSummary.from_db_row(row)
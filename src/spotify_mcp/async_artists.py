@@ -0,0 +1,145 @@
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from . import dispatch
+from .artists import ArtistDatabase
+from .metrics import registry
+from .models import Artist, ArtistSummary
+
+# Queued by close() to stop the writer thread
+_STOP = object()
+
+
+class AsyncArtistDatabase:
+    """Async front end for an ArtistDatabase, safe to call from the event loop.
+
+    Reads run on a small pool of reader threads, each with its own
+    connection. Writes are queued to a single writer thread, which takes
+    every save waiting in the queue and commits them together with one
+    save_artists_batch call, so concurrent updaters share a transaction
+    instead of taking turns on the write lock. A save that touches an artist
+    already in the current group waits for the next one, so saves of the
+    same artist are applied in the order they were made. A save whose
+    caller is cancelled before its group starts is dropped.
+    """
+
+    def __init__(self, db: ArtistDatabase, readers: int = 4, max_group_size: int = 500):
+        self.db = db
+        self.max_group_size = max_group_size
+        self.reader = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="artist-db-read")
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._closed = False
+
+    async def _read(self, func, *args, **kwargs):
+        return await dispatch.run_in(self.reader, func, *args, **kwargs)
+
+    async def get_artist(self, artist_id: str) -> Optional[Artist]:
+        return await self._read(self.db.get_artist, artist_id)
+
+    async def get_artist_summary(self, artist_id: str) -> Optional[ArtistSummary]:
+        return await self._read(self.db.get_artist_summary, artist_id)
+
+    async def get_artists_batch(self, artist_ids: List[str]) -> Dict[str, Any]:
+        return await self._read(self.db.get_artists_batch, artist_ids)
+
+    async def get_artists_due(self, **kwargs) -> List[Dict[str, Any]]:
+        return await self._read(self.db.get_artists_due, **kwargs)
+
+    async def get_artists_by_genre(self, genres: List[str], **kwargs) -> List[Artist]:
+        return await self._read(self.db.get_artists_by_genre, genres, **kwargs)
+
+    async def get_genre_counts(self, **kwargs) -> List[Dict[str, Any]]:
+        return await self._read(self.db.get_genre_counts, **kwargs)
+
+    async def get_trends(self, **kwargs) -> Dict[str, List[Dict[str, Any]]]:
+        return await self._read(self.db.get_trends, **kwargs)
+
+    async def save_artist(self, artist: Artist) -> bool:
+        """Queue one artist for the next group commit; True once it is saved."""
+        result = await self.save_artists([artist])
+        return artist.id in result['successful']
+
+    async def save_artists(self, artists: List[Artist]) -> Dict[str, Any]:
+        """Queue artists for the next group commit.
+
+        Returns the same dict as ArtistDatabase.save_artists_batch, covering
+        only these artists.
+        """
+        if not artists:
+            return {'successful': [], 'failed': [], 'errors': {}}
+        if self._closed:
+            raise RuntimeError("AsyncArtistDatabase is closed")
+        self._start_writer()
+        future: Future = Future()
+        self._queue.put((list(artists), future))
+        return await asyncio.wrap_future(dispatch.track(future))
+
+    def _start_writer(self):
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="artist-db-write", daemon=True)
+                    self._writer.start()
+
+    def _write_loop(self):
+        held = None
+        while True:
+            request = self._queue.get() if held is None else held
+            held = None
+            if request is _STOP:
+                return
+            group = [request]
+            ids = {artist.id for artist in request[0]}
+            size = len(request[0])
+            # Take whatever else queued up while the last group was committing
+            while size < self.max_group_size:
+                try:
+                    request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is _STOP or ids.intersection(artist.id for artist in request[0]):
+                    held = request
+                    break
+                group.append(request)
+                ids.update(artist.id for artist in request[0])
+                size += len(request[0])
+            self._commit(group)
+
+    def _commit(self, group: List[tuple]):
+        # Saves whose caller was cancelled while they were queued are dropped
+        group = [(artists, future) for artists, future in group if future.set_running_or_notify_cancel()]
+        if not group:
+            return
+        registry.increment("sqlite.group_commits")
+        registry.increment("sqlite.group_commit_saves", len(group))
+        try:
+            result = self.db.save_artists_batch([artist for artists, _ in group for artist in artists])
+        except Exception as e:
+            for _, future in group:
+                future.set_exception(e)
+            return
+
+        successful = set(result['successful'])
+        for artists, future in group:
+            ids = list(dict.fromkeys(artist.id for artist in artists))
+            errors = {artist_id: result['errors'][artist_id] for artist_id in ids if artist_id in result['errors']}
+            if 'transaction' in result['errors']:
+                errors['transaction'] = result['errors']['transaction']
+            future.set_result({
+                'successful': [artist_id for artist_id in ids if artist_id in successful],
+                'failed': [artist_id for artist_id in ids if artist_id not in successful],
+                'errors': errors
+            })
+
+    def close(self):
+        """Commit queued saves, then stop the writer and reader threads."""
+        self._closed = True
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join()
+        self.reader.shutdown(wait=True)
@@ -25,27 +25,32 @@ class ArtistBatchProcessor:
             'errors': {}
         }
 
+        # Duplicate IDs would cost extra upstream requests
+        unique_ids = list(dict.fromkeys(artist_ids))
+
         # Process in chunks of MAX_BATCH_SIZE
-        for i in range(0, len(artist_ids), self.MAX_BATCH_SIZE):
-            chunk = artist_ids[i:i + self.MAX_BATCH_SIZE]
+        for i in range(0, len(unique_ids), self.MAX_BATCH_SIZE):
+            chunk = unique_ids[i:i + self.MAX_BATCH_SIZE]
             try:
                 # Get artists from Spotify
                 artists_data = self.sp.artists(chunk)
                 
-                # Process each artist in the chunk
-                for artist_data in artists_data['artists']:
+                # Spotify returns one entry per requested ID, None if unknown
+                artists = []
+                for artist_id, artist_data in zip(chunk, artists_data['artists']):
                     if artist_data:
-                        artist = Artist.from_spotify_data(artist_data, source='api')
-                        if self.db.save_artist(artist):
-                            results['successful'].append(artist.id)
-                        else:
-                            results['failed'].append(artist.id)
-                            results['errors'][artist.id] = "Database save failed"
+                        artists.append(Artist.from_spotify_data(artist_data, source='api'))
                     else:
-                        # Handle case where artist data is None
-                        failed_id = chunk[len(results['successful'])]
-                        results['failed'].append(failed_id)
-                        results['errors'][failed_id] = "No data returned from Spotify"
+                        results['failed'].append(artist_id)
+                        results['errors'][artist_id] = "No data returned from Spotify"
+                
+                # Save the whole chunk in one transaction
+                if artists:
+                    save_results = self.db.save_artists_batch(artists)
+                    results['successful'].extend(save_results['successful'])
+                    for artist_id in save_results['failed']:
+                        results['failed'].append(artist_id)
+                        results['errors'][artist_id] = save_results['errors'].get(artist_id, "Database save failed")
                         
             except Exception as e:
                 # If chunk processing fails, mark all IDs as failed
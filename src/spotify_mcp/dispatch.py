@@ -0,0 +1,129 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional, Set, TypeVar
+
+T = TypeVar('T')
+
+# Playback and queue commands are order-sensitive, so they run one at a time.
+# Read-only tools may overlap.
+DEFAULT_TOOL_LIMITS = {
+    "Playback": 1,
+    "Queue": 1,
+    "Search": 4,
+    "GetInfo": 4,
+}
+
+# Pool futures started under the tool slot the current task holds, if any
+_slot_calls: contextvars.ContextVar[Optional[Set[concurrent.futures.Future]]] = \
+    contextvars.ContextVar('slot_calls', default=None)
+
+
+def track(future: concurrent.futures.Future) -> concurrent.futures.Future:
+    """Keep the tool slot the current task holds, if any, until `future` is done."""
+    calls = _slot_calls.get()
+    if calls is not None:
+        calls.add(future)
+    return future
+
+
+async def run_in(executor: concurrent.futures.Executor, func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking function on `executor`, tracked by the current tool slot (see track)."""
+    future = track(executor.submit(functools.partial(func, *args, **kwargs)))
+    return await asyncio.wrap_future(future)
+
+
+class ToolDispatcher:
+    """Runs blocking Spotify calls on a bounded thread pool with per-tool limits.
+
+    Every tool invocation acquires the semaphore for its tool name and stops
+    waiting once it exceeds the configured timeout. A timeout cannot stop a
+    call a worker thread has already started: the caller gets TimeoutError,
+    but the call runs to completion and keeps its tool slot until it does, so
+    a hung Playback call still blocks the next one. Calls that have not been
+    picked up by a worker thread yet are dropped from the pool on cancellation.
+    """
+
+    def __init__(self, logger: logging.Logger, max_workers: int = 8,
+                 tool_limits: Optional[Dict[str, int]] = None,
+                 default_limit: int = 4, timeout: Optional[float] = 30.0):
+        self.logger = logger
+        self.max_workers = max_workers
+        self.default_limit = default_limit
+        self.timeout = timeout
+        self.tool_limits = dict(DEFAULT_TOOL_LIMITS)
+        if tool_limits:
+            self.tool_limits.update(tool_limits)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="spotify-mcp")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, tool: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(tool)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.tool_limits.get(tool, self.default_limit))
+            self._semaphores[tool] = semaphore
+        return semaphore
+
+    def _release_when_done(self, tool: str, semaphore: asyncio.Semaphore,
+                           calls: Set[concurrent.futures.Future]) -> None:
+        """Release the slot once every pool call started under it has finished."""
+        running = [future for future in calls if not future.done()]
+        if not running:
+            semaphore.release()
+            return
+        self.logger.warning(f"Tool {tool} still has {len(running)} call(s) running; "
+                            f"its slot is held until they finish")
+        loop = asyncio.get_running_loop()
+        remaining = len(running)
+
+        def finished() -> None:
+            nonlocal remaining
+            remaining -= 1
+            if remaining == 0:
+                semaphore.release()
+
+        for future in running:
+            future.add_done_callback(lambda _: loop.call_soon_threadsafe(finished))
+
+    @asynccontextmanager
+    async def limit(self, tool: str, timeout: Optional[float] = None):
+        """Hold a concurrency slot for `tool` and enforce the call timeout.
+        
+        The timeout only stops the caller waiting. Pool calls made inside the
+        block through call(), run_in() or track(), on this dispatcher's pool
+        or any other, keep the slot until they complete.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        semaphore = self._semaphore(tool)
+        await semaphore.acquire()
+        calls: Set[concurrent.futures.Future] = set()
+        token = _slot_calls.set(calls)
+        try:
+            async with asyncio.timeout(timeout):
+                yield
+        except TimeoutError:
+            self.logger.error(f"Tool {tool} timed out after {timeout} seconds")
+            raise
+        finally:
+            _slot_calls.reset(token)
+            self._release_when_done(tool, semaphore, calls)
+
+    async def call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run a blocking function on the pool without taking a tool slot.
+        
+        Inside limit(), the call is tracked so the slot outlives a timeout
+        until the worker thread is done with it.
+        """
+        return await run_in(self.executor, func, *args, **kwargs)
+
+    async def run(self, tool: str, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run a blocking function for `tool` on the pool."""
+        async with self.limit(tool):
+            return await self.call(func, *args, **kwargs)
+
+    def shutdown(self, wait: bool = False) -> None:
+        self.executor.shutdown(wait=wait, cancel_futures=True)
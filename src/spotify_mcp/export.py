@@ -0,0 +1,365 @@
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from . import history
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # optional: pip install "spotify-mcp[export]"
+    pa = None
+
+FORMATS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+# Watermarks of the last export, per table, kept next to the exported files
+STATE_FILE = '_watermarks.json'
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError('Columnar export needs pyarrow: pip install "spotify-mcp[export]"')
+
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    """Parse the ISO timestamps the tables hold ('T' or space separated, with or without offset)."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _loads(value: Optional[str]) -> Any:
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _genres(value: Optional[str]) -> Optional[List[str]]:
+    genres = _loads(value)
+    return [str(g) for g in genres] if isinstance(genres, list) else None
+
+
+def _tours(value: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    """Flatten upcoming_tours_json, stored either as a list of dates or as {total_count, dates}."""
+    tours = _loads(value)
+    if isinstance(tours, dict):
+        tours = tours.get('dates')
+    if not isinstance(tours, list):
+        return None
+    flat = []
+    for tour in tours:
+        if not isinstance(tour, dict):
+            continue
+        location = tour.get('location') if isinstance(tour.get('location'), dict) else {}
+        flat.append({
+            'title': tour.get('title'),
+            'date': _timestamp(tour.get('date')),
+            'venue': location.get('name'),
+            'city': location.get('city') or tour.get('city'),
+            'festival': tour.get('festival') if isinstance(tour.get('festival'), bool) else None,
+        })
+    return flat
+
+
+def _string_map(value: Optional[str], key: Optional[str] = None) -> Optional[List[tuple]]:
+    """A JSON object as map entries; nested objects contribute their `key` field (e.g. a social link's url)."""
+    mapping = _loads(value)
+    if not isinstance(mapping, dict):
+        return None
+    entries = []
+    for name, item in mapping.items():
+        if isinstance(item, dict):
+            item = item.get(key) if key else None
+        if item is not None:
+            entries.append((name, str(item)))
+    return entries
+
+
+def _artist_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    urls = _loads(row['external_urls'])
+    followers = _loads(row['followers'])
+    images = _loads(row['images'])
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'popularity': row['popularity'],
+        'followers_total': followers.get('total') if isinstance(followers, dict) else None,
+        'genres': _genres(row['genres']),
+        'spotify_url': urls.get('spotify') if isinstance(urls, dict) else None,
+        'href': row['href'],
+        'uri': row['uri'],
+        'type': row['type'],
+        'images': [
+            {'url': image.get('url'), 'height': image.get('height'), 'width': image.get('width')}
+            for image in images if isinstance(image, dict)
+        ] if isinstance(images, list) else None,
+        'monthly_listeners': row.get('monthly_listeners'),
+        'top_tracks_total_plays': row.get('top_tracks_total_plays'),
+        'upcoming_tours_count': row.get('upcoming_tours_count'),
+        'upcoming_tours': _tours(row.get('upcoming_tours_json')),
+        'social_links': _string_map(row.get('social_links_json'), key='url'),
+        'data_sources': _string_map(row.get('data_sources')),
+        'last_updated': _timestamp(row['last_updated']),
+        'enhanced_data_updated': _timestamp(row.get('enhanced_data_updated')),
+    }
+
+
+def _history_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'id': row['id'],
+        'artist_id': row['artist_id'],
+        'snapshot_date': _timestamp(row['snapshot_date']),
+        'resolution': row.get('resolution') or 'raw',
+        'samples': row.get('samples') or 1,
+        'popularity': row['popularity'],
+        'follower_count': row['follower_count'],
+        'monthly_listeners': row['monthly_listeners'],
+        **{column: row.get(column) for column in history.AGGREGATE_COLUMNS},
+        'top_tracks_total_plays': row.get('top_tracks_total_plays'),
+        'upcoming_tours_count': row.get('upcoming_tours_count'),
+        'genres': _genres(row.get('genres')),
+        'upcoming_tours': _tours(row.get('upcoming_tours_json')),
+    }
+
+
+def _city_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'id': row['id'],
+        'artist_id': row['artist_id'],
+        'city': row['city'],
+        'country': row['country'],
+        'region': row['region'],
+        'listeners': row['listeners'],
+        'snapshot_date': _timestamp(row['snapshot_date']),
+    }
+
+
+def schemas() -> Dict[str, 'pa.Schema']:
+    """Arrow schemas of the exported tables."""
+    _require_pyarrow()
+    tour = pa.struct([
+        ('title', pa.string()), ('date', pa.timestamp('us', tz='UTC')), ('venue', pa.string()),
+        ('city', pa.string()), ('festival', pa.bool_()),
+    ])
+    image = pa.struct([('url', pa.string()), ('height', pa.int32()), ('width', pa.int32())])
+    return {
+        'artists': pa.schema([
+            ('id', pa.string()), ('name', pa.string()), ('popularity', pa.int32()),
+            ('followers_total', pa.int64()), ('genres', pa.list_(pa.string())),
+            ('spotify_url', pa.string()), ('href', pa.string()), ('uri', pa.string()), ('type', pa.string()),
+            ('images', pa.list_(image)), ('monthly_listeners', pa.int64()),
+            ('top_tracks_total_plays', pa.int64()), ('upcoming_tours_count', pa.int32()),
+            ('upcoming_tours', pa.list_(tour)), ('social_links', pa.map_(pa.string(), pa.string())),
+            ('data_sources', pa.map_(pa.string(), pa.string())),
+            ('last_updated', pa.timestamp('us')), ('enhanced_data_updated', pa.timestamp('us')),
+        ]),
+        history.HISTORY_TABLE: pa.schema([
+            ('id', pa.int64()), ('artist_id', pa.string()), ('snapshot_date', pa.timestamp('us')),
+            ('resolution', pa.string()), ('samples', pa.int32()), ('popularity', pa.int32()),
+            ('follower_count', pa.int64()), ('monthly_listeners', pa.int64()),
+            *((column, pa.float64() if column.endswith('_avg') else pa.int64())
+              for column in history.AGGREGATE_COLUMNS),
+            ('top_tracks_total_plays', pa.int64()), ('upcoming_tours_count', pa.int32()),
+            ('genres', pa.list_(pa.string())), ('upcoming_tours', pa.list_(tour)),
+        ]),
+        'artist_top_cities': pa.schema([
+            ('id', pa.int64()), ('artist_id', pa.string()), ('city', pa.string()), ('country', pa.string()),
+            ('region', pa.string()), ('listeners', pa.int64()), ('snapshot_date', pa.timestamp('us')),
+        ]),
+    }
+
+
+# table -> (watermark expression, watermark parameter, key column, row flattener).
+# artists are exported by the later of their two refresh timestamps, so a
+# Partner API refresh that leaves last_updated alone is picked up too; both
+# sides go through datetime() because the tables hold 'T' and space separated
+# timestamps, which do not compare chronologically as strings. Timestamps
+# only have second resolution, so the artists watermark is [timestamp, ids
+# exported at that timestamp]: the next run reads that second again and skips
+# those ids, and an artist refreshed later in the same second is not missed.
+# The other two only ever gain rows with higher ids (the update tools replace
+# an artist's top cities with fresh rows), so their id is the watermark and
+# no row committed late under an older timestamp is missed.
+ARTIST_CHANGED = ("MAX(COALESCE(datetime(last_updated), ''), "
+                  "COALESCE(datetime(enhanced_data_updated), ''))")
+TABLES: Dict[str, tuple] = {
+    'artists': (ARTIST_CHANGED, 'datetime(?)', 'id', _artist_row),
+    history.HISTORY_TABLE: ('id', '?', None, _history_row),
+    'artist_top_cities': ('id', '?', None, _city_row),
+}
+
+
+def load_watermarks(out_dir: str) -> Dict[str, Any]:
+    path = os.path.join(out_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_watermarks(out_dir: str, watermarks: Dict[str, Any]):
+    path = os.path.join(out_dir, STATE_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+class _Writer:
+    """Writes record batches to a Parquet or Arrow IPC file, created on the first batch."""
+
+    def __init__(self, path: str, schema: 'pa.Schema', fmt: str):
+        self.path = path
+        self.schema = schema
+        self.fmt = fmt
+        self._writer = None
+
+    def write(self, batch: 'pa.RecordBatch'):
+        if self._writer is None:
+            if self.fmt == 'parquet':
+                self._writer = pq.ParquetWriter(self.path, self.schema, compression='zstd')
+            else:
+                self._writer = pa.ipc.new_file(self.path, self.schema)
+        self._writer.write_batch(batch)
+
+    def close(self) -> bool:
+        """Finish the file; False if nothing was written."""
+        if self._writer is None:
+            return False
+        self._writer.close()
+        return True
+
+
+def _rows(conn: sqlite3.Connection, table: str, watermark: Any, batch_size: int) -> Iterable[List[Dict]]:
+    """Rows past the watermark in watermark order, each with its own value as '_watermark'."""
+    expression, parameter, key, _ = TABLES[table]
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    query = f'SELECT *, {expression} AS _watermark FROM {table}'
+    exported: set = set()
+    if watermark is None:
+        cursor.execute(f'{query} ORDER BY _watermark')
+    elif key:
+        # A bare timestamp saved before keys were kept exports that second again
+        watermark, keys = watermark if isinstance(watermark, list) else (watermark, [])
+        exported = set(keys)
+        cursor.execute(f'{query} WHERE _watermark >= {parameter} ORDER BY _watermark', (watermark,))
+    else:
+        cursor.execute(f'{query} WHERE _watermark > {parameter} ORDER BY _watermark', (watermark,))
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        rows = [dict(row) for row in rows
+                if not (exported and row['_watermark'] == watermark and row[key] in exported)]
+        if rows:
+            yield rows
+
+
+def _advance(table: str, watermark: Any, rows: List[Dict]) -> Any:
+    """The watermark after exporting rows, which are in watermark order."""
+    key = TABLES[table][2]
+    last = rows[-1]['_watermark']
+    if last in (None, ''):
+        return watermark
+    if not key:
+        return last
+    keys = [row[key] for row in rows if row['_watermark'] == last]
+    if isinstance(watermark, list) and watermark[0] == last:
+        keys = watermark[1] + keys
+    return [last, keys]
+
+
+def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+
+def export_tables(conn: sqlite3.Connection, out_dir: str, fmt: str = 'parquet',
+                  tables: Optional[List[str]] = None, full: bool = False, batch_size: int = 5000,
+                  logger: Optional[logging.Logger] = None) -> Dict[str, Dict[str, Any]]:
+    """Stream artists, history and top cities into columnar files under out_dir.
+
+    JSON columns are flattened into typed columns (genres as a list of
+    strings, tours and images as lists of structs, social links and data
+    sources as maps). Each run writes out_dir/<table>/<table>-<run>.<fmt>
+    holding only rows past the watermark saved by the previous run, then
+    saves the new watermarks; full=True ignores them and exports everything.
+    An artist refreshed by either API since the last run appears again in
+    the new file, so readers keep the row with the latest last_updated or
+    enhanced_data_updated per id. History rows
+    removed or rolled up by compaction after they were exported are not
+    reflected in earlier files.
+
+    All tables are read in one transaction, so the files of a run agree
+    with each other; on a connection with a transaction already open they
+    are read inside it, under a savepoint. Returns rows written, file and
+    watermark per table.
+    """
+    _require_pyarrow()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {sorted(FORMATS)}")
+    logger = logger or logging.getLogger(__name__)
+    tables = tables or list(TABLES)
+    unknown = [t for t in tables if t not in TABLES]
+    if unknown:
+        raise ValueError(f"Cannot export {unknown}, expected some of {list(TABLES)}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    watermarks = {} if full else load_watermarks(out_dir)
+    all_schemas = schemas()
+    run = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+    report: Dict[str, Dict[str, Any]] = {}
+
+    conn.execute('SAVEPOINT export')
+    try:
+        for table in tables:
+            if not _table_exists(conn, table):
+                logger.info(f"No {table} table, skipping")
+                continue
+            flatten = TABLES[table][3]
+            schema = all_schemas[table]
+            watermark = watermarks.get(table)
+            os.makedirs(os.path.join(out_dir, table), exist_ok=True)
+            path = os.path.join(out_dir, table, f'{table}-{run}.{FORMATS[fmt]}')
+            writer = _Writer(path + '.tmp', schema, fmt)
+            documents: Dict[str, Optional[str]] = {}
+            count = 0
+            try:
+                for rows in _rows(conn, table, watermark, batch_size):
+                    if table == history.HISTORY_TABLE:
+                        rows = [history.restore_json(conn, row, documents) for row in rows]
+                    batch = pa.RecordBatch.from_pylist([flatten(row) for row in rows], schema=schema)
+                    writer.write(batch)
+                    count += len(rows)
+                    watermark = _advance(table, watermark, rows)
+            except BaseException:
+                if writer.close():
+                    os.remove(path + '.tmp')
+                raise
+            written = writer.close()
+            if written:
+                os.replace(path + '.tmp', path)
+            watermarks[table] = watermark
+            report[table] = {'rows': count, 'file': path if written else None, 'watermark': watermark}
+            logger.info(f"Exported {count} rows of {table}" + (f" to {path}" if written else ""))
+    finally:
+        # Nothing was written; ending the savepoint leaves a caller's transaction as it was
+        conn.execute('ROLLBACK TO export')
+        conn.execute('RELEASE export')
+
+    _save_watermarks(out_dir, watermarks)
+    return report
@@ -0,0 +1,364 @@
+import contextlib
+import hashlib
+import logging
+import re
+import sqlite3
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+HISTORY_TABLE = 'artist_stats_history'
+JSON_TABLE = 'artist_history_json'
+
+# Snapshots newer than this are kept as they are
+RAW_DAYS = 30
+# Older snapshots keep one per day up to this age, then one per week
+DAILY_DAYS = 180
+
+# JSON columns moved to JSON_TABLE (zlib-compressed), with the column holding their hash
+JSON_COLUMNS = {
+    'upcoming_tours_json': 'upcoming_tours_hash',
+    'genres': 'genres_hash',
+}
+
+# Metrics a rolled-up row keeps the min, max and mean of, over the snapshots it stands for
+AGGREGATED = ('popularity', 'follower_count', 'monthly_listeners')
+AGGREGATE_COLUMNS = tuple(f'{metric}_{stat}' for metric in AGGREGATED for stat in ('min', 'max', 'avg'))
+
+# Bookkeeping columns the compaction adds to the history table. The
+# aggregate columns are NULL on raw rows, whose value is all there is.
+HISTORY_COLUMNS = {
+    'resolution': "TEXT NOT NULL DEFAULT 'raw'",
+    'samples': 'INTEGER NOT NULL DEFAULT 1',
+    'upcoming_tours_hash': 'TEXT',
+    'genres_hash': 'TEXT',
+    **{column: 'REAL' if column.endswith('_avg') else 'INTEGER' for column in AGGREGATE_COLUMNS},
+}
+
+
+def has_history(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (HISTORY_TABLE,)
+    ).fetchone() is not None
+
+
+def ensure_history_schema(conn: sqlite3.Connection) -> bool:
+    """Add the compaction columns and the table the JSON columns are moved to.
+
+    Returns True if anything changed.
+    """
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info({HISTORY_TABLE})')}
+    missing = {name: ddl for name, ddl in HISTORY_COLUMNS.items() if name not in columns}
+    has_json_table = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (JSON_TABLE,)
+    ).fetchone() is not None
+    if not missing and has_json_table:
+        return False
+
+    for name, ddl in missing.items():
+        conn.execute(f'ALTER TABLE {HISTORY_TABLE} ADD COLUMN {name} {ddl}')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {JSON_TABLE} (
+            hash TEXT PRIMARY KEY,
+            data BLOB NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.commit()
+    return True
+
+
+# The insert of the history triggers on artists, and the statement put
+# before it to drop a snapshot of the same artist taken the same second
+_HISTORY_INSERT = re.compile(rf'\bINSERT\s+INTO\s+{HISTORY_TABLE}\b', re.IGNORECASE)
+_SAME_SECOND_DELETE = (f"DELETE FROM {HISTORY_TABLE} "
+                       f"WHERE artist_id = NEW.id AND snapshot_date = DATETIME('now');")
+
+
+def ensure_history_triggers(conn: sqlite3.Connection) -> bool:
+    """Let the triggers on artists that write artist_stats_history replace a snapshot taken the same second.
+
+    The triggers date snapshots with DATETIME('now'), which has one-second
+    resolution, and the table is UNIQUE(artist_id, snapshot_date), so a
+    second stat-changing save of an artist within a second (a standard save
+    followed by a Partner one) conflicts. Artists are saved with an upsert,
+    whose ABORT policy overrides any OR REPLACE inside a trigger, so the
+    triggers instead delete that snapshot before inserting: the later one
+    is kept. Returns True if anything changed.
+    """
+    fixed = {}
+    for name, sql in conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'artists'").fetchall():
+        if (_HISTORY_INSERT.search(sql) and "DATETIME('NOW')" in sql.upper()
+                and _SAME_SECOND_DELETE.upper() not in sql.upper()):
+            fixed[name] = _HISTORY_INSERT.sub(lambda m: f'{_SAME_SECOND_DELETE}\n    {m.group(0)}', sql, count=1)
+    if not fixed:
+        return False
+
+    for name, sql in fixed.items():
+        conn.execute(f'DROP TRIGGER {name}')
+        conn.execute(sql)
+    conn.commit()
+    return True
+
+
+def restore_json(conn: sqlite3.Connection, snapshot: Dict[str, Any],
+                 documents: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, Any]:
+    """Put a history row's moved JSON columns back in place, dropping the hash columns.
+
+    `documents` caches decompressed documents between calls.
+    """
+    documents = documents if documents is not None else {}
+    for column, hash_column in JSON_COLUMNS.items():
+        digest = snapshot.pop(hash_column, None)
+        if snapshot.get(column) is None and digest is not None:
+            if digest not in documents:
+                found = conn.execute(f'SELECT data FROM {JSON_TABLE} WHERE hash = ?', (digest,)).fetchone()
+                documents[digest] = zlib.decompress(found[0]).decode('utf-8') if found else None
+            snapshot[column] = documents[digest]
+    return snapshot
+
+
+def iter_history(conn: sqlite3.Connection, artist_id: str) -> Iterator[Dict[str, Any]]:
+    """Yield an artist's history rows, oldest first, with moved JSON columns restored."""
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    documents: Dict[str, Optional[str]] = {}
+    for row in cursor.execute(
+            f'SELECT * FROM {HISTORY_TABLE} WHERE artist_id = ? ORDER BY snapshot_date', (artist_id,)):
+        yield restore_json(conn, dict(row), documents)
+
+
+def _period(snapshot: datetime, now: datetime, raw_days: int, daily_days: int) -> Optional[Tuple[str, str]]:
+    """(resolution, period start) a snapshot is rolled up into, or None if it stays as it is."""
+    age = now - snapshot
+    if age < timedelta(days=raw_days):
+        return None
+    if age < timedelta(days=daily_days):
+        return 'daily', snapshot.strftime('%Y-%m-%d')
+    monday = snapshot - timedelta(days=snapshot.weekday())
+    return 'weekly', monday.strftime('%Y-%m-%d')
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('T', ' ').split('.')[0])
+
+
+def _payload_bytes(conn: sqlite3.Connection) -> Optional[int]:
+    """Bytes of data in the history tables and their indexes, if SQLite was built with dbstat."""
+    try:
+        row = conn.execute(
+            "SELECT SUM(payload) FROM dbstat WHERE name IN ("
+            "SELECT name FROM sqlite_master WHERE tbl_name IN (?, ?))",
+            (HISTORY_TABLE, JSON_TABLE)
+        ).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] or 0
+
+
+def _aggregate(members: List[Any], metric: str) -> Tuple[Optional[int], Optional[int], Optional[float]]:
+    """(min, max, mean) of `metric` over the snapshots a group of rows stands for.
+
+    Rows already rolled up contribute their stored aggregates, their mean
+    weighted by their samples; snapshots without the metric are left out.
+    """
+    lows, highs, total, weight = [], [], 0.0, 0
+    for member in members:
+        value = member[metric]
+        if member[f'{metric}_avg'] is not None:
+            lows.append(member[f'{metric}_min'])
+            highs.append(member[f'{metric}_max'])
+            total += member[f'{metric}_avg'] * member['samples']
+            weight += member['samples']
+        elif value is not None:
+            lows.append(value)
+            highs.append(value)
+            total += value
+            weight += 1
+    if not weight:
+        return None, None, None
+    return min(lows), max(highs), total / weight
+
+
+def _compact_chunk(conn: sqlite3.Connection, artist_ids: List[str], now: datetime,
+                   raw_days: int, daily_days: int, report: Dict[str, int]):
+    placeholders = ','.join('?' * len(artist_ids))
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    rows = cursor.execute(f'''
+        SELECT id, artist_id, snapshot_date, resolution, samples, {', '.join(JSON_COLUMNS)},
+               {', '.join(AGGREGATED)}, {', '.join(AGGREGATE_COLUMNS)}
+        FROM {HISTORY_TABLE}
+        WHERE artist_id IN ({placeholders})
+        ORDER BY artist_id, snapshot_date
+    ''', artist_ids).fetchall()
+
+    # Move JSON out: one copy per distinct document, referenced by hash
+    blobs = {}
+    moves = []
+    for row in rows:
+        hashes = []
+        for column in JSON_COLUMNS:
+            text = row[column]
+            if text is None:
+                hashes.append(None)
+                continue
+            encoded = text.encode('utf-8')
+            digest = hashlib.sha1(encoded).hexdigest()
+            blobs[digest] = encoded
+            hashes.append(digest)
+            report['json_bytes_moved'] += len(text)
+        if any(h is not None for h in hashes):
+            moves.append((*hashes, row['id']))
+    if blobs:
+        known = {row[0] for row in conn.execute(
+            f"SELECT hash FROM {JSON_TABLE} WHERE hash IN ({','.join('?' * len(blobs))})", list(blobs))}
+        before = conn.total_changes
+        conn.executemany(f'INSERT INTO {JSON_TABLE} (hash, data) VALUES (?, ?)',
+                         ((digest, zlib.compress(encoded)) for digest, encoded in blobs.items() if digest not in known))
+        added = conn.total_changes - before
+        report['json_documents_added'] += added
+    if moves:
+        assignments = ', '.join(
+            f'{hash_column} = COALESCE(?, {hash_column}), {column} = NULL'
+            for column, hash_column in JSON_COLUMNS.items()
+        )
+        conn.executemany(f'UPDATE {HISTORY_TABLE} SET {assignments} WHERE id = ?', moves)
+        report['json_rows_moved'] += len(moves)
+
+    # Roll up: keep the last snapshot of each (artist, day/week), with the
+    # number and the metric aggregates of the snapshots it replaces
+    groups: Dict[tuple, List[Any]] = {}
+    for row in rows:
+        period = _period(_parse_timestamp(row['snapshot_date']), now, raw_days, daily_days)
+        if period is not None:
+            groups.setdefault((row['artist_id'], *period), []).append(row)
+    updates = []
+    deletes = []
+    for (_, resolution, _), members in groups.items():
+        keep = members[-1]
+        if len(members) == 1 and keep['resolution'] == resolution:
+            continue
+        aggregates = [stat for metric in AGGREGATED for stat in _aggregate(members, metric)]
+        updates.append((resolution, sum(m['samples'] for m in members), *aggregates, keep['id']))
+        deletes.extend((m['id'],) for m in members[:-1])
+    if updates:
+        assignments = ', '.join(f'{column} = ?' for column in ('resolution', 'samples', *AGGREGATE_COLUMNS))
+        conn.executemany(f'UPDATE {HISTORY_TABLE} SET {assignments} WHERE id = ?', updates)
+        report['rolled_up'] += len(updates)
+    if deletes:
+        conn.executemany(f'DELETE FROM {HISTORY_TABLE} WHERE id = ?', deletes)
+        report['rows_deleted'] += len(deletes)
+
+
+@contextlib.contextmanager
+def _write_transaction(conn: sqlite3.Connection, name: str):
+    """BEGIN IMMEDIATE ... COMMIT, or a savepoint when the caller already has a transaction open."""
+    if conn.in_transaction:
+        conn.execute(f'SAVEPOINT {name}')
+        try:
+            yield
+        except BaseException:
+            conn.execute(f'ROLLBACK TO {name}')
+            conn.execute(f'RELEASE {name}')
+            raise
+        conn.execute(f'RELEASE {name}')
+        return
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def _delete_unreferenced_json(conn: sqlite3.Connection, chunk_size: int, pause: float) -> int:
+    """Delete JSON documents no history row refers to any more, chunk_size per transaction."""
+    referenced = set()
+    for hash_column in JSON_COLUMNS.values():
+        referenced.update(row[0] for row in conn.execute(
+            f'SELECT DISTINCT {hash_column} FROM {HISTORY_TABLE} WHERE {hash_column} IS NOT NULL'))
+    unreferenced = [(row[0],) for row in conn.execute(f'SELECT hash FROM {JSON_TABLE}') if row[0] not in referenced]
+    for i in range(0, len(unreferenced), chunk_size):
+        with _write_transaction(conn, 'delete_json'):
+            conn.executemany(f'DELETE FROM {JSON_TABLE} WHERE hash = ?', unreferenced[i:i + chunk_size])
+        if pause:
+            time.sleep(pause)
+    return len(unreferenced)
+
+
+def _file_bytes(conn: sqlite3.Connection) -> int:
+    return conn.execute('PRAGMA page_count').fetchone()[0] * conn.execute('PRAGMA page_size').fetchone()[0]
+
+
+def compact_history(conn: sqlite3.Connection, raw_days: int = RAW_DAYS, daily_days: int = DAILY_DAYS,
+                    chunk_size: int = 50, pause: float = 0.0, vacuum: bool = False,
+                    now: Optional[datetime] = None, logger: Optional[logging.Logger] = None) -> Dict[str, Any]:
+    """Downsample artist_stats_history and move its JSON columns out of the rows.
+
+    Snapshots younger than raw_days are kept at full resolution. Older ones
+    are rolled up to one row per day, and past daily_days to one per week.
+    The kept row is the period's last snapshot, with `samples` counting the
+    snapshots it stands for and popularity, follower_count and
+    monthly_listeners summarised over them in <metric>_min, <metric>_max
+    and <metric>_avg. upcoming_tours_json and genres are stored compressed, once
+    per distinct document, in artist_history_json; iter_history puts them
+    back in place.
+
+    Work is done chunk_size artists per transaction, sleeping `pause`
+    seconds between transactions, so other writers are never held off for
+    long. Safe to stop and rerun at any time. On a connection that already
+    has a transaction open, each chunk is a savepoint inside it instead and
+    committing is left to the caller (vacuum=True cannot run there).
+
+    Returns counts of what was done. reclaimed_bytes is the drop in data
+    stored in the history tables (when SQLite has dbstat); the pages it
+    frees are reused by later writes, and the file itself only shrinks
+    with vacuum=True, which locks the whole database while it runs.
+    """
+    logger = logger or logging.getLogger(__name__)
+    report: Dict[str, Any] = {
+        'rows_before': 0, 'rows_after': 0, 'rolled_up': 0, 'rows_deleted': 0,
+        'json_rows_moved': 0, 'json_bytes_moved': 0, 'json_documents_added': 0,
+        'json_documents_deleted': 0, 'chunks': 0
+    }
+    if not has_history(conn):
+        logger.info(f"No {HISTORY_TABLE} table, nothing to compact")
+        return report
+
+    ensure_history_schema(conn)
+    # Timestamps are written by the triggers with DATETIME('now'), which is UTC
+    now = now or datetime.utcnow()
+    report['rows_before'] = conn.execute(f'SELECT COUNT(*) FROM {HISTORY_TABLE}').fetchone()[0]
+    payload_before = _payload_bytes(conn)
+    file_before = _file_bytes(conn)
+
+    last_id = ''
+    while True:
+        artist_ids = [row[0] for row in conn.execute(
+            f'SELECT DISTINCT artist_id FROM {HISTORY_TABLE} WHERE artist_id > ? ORDER BY artist_id LIMIT ?',
+            (last_id, chunk_size))]
+        if not artist_ids:
+            break
+        with _write_transaction(conn, 'compact_chunk'):
+            _compact_chunk(conn, artist_ids, now, raw_days, daily_days, report)
+        report['chunks'] += 1
+        last_id = artist_ids[-1]
+        if pause:
+            time.sleep(pause)
+
+    report['json_documents_deleted'] = _delete_unreferenced_json(conn, max(chunk_size * 10, 1), pause)
+    report['rows_after'] = conn.execute(f'SELECT COUNT(*) FROM {HISTORY_TABLE}').fetchone()[0]
+    payload_after = _payload_bytes(conn)
+    if payload_before is not None and payload_after is not None:
+        report['payload_bytes_before'] = payload_before
+        report['payload_bytes_after'] = payload_after
+        report['reclaimed_bytes'] = payload_before - payload_after
+    if vacuum:
+        conn.execute('VACUUM')
+    report['file_bytes_before'] = file_before
+    report['file_bytes_after'] = _file_bytes(conn)
+    logger.info(f"Compacted {HISTORY_TABLE}: {report}")
+    return report
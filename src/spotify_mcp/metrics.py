@@ -0,0 +1,135 @@
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
+# Upper bounds of the latency buckets, in milliseconds
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Latency histogram with fixed buckets; percentiles are bucket upper bounds."""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        # One extra bucket for values above the last bound
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets_ms, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 3)
+        }
+
+
+class MetricsRegistry:
+    """Named counters and latency histograms, safe to update from any thread.
+
+    Names are dotted, with the area first: 'tool.Search', 'spotify.search',
+    'sqlite.save_artist', 'json.Search', 'partner.get_artist_details'.
+    """
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self.started_at = time.time()
+
+    def increment(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self.buckets_ms)
+            histogram.observe(seconds * 1000)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Record the duration of the block under `name`, and count it in '<name>.errors' if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.increment(f"{name}.errors")
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name: str) -> Callable:
+        """Decorator form of timer()."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'uptime_s': round(time.time() - self.started_at, 1),
+                'counters': dict(sorted(self._counters.items())),
+                'latency': {name: h.snapshot() for name, h in sorted(self._histograms.items())}
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started_at = time.time()
+
+
+class _Instrumented:
+    """Proxy that times every public method call on the wrapped object."""
+
+    def __init__(self, target: Any, prefix: str, metrics: MetricsRegistry):
+        self._target = target
+        self._prefix = prefix
+        self._metrics = metrics
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._target, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        return self._metrics.timed(f"{self._prefix}.{name}")(attr)
+
+
+def instrument(target: Any, prefix: str, metrics: Optional[MetricsRegistry] = None) -> Any:
+    """Wrap `target` so each method call is recorded as '<prefix>.<method>'."""
+    return _Instrumented(target, prefix, metrics or registry)
+
+
+# Process-wide registry the server, Client and ArtistDatabase report into
+registry = MetricsRegistry()
@@ -1,10 +1,12 @@
 from dataclasses import dataclass, asdict, field
 from json import JSONEncoder, dumps, loads
-from typing import List, Optional, Dict, Any
+from typing import Any, Callable, ClassVar, Dict, List, NamedTuple, Optional, Sequence, Tuple
 from enum import Enum
 from datetime import datetime
+from operator import attrgetter
+from sys import intern
 
-@dataclass
+@dataclass(slots=True)
 class Image:
     height: Optional[int]
     url: str
@@ -23,7 +25,7 @@ class Image:
     def __str__(self):
         return self.__repr__()
 
-@dataclass
+@dataclass(slots=True)
 class ExternalUrl:
     spotify: str
 
@@ -36,7 +38,7 @@ class ExternalUrl:
     def __str__(self):
         return self.__repr__()
 
-@dataclass
+@dataclass(slots=True)
 class Followers:
     href: Optional[str]
     total: int
@@ -53,7 +55,98 @@ class Followers:
     def __str__(self):
         return self.__repr__()
 
-@dataclass
+def _sources_snapshot(sources: Dict) -> Optional[Tuple]:
+    # Nested values could change in place without the snapshot seeing it
+    if set(map(type, sources.values())) <= {str}:
+        return (*sources.keys(), *sources.values())
+    return None
+
+_image_key = attrgetter('height', 'url', 'width')
+
+def _load_sources(text: str) -> Dict:
+    """data_sources decoded, with its strings interned (every artist repeats the same few)."""
+    return {intern(key): intern(value) if type(value) is str else value for key, value in loads(text).items()}
+
+class _JSONField(NamedTuple):
+    """An Artist field stored as JSON text"""
+    name: str
+    snapshot: Callable[[Any], Optional[Tuple]]  # an immutable snapshot of the value, or None if it cannot take one
+    to_json: Callable[[Any], Any]  # the JSON-ready form of the value
+    decode: Callable[[str], Any]  # the value from its stored text
+    copy: Callable[[Any], Any]  # a copy of the value sharing nothing mutable
+
+    @property
+    def text_slot(self) -> str:
+        """The Artist slot holding the field's JSON text as last loaded or saved."""
+        return f'_{self.name}_json'
+
+    @property
+    def snapshot_slot(self) -> str:
+        """The Artist slot holding the snapshot of the value that text encodes (None while not decoded)."""
+        return f'_{self.name}_snapshot'
+
+_JSON_FIELDS = (
+    _JSONField('external_urls', lambda v: v.spotify, lambda v: v.to_dict(),
+               lambda t: ExternalUrl(**loads(t)), lambda v: ExternalUrl(v.spotify)),
+    _JSONField('followers', lambda v: (v.href, v.total), lambda v: v.to_dict(),
+               lambda t: Followers(**loads(t)), lambda v: Followers(v.href, v.total)),
+    _JSONField('genres', tuple, lambda v: v, lambda t: list(map(intern, loads(t))), list),
+    _JSONField('images', lambda v: tuple(map(_image_key, v)), lambda v: [img.to_dict() for img in v],
+               lambda t: [Image(**img) for img in loads(t)],
+               lambda v: [Image(img.height, img.url, img.width) for img in v]),
+    _JSONField('data_sources', _sources_snapshot, lambda v: v, _load_sources, dict),
+)
+_JSON_FIELD_NAMES = frozenset(json_field.name for json_field in _JSON_FIELDS)
+
+# Held by a JSON field of an Artist loaded from the database until it is first read
+_UNDECODED = object()
+
+class _LazyJSON:
+    """A JSON field of Artist, decoded from its stored text on first read.
+
+    Wraps the field's slot, as a slotted dataclass has no __dict__ for
+    functools.cached_property. A slot holding _UNDECODED is decoded and
+    filled in when read; data_sources that cannot be decoded read as {}.
+    """
+    __slots__ = ('slot', 'field')
+
+    def __init__(self, slot, field: _JSONField):
+        self.slot = slot
+        self.field = field
+
+    def raw(self, artist) -> Any:
+        """The slot's value, _UNDECODED if the field has not been read yet."""
+        return self.slot.__get__(artist)
+
+    def __get__(self, artist, owner=None):
+        if artist is None:
+            return self
+        value = self.slot.__get__(artist, owner)
+        if value is not _UNDECODED:
+            return value
+        json_field = self.field
+        try:
+            value = json_field.decode(getattr(artist, json_field.text_slot))
+            setattr(artist, json_field.snapshot_slot, json_field.snapshot(value))
+        except Exception:
+            if json_field.name != 'data_sources':
+                raise
+            # Unreadable data sources are dropped, and replaced on the next save
+            value = {}
+        self.slot.__set__(artist, value)
+        return value
+
+    def __set__(self, artist, value):
+        self.slot.__set__(artist, value)
+
+def _decode_json_lazily(cls):
+    """Class decorator wrapping the slots of the _JSON_FIELDS fields of a slotted dataclass in _LazyJSON."""
+    for json_field in _JSON_FIELDS:
+        setattr(cls, json_field.name, _LazyJSON(cls.__dict__[json_field.name], json_field))
+    return cls
+
+@_decode_json_lazily
+@dataclass(slots=True)
 class Artist:
     """Complete Artist object matching Spotify API spec with database support"""
     id: str
@@ -78,6 +171,19 @@ class Artist:
     # Track data sources
     data_sources: Dict[str, str] = field(default_factory=dict)
 
+    # JSON text of each _JSON_FIELDS field as last loaded or saved, and a snapshot of the value it
+    # encodes (None while the field is not decoded); see _encode_json
+    _external_urls_json: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _external_urls_snapshot: Optional[Tuple] = field(default=None, init=False, repr=False, compare=False)
+    _followers_json: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _followers_snapshot: Optional[Tuple] = field(default=None, init=False, repr=False, compare=False)
+    _genres_json: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _genres_snapshot: Optional[Tuple] = field(default=None, init=False, repr=False, compare=False)
+    _images_json: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _images_snapshot: Optional[Tuple] = field(default=None, init=False, repr=False, compare=False)
+    _data_sources_json: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _data_sources_snapshot: Optional[Tuple] = field(default=None, init=False, repr=False, compare=False)
+
     def to_dict(self) -> Dict:
         """Convert Artist to dictionary format."""
         result = {
@@ -108,16 +214,32 @@ class Artist:
             
         return result
 
+    def _encode_json(self) -> Dict[str, str]:
+        """JSON text of each JSON field, reusing the text a field was loaded or last saved with while it is unchanged."""
+        texts = {}
+        for json_field in _JSON_FIELDS:
+            value = getattr(Artist, json_field.name).raw(self)
+            text = getattr(self, json_field.text_slot)
+            if value is not _UNDECODED:
+                snapshot = json_field.snapshot(value)
+                if snapshot is None or snapshot != getattr(self, json_field.snapshot_slot):
+                    text = dumps(json_field.to_json(value))
+                    setattr(self, json_field.text_slot, text)
+                setattr(self, json_field.snapshot_slot, snapshot)
+            texts[json_field.name] = text
+        return texts
+
     def to_db_dict(self) -> Dict:
         """Convert Artist to database-friendly format."""
+        texts = self._encode_json()
         result = {
             'id': self.id,
             'name': self.name,
-            'external_urls': dumps(self.external_urls.to_dict()),
-            'followers': dumps(self.followers.to_dict()),
-            'genres': dumps(self.genres),
+            'external_urls': texts['external_urls'],
+            'followers': texts['followers'],
+            'genres': texts['genres'],
             'href': self.href,
-            'images': dumps([img.to_dict() for img in self.images]),
+            'images': texts['images'],
             'popularity': self.popularity,
             'uri': self.uri,
             'type': self.type,
@@ -137,25 +259,53 @@ class Artist:
             result['enhanced_data_updated'] = self.enhanced_data_updated.isoformat() if self.enhanced_data_updated else None
             
         # Add data sources
-        result['data_sources'] = dumps(self.data_sources)
+        result['data_sources'] = texts['data_sources']
             
         return result
 
+    def copy(self) -> 'Artist':
+        """Copy whose lists, dicts and nested objects are not shared with this one.
+
+        JSON fields not decoded yet stay undecoded in the copy. The cached
+        encodings are immutable, checked against the current values
+        before use, so sharing them is safe.
+        """
+        artist = object.__new__(Artist)
+        for name in Artist.__slots__:
+            if name not in _JSON_FIELD_NAMES:
+                setattr(artist, name, getattr(self, name))
+        for json_field in _JSON_FIELDS:
+            lazy = getattr(Artist, json_field.name)
+            value = lazy.raw(self)
+            lazy.__set__(artist, value if value is _UNDECODED else json_field.copy(value))
+        return artist
+
     @classmethod
     def from_db_dict(cls, data: Dict) -> 'Artist':
-        """Create Artist instance from database record."""
+        """Create Artist instance from database record.
+
+        external_urls, followers, genres, images and data_sources are decoded
+        from their JSON text when first read; data_sources that cannot be
+        decoded read as {}. A row with invalid JSON in one of the other four
+        still raises ValueError here. Rows selected with
+        artists.ARTIST_COLUMNS carry SQLite's json_valid() of them as
+        json_ok; other rows are checked by decoding those four now.
+        """
+        if 'json_ok' in data and not data['json_ok']:
+            raise ValueError('invalid JSON in external_urls, followers, genres or images')
+
         # Create basic artist
         artist = cls(
             id=data['id'],
             name=data['name'],
-            external_urls=ExternalUrl(**loads(data['external_urls'])),
-            followers=Followers(**loads(data['followers'])),
-            genres=loads(data['genres']),
+            external_urls=_UNDECODED,
+            followers=_UNDECODED,
+            genres=_UNDECODED,
             href=data['href'],
-            images=[Image(**img) for img in loads(data['images'])],
+            images=_UNDECODED,
             popularity=data['popularity'],
             uri=data['uri'],
-            type=data['type'],
+            type=intern(data['type']),
             last_updated=datetime.fromisoformat(data['last_updated']) if data.get('last_updated') else None
         )
         
@@ -172,12 +322,22 @@ class Artist:
             artist.enhanced_data_updated = datetime.fromisoformat(data['enhanced_data_updated']) if data['enhanced_data_updated'] else None
             
         # Add data sources if they exist
-        if 'data_sources' in data and data['data_sources'] is not None:
-            try:
-                artist.data_sources = loads(data['data_sources'])
-            except:
-                artist.data_sources = {}
-        
+        sources_text = data.get('data_sources')
+        if sources_text is not None:
+            artist.data_sources = _UNDECODED
+
+        # Keep the text of the JSON columns, to decode on first read and so
+        # saving an unchanged artist encodes nothing
+        artist._external_urls_json = data['external_urls']
+        artist._followers_json = data['followers']
+        artist._genres_json = data['genres']
+        artist._images_json = data['images']
+        artist._data_sources_json = sources_text
+
+        if 'json_ok' not in data:
+            for name in ('external_urls', 'followers', 'genres', 'images'):
+                getattr(artist, name)
+
         return artist
 
     @classmethod
@@ -211,7 +371,50 @@ class Artist:
     def __str__(self):
         return self.__repr__()
 
-@dataclass
+@dataclass(slots=True)
+class ArtistSummary:
+    """The scalar columns of an artist, for scans and refresh checks that need none of its JSON fields"""
+    id: str
+    name: str
+    popularity: int
+    monthly_listeners: Optional[int] = None
+    last_updated: Optional[datetime] = None
+    enhanced_data_updated: Optional[datetime] = None
+
+    COLUMNS: ClassVar[Tuple[str, ...]] = (
+        'id', 'name', 'popularity', 'monthly_listeners', 'last_updated', 'enhanced_data_updated'
+    )
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'popularity': self.popularity,
+            'monthly_listeners': self.monthly_listeners,
+            'last_updated': self.last_updated.isoformat() if self.last_updated else None,
+            'enhanced_data_updated': self.enhanced_data_updated.isoformat() if self.enhanced_data_updated else None
+        }
+
+    @classmethod
+    def from_db_row(cls, row: Sequence) -> 'ArtistSummary':
+        """Create from a row of the artists table holding COLUMNS, in order."""
+        artist_id, name, popularity, monthly_listeners, last_updated, enhanced_data_updated = row
+        return cls(
+            id=artist_id,
+            name=name,
+            popularity=popularity,
+            monthly_listeners=monthly_listeners,
+            last_updated=datetime.fromisoformat(last_updated) if last_updated else None,
+            enhanced_data_updated=datetime.fromisoformat(enhanced_data_updated) if enhanced_data_updated else None
+        )
+
+    def __repr__(self):
+        return str(self.to_dict())
+
+    def __str__(self):
+        return self.__repr__()
+
+@dataclass(slots=True)
 class ArtistAlbum:
     """Album release by an artist"""
     id: str
@@ -0,0 +1,63 @@
+import asyncio
+import itertools
+import logging
+from typing import Awaitable, Callable, Dict, List, Set
+
+
+class BackgroundRefresher:
+    """Refreshes stale artists in the background.
+
+    Scheduled IDs are deduplicated against both the pending queue and the
+    batches currently being fetched. A small pool of worker tasks drains the
+    queue in batches of up to `batch_size` IDs, waiting `delay` seconds first
+    so a burst of lookups collapses into a few batched requests.
+    """
+
+    def __init__(self, refresh_batch: Callable[[List[str]], Awaitable], logger: logging.Logger,
+                 batch_size: int = 50, max_workers: int = 2, delay: float = 0.05):
+        self.refresh_batch = refresh_batch
+        self.logger = logger
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.delay = delay
+        # dict keeps insertion order, so older requests are refreshed first
+        self._pending: Dict[str, None] = {}
+        self._in_flight: Set[str] = set()
+        self._workers: Set[asyncio.Task] = set()
+
+    def schedule(self, artist_id: str) -> bool:
+        """Queue an artist for refresh. Returns False if it is already queued."""
+        if artist_id in self._pending or artist_id in self._in_flight:
+            return False
+        self._pending[artist_id] = None
+        # Start another worker only once the backlog outgrows the running ones
+        running = sum(1 for task in self._workers if not task.done())
+        if running < self.max_workers and len(self._pending) > self.batch_size * running:
+            task = asyncio.get_running_loop().create_task(self._worker())
+            self._workers.add(task)
+            task.add_done_callback(self._workers.discard)
+        return True
+
+    async def _worker(self):
+        await asyncio.sleep(self.delay)
+        while self._pending:
+            batch = list(itertools.islice(self._pending, self.batch_size))
+            for artist_id in batch:
+                del self._pending[artist_id]
+            self._in_flight.update(batch)
+            try:
+                self.logger.info(f"Background refresh of {len(batch)} stale artists")
+                await self.refresh_batch(batch)
+            except Exception as e:
+                self.logger.error(f"Background refresh failed: {str(e)}")
+            finally:
+                self._in_flight.difference_update(batch)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending) + len(self._in_flight)
+
+    async def drain(self):
+        """Wait until every scheduled refresh has finished."""
+        while self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
@@ -0,0 +1,80 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+DETAIL_LEVELS = ("compact", "full")
+FORMATS = ("json", "table")
+
+
+def _split_fields(fields: Iterable[str]) -> Dict[str, Any]:
+    """Turn ['name', 'album.name', 'album.id'] into {'name': None, 'album': {'name': None, 'id': None}}."""
+    tree: Dict[str, Any] = {}
+    for field in fields:
+        node = tree
+        parts = [p for p in field.strip().split('.') if p]
+        for i, part in enumerate(parts):
+            if i == len(parts) - 1:
+                node[part] = None
+            else:
+                child = node.get(part)
+                if child is None:
+                    child = node[part] = {}
+                node = child
+    return tree
+
+
+def _project(value: Any, tree: Dict[str, Any]) -> Any:
+    if isinstance(value, list):
+        return [_project(v, tree) for v in value]
+    if not isinstance(value, dict):
+        return value
+    # Containers such as {'tracks': [...]} are passed through so fields apply to their items
+    if not any(key in value for key in tree):
+        return {k: _project(v, tree) if isinstance(v, (list, dict)) else v for k, v in value.items()}
+    result = {}
+    for key, subtree in tree.items():
+        if key in value:
+            result[key] = value[key] if subtree is None else _project(value[key], subtree)
+    return result
+
+
+def project(payload: Any, fields: Optional[Sequence[str]]) -> Any:
+    """Keep only `fields` (dotted paths) of every item in `payload`.
+
+    Always builds new containers, so cached payloads are never modified.
+    """
+    if not fields:
+        return payload
+    return _project(payload, _split_fields(fields))
+
+
+def to_table(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Encode a list of dicts as column names plus rows of values."""
+    columns: Dict[str, None] = {}
+    for item in items:
+        columns.update(dict.fromkeys(item))
+    return {
+        'columns': list(columns),
+        'rows': [[item.get(c) for c in columns] for item in items]
+    }
+
+
+def _tabulate(value: Any) -> Any:
+    if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+        return to_table(value)
+    if isinstance(value, dict):
+        return {k: _tabulate(v) for k, v in value.items()}
+    return value
+
+
+def render(payload: Any, fields: Optional[Sequence[str]] = None, fmt: str = "json") -> str:
+    """Serialize a tool result.
+
+    Uses compact separators; with fmt='table', lists of objects are sent as
+    {'columns': [...], 'rows': [[...]]} so keys are not repeated per item.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt}. Supported formats are: {', '.join(FORMATS)}")
+    payload = project(payload, fields)
+    if fmt == "table":
+        payload = _tabulate(payload)
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False, default=str)
@@ -0,0 +1,121 @@
+import functools
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple, Union
+
+from .models import Artist, ArtistSummary
+
+# Refresh checks read only popularity and the update times, which both carry
+ArtistLike = Union[Artist, ArtistSummary]
+
+
+@dataclass(frozen=True)
+class Tier:
+    """Refresh intervals for artists at or above a popularity threshold."""
+    name: str
+    popularity_threshold: int
+    standard_api_days: int
+    partner_api_days: int
+
+
+# Used when config.json has no update_schedule block; highest threshold first
+DEFAULT_TIERS: Tuple[Tier, ...] = (
+    Tier("top_tier", 75, 3, 7),
+    Tier("mid_tier", 50, 7, 14),
+    Tier("low_tier", 0, 14, 30),
+)
+
+
+# Names the update tools log for the default tiers
+TIER_LABELS = {"top_tier": "Top Tier", "mid_tier": "Mid Tier", "low_tier": "Lower Tier"}
+
+
+def tier_label(name: str) -> str:
+    """Display label for a tier name, e.g. 'Top Tier' for top_tier; other names are shown as is."""
+    return TIER_LABELS.get(name, name)
+
+
+# config.json in the project root, unless SPOTIFY_MCP_CONFIG points elsewhere
+CONFIG_PATH = os.getenv("SPOTIFY_MCP_CONFIG", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "config.json"))
+
+
+def tiers_from_config(config: Dict[str, Any]) -> Tuple[Tier, ...]:
+    """Build tiers from a loaded config's update_schedule block, highest threshold first."""
+    update_schedule = config.get("update_schedule")
+    if not update_schedule:
+        return DEFAULT_TIERS
+    tiers = tuple(
+        Tier(name, int(tier["popularity_threshold"]), int(tier["standard_api_days"]), int(tier["partner_api_days"]))
+        for name, tier in update_schedule.items()
+    )
+    return tuple(sorted(tiers, key=lambda tier: tier.popularity_threshold, reverse=True))
+
+
+@functools.lru_cache(maxsize=None)
+def load_tiers(config_path: str = CONFIG_PATH) -> Tuple[Tier, ...]:
+    """Tiers from the config file, or DEFAULT_TIERS if it is missing or has no schedule."""
+    try:
+        with open(config_path, "r") as f:
+            return tiers_from_config(json.load(f))
+    except FileNotFoundError:
+        return DEFAULT_TIERS
+    except (ValueError, KeyError, TypeError) as e:
+        logging.getLogger(__name__).error(f"Invalid update_schedule in {config_path}: {str(e)}")
+        return DEFAULT_TIERS
+
+
+def tier_for(popularity: Optional[int], tiers: Optional[Tuple[Tier, ...]] = None) -> Tier:
+    """Return the tier an artist with the given popularity belongs to."""
+    tiers = tiers or load_tiers()
+    popularity = popularity or 0
+    for tier in tiers:
+        if popularity >= tier.popularity_threshold:
+            return tier
+    return tiers[-1]
+
+
+def due_at_sql(timestamp: str, popularity: str, days_field: str, tiers: Optional[Tuple[Tier, ...]] = None) -> str:
+    """SQL expression for when a refresh falls due: `timestamp` plus the tier's interval.
+    
+    `days_field` is 'standard_api_days' or 'partner_api_days'. Rows never
+    refreshed are due at the epoch, so they sort first.
+    """
+    tiers = tiers or load_tiers()
+    cases = ' '.join(f"WHEN {popularity} >= {tier.popularity_threshold} THEN {getattr(tier, days_field)}"
+                     for tier in tiers[:-1])
+    days = f"CASE {cases} ELSE {getattr(tiers[-1], days_field)} END" if cases else str(getattr(tiers[-1], days_field))
+    return f"COALESCE(datetime({timestamp}, '+' || ({days}) || ' days'), '1970-01-01 00:00:00')"
+
+
+def tier_rank_sql(popularity: str, tiers: Optional[Tuple[Tier, ...]] = None) -> str:
+    """SQL expression for the index of the tier `popularity` falls in, 0 for the top tier."""
+    tiers = tiers or load_tiers()
+    cases = ' '.join(f"WHEN {popularity} >= {tier.popularity_threshold} THEN {index}"
+                     for index, tier in enumerate(tiers[:-1]))
+    return f"CASE {cases} ELSE {len(tiers) - 1} END" if cases else '0'
+
+
+def standard_age(artist: ArtistLike, now: Optional[datetime] = None) -> Optional[timedelta]:
+    """Time since the standard API data was refreshed (last_updated is stored in UTC)."""
+    if not artist.last_updated:
+        return None
+    return (now or datetime.utcnow()) - artist.last_updated
+
+
+def needs_standard_update(artist: Optional[ArtistLike], now: Optional[datetime] = None) -> bool:
+    """Determine if artist needs standard API update based on tier."""
+    if not artist or not artist.last_updated:
+        return True
+    return standard_age(artist, now).days >= tier_for(artist.popularity).standard_api_days
+
+
+def needs_partner_update(artist: Optional[ArtistLike], now: Optional[datetime] = None) -> bool:
+    """Determine if artist needs partner API update based on tier (enhanced_data_updated is stored in UTC)."""
+    if not artist or not artist.enhanced_data_updated:
+        return True
+    days_since_update = ((now or datetime.utcnow()) - artist.enhanced_data_updated).days
+    return days_since_update >= tier_for(artist.popularity).partner_api_days
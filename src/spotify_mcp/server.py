@@ -1,9 +1,10 @@
 import asyncio
+import json
 import os
 import logging
 from enum import Enum
-import json
 import sqlite3
+import sys
 from typing import List, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
@@ -11,9 +12,12 @@ from pathlib import Path
 import mcp.types as types
 from mcp.server import NotificationOptions, Server, stdio_server
 from pydantic import BaseModel, Field, AnyUrl
-from spotipy import SpotifyException
 
 from . import spotify_api
+from . import utils
+from .dispatch import ToolDispatcher
+from .metrics import registry as metrics
+from .response import DETAIL_LEVELS, render
 
 
 def setup_logger():
@@ -54,7 +58,38 @@ server = Server("spotify-mcp")
 
 # Get database path from environment or use default
 db_path = os.getenv("SPOTIFY_DB_PATH", "spotify_artists.db")
-spotify_client = spotify_api.Client(logger, db_path=db_path)
+
+# Blocking Spotify calls run on a bounded thread pool so one slow request
+# does not stall the event loop
+dispatcher = ToolDispatcher(
+    logger,
+    max_workers=int(os.getenv("SPOTIFY_MCP_MAX_WORKERS", "8")),
+    timeout=float(os.getenv("SPOTIFY_MCP_TOOL_TIMEOUT", "30"))
+)
+_spotify_client: Optional[spotify_api.Client] = None
+
+
+def get_spotify_client() -> spotify_api.Client:
+    """The server's shared Spotify client, created on the first tool call."""
+    global _spotify_client
+    if _spotify_client is None:
+        _spotify_client = spotify_api.Client(
+            logger,
+            db_path=db_path,
+            executor=dispatcher.executor,
+            search_cache_size=int(os.getenv("SPOTIFY_SEARCH_CACHE_SIZE", "256")),
+            search_cache_ttl=float(os.getenv("SPOTIFY_SEARCH_CACHE_TTL", "300")),
+            cache_search_artists=os.getenv("SPOTIFY_CACHE_SEARCH_ARTISTS", "true").lower() in ("1", "true", "yes")
+        )
+    return _spotify_client
+
+
+def __getattr__(name: str):
+    # Keeps `server.spotify_client` working without building it at import time
+    if name == "spotify_client":
+        return get_spotify_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 class ToolModel(BaseModel):
     @classmethod
@@ -65,7 +100,17 @@ class ToolModel(BaseModel):
             inputSchema=cls.model_json_schema()
         )
 
-class Playback(ToolModel):
+
+class ProjectedToolModel(ToolModel):
+    detail: str = Field(default="compact", description="'compact' returns the summarized fields of each item, "
+                                                      "'full' returns the complete Spotify payload.")
+    fields: Optional[List[str]] = Field(default=None, description="Only return these fields of each item, e.g. "
+                                                                  "['name', 'id', 'album.name'].")
+    format: str = Field(default="json", description="'json', or 'table' to return lists of items as "
+                                                    "{columns, rows} instead of repeating keys per item.")
+
+
+class Playback(ProjectedToolModel):
     """Manages the current playback with the following actions:
     - get: Get information about user's current track.
     - start: Starts of resumes playback.
@@ -77,27 +122,129 @@ class Playback(ToolModel):
     num_skips: Optional[int] = Field(default=1, description="Number of tracks to skip for `skip` action.")
 
 
-class Queue(ToolModel):
+class Queue(ProjectedToolModel):
     """Manage the playback queue - get the queue or add tracks."""
     action: str = Field(description="Action to perform: 'add' or 'get'.")
     track_id: Optional[str] = Field(default=None, description="Track ID to add to queue (required for add action)")
 
 
-class GetInfo(ToolModel):
+class GetInfo(ProjectedToolModel):
     """Get detailed information about a Spotify item (track, album, artist, or playlist)."""
     item_id: str = Field(description="ID of the item to get information about")
     qtype: str = Field(default="track", description="Type of item: 'track', 'album', 'artist', or 'playlist'. "
                                                     "If 'playlist' or 'album', returns its tracks. If 'artist',"
                                                     "returns albums and top tracks.")
-
-
-class Search(ToolModel):
+    max_age: Optional[int] = Field(default=None, description="For artists: maximum age in seconds of a locally cached "
+                                                             "record that may be returned instead of calling Spotify. "
+                                                             "Defaults to the popularity-tier refresh schedule.")
+    force_refresh: bool = Field(default=False, description="For artists: skip the local cache and always fetch from Spotify.")
+    allow_stale: bool = Field(default=True, description="For artists: return a cached record that is past its refresh "
+                                                        "schedule immediately and refresh it in the background.")
+    cursor: Optional[str] = Field(default=None, description="For albums and playlists: the next_cursor of a previous "
+                                                            "response, to continue with the following tracks.")
+    limit: Optional[int] = Field(default=None, description="For albums and playlists: maximum number of tracks to return "
+                                                           "(default 100).")
+
+
+class GenreArtists(ProjectedToolModel):
+    """Find artists in the local database by genre, most popular first. Without genres, list the genres
+    in the database with their number of artists."""
+    genres: Optional[List[str]] = Field(default=None, description="Genres to match, e.g. ['tech house', 'techno']; "
+                                                                  "an artist in any of them is returned.")
+    partial: bool = Field(default=False, description="Also match genres containing a term, so 'house' finds "
+                                                     "'deep house' and 'tech house'.")
+    min_popularity: Optional[int] = Field(default=None, description="Only return artists with at least this popularity.")
+    limit: Optional[int] = Field(default=50, description="Maximum number of artists (or genres) to return.")
+
+
+class Trends(ProjectedToolModel):
+    """Find the artists in the local database growing or declining fastest, from their stats history.
+    Returns the top risers and fallers with the change over the window, as a number and a percentage,
+    its acceleration (change versus the window before) and a z-score against all tracked artists."""
+    metric: str = Field(default="monthly_listeners", description="'monthly_listeners', 'followers' or 'popularity'.")
+    window: int = Field(default=30, description="Days to measure the change over: 7, 30 or 90.")
+    rank_by: str = Field(default="pct", description="Rank by 'pct' (percentage change), 'delta' (absolute "
+                                                    "change), 'accel' (acceleration) or 'z' (z-score).")
+    min_value: Optional[float] = Field(default=None, description="Only rank artists whose current value of the "
+                                                                 "metric is at least this, e.g. 10000 listeners.")
+    limit: int = Field(default=10, description="Number of risers and of fallers to return.")
+
+
+class Stats(ToolModel):
+    """Report server metrics: call counts and latency per tool, time spent in Spotify API calls, SQLite
+    and JSON encoding, and cache statistics."""
+    reset: bool = Field(default=False, description="Clear counters and latency histograms after reading them.")
+
+
+class Search(ProjectedToolModel):
     """Search for tracks, albums, artists, or playlists on Spotify."""
     query: str = Field(description="query term")
     qtype: Optional[str] = Field(default="track", description="Type of items to search for (track, album, artist, playlist, or comma-separated combination)")
     limit: Optional[int] = Field(default=10, description="Maximum number of items to return")
 
 
+def _compact_search(results: dict, qtype: str) -> dict:
+    return utils.parse_search_results(results, qtype)
+
+
+def _full_search(results: dict, qtype: str) -> dict:
+    # Drop Spotify's paging envelope, keep the complete items
+    return {category: page.get('items', []) for category, page in results.items() if isinstance(page, dict)}
+
+
+def _compact_info(item_info: dict, qtype: str) -> dict:
+    if not item_info:
+        return item_info
+    if qtype == "track":
+        return utils.parse_track(item_info, detailed=True)
+    if qtype in ("album", "playlist"):
+        narrowed_item = {k: item_info.get(k) for k in ['name', 'id', 'total', 'offset', 'next_cursor']}
+        if qtype == "album" and 'artists' in item_info:
+            narrowed_item['artists'] = [a['name'] for a in item_info['artists']]
+            narrowed_item['release_date'] = item_info.get('release_date')
+        if qtype == "playlist" and 'owner' in item_info:
+            narrowed_item['owner'] = item_info['owner'].get('display_name')
+        narrowed_item['tracks'] = [utils.parse_queue_item(t) for t in item_info.get('tracks', [])]
+        return narrowed_item
+    if 'artists' in item_info:
+        sources = item_info.get('sources', {})
+        status = item_info.get('save_status', {})
+        return {
+            'artists': [dict(utils.parse_artist_info(a), source=sources.get(a['id']))
+                        for a in item_info['artists'] if a],
+            'failed_saves': status.get('failed_saves', [])
+        }
+    return utils.parse_artist_info(item_info)
+
+
+def _compact_artists(payload: dict) -> dict:
+    return {'artists': [utils.parse_artist_info(a) for a in payload['artists']]}
+
+
+def _is_spotify_error(error: Exception) -> bool:
+    # spotipy is imported with the first Spotify call; until then no error can come from it
+    spotipy = sys.modules.get("spotipy")
+    return spotipy is not None and isinstance(error, spotipy.SpotifyException)
+
+
+def _respond(tool: str, arguments: dict, payload, compact=None, *args) -> list[types.TextContent]:
+    """Shape a tool result according to the detail/fields/format arguments."""
+    detail = arguments.get("detail", "compact")
+    if detail not in DETAIL_LEVELS:
+        return [types.TextContent(
+            type="text",
+            text=f"Unknown detail level: {detail}. Supported levels are: {', '.join(DETAIL_LEVELS)}."
+        )]
+    if detail == "compact" and compact is not None:
+        payload = compact(payload, *args)
+    try:
+        with metrics.timer(f"json.{tool}"):
+            text = render(payload, fields=arguments.get("fields"), fmt=arguments.get("format", "json"))
+    except ValueError as e:
+        text = str(e)
+    return [types.TextContent(type="text", text=text)]
+
+
 @server.list_tools()
 async def handle_list_tools() -> list[types.Tool]:
     """List available tools."""
@@ -107,11 +254,28 @@ async def handle_list_tools() -> list[types.Tool]:
         Search.as_tool(),
         Queue.as_tool(),
         GetInfo.as_tool(),
+        GenreArtists.as_tool(),
+        Trends.as_tool(),
+        Stats.as_tool(),
     ]
     logger.info(f"Available tools: {[tool.name for tool in tools]}")
     return tools
 
 
+def stats_snapshot() -> dict:
+    """Metrics plus the state of the server's caches and worker pool."""
+    snapshot = metrics.snapshot()
+    snapshot['dispatcher'] = {'max_workers': dispatcher.max_workers, 'timeout': dispatcher.timeout}
+    # Report the client only once a tool call has created it
+    if _spotify_client is not None:
+        snapshot['search_cache'] = _spotify_client.search_cache.stats()
+        snapshot['single_flight_shared'] = _spotify_client.flight.shared
+        snapshot['refresh_pending'] = _spotify_client.refresher.pending
+        if _spotify_client._db is not None:
+            snapshot['artist_cache'] = _spotify_client.db.cache.stats()
+    return snapshot
+
+
 @server.call_tool()
 async def handle_call_tool(
         name: str, arguments: dict | None
@@ -120,6 +284,21 @@ async def handle_call_tool(
     logger.info(f"Tool called: {name} with arguments: {arguments}")
     assert name[:7] == "Spotify", f"Unknown tool: {name}"
 
+    with metrics.timer(f"tool.{name[7:]}"):
+        if name[7:] == "Stats":
+            arguments = arguments or {}
+            snapshot = stats_snapshot()
+            if arguments.get("reset", False):
+                metrics.reset()
+            return _respond("Stats", arguments, snapshot)
+        return await _call_tool(name, arguments)
+
+
+async def _call_tool(
+        name: str, arguments: dict | None
+) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    spotify_client = get_spotify_client()
+
     try:
         match name[7:]:
             case "Playback":
@@ -127,13 +306,10 @@ async def handle_call_tool(
                 match action:
                     case "get":
                         logger.info("Attempting to get current track")
-                        curr_track = spotify_client.get_current_track()
+                        curr_track = await dispatcher.run("Playback", spotify_client.get_current_track)
                         if curr_track:
-                            logger.info(f"Current track retrieved: {curr_track.get('name', 'Unknown')}")
-                            return [types.TextContent(
-                                type="text",
-                                text=json.dumps(curr_track, indent=2)
-                            )]
+                            logger.info(f"Current track retrieved: {(curr_track.get('item') or {}).get('name', 'Unknown')}")
+                            return _respond("Playback", arguments, curr_track, utils.parse_playback)
                         logger.info("No track currently playing")
                         return [types.TextContent(
                             type="text",
@@ -141,7 +317,7 @@ async def handle_call_tool(
                         )]
                     case "start":
                         logger.info(f"Starting playback with arguments: {arguments}")
-                        spotify_client.start_playback(track_id=arguments.get("track_id"))
+                        await dispatcher.run("Playback", spotify_client.start_playback, track_id=arguments.get("track_id"))
                         logger.info("Playback started successfully")
                         return [types.TextContent(
                             type="text",
@@ -149,7 +325,7 @@ async def handle_call_tool(
                         )]
                     case "pause":
                         logger.info("Attempting to pause playback")
-                        spotify_client.pause_playback()
+                        await dispatcher.run("Playback", spotify_client.pause_playback)
                         logger.info("Playback paused successfully")
                         return [types.TextContent(
                             type="text",
@@ -158,7 +334,7 @@ async def handle_call_tool(
                     case "skip":
                         num_skips = int(arguments.get("num_skips", 1))
                         logger.info(f"Skipping {num_skips} tracks.")
-                        spotify_client.skip_track(n=num_skips)
+                        await dispatcher.run("Playback", spotify_client.skip_track, n=num_skips)
                         return [types.TextContent(
                             type="text",
                             text="Skipped to next track."
@@ -166,16 +342,18 @@ async def handle_call_tool(
 
             case "Search":
                 logger.info(f"Performing search with arguments: {arguments}")
-                search_results = spotify_client.search(
+                qtype = arguments.get("qtype", "track")
+                search_results = await dispatcher.run(
+                    "Search",
+                    spotify_client.search,
                     query=arguments.get("query", ""),
-                    qtype=arguments.get("qtype", "track"),
+                    qtype=qtype,
                     limit=arguments.get("limit", 10)
                 )
                 logger.info("Search completed successfully")
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps(search_results, indent=2)
-                )]
+                if arguments.get("detail", "compact") == "full":
+                    return _respond("Search", arguments, _full_search(search_results, qtype))
+                return _respond("Search", arguments, search_results, _compact_search, qtype)
 
             case "Queue":
                 logger.info(f"Queue operation with arguments: {arguments}")
@@ -190,18 +368,15 @@ async def handle_call_tool(
                                 type="text",
                                 text="track_id is required for add action"
                             )]
-                        spotify_client.add_to_queue(track_id)
+                        await dispatcher.run("Queue", spotify_client.add_to_queue, track_id)
                         return [types.TextContent(
                             type="text",
                             text=f"Track added to queue successfully."
                         )]
 
                     case "get":
-                        queue = spotify_client.get_queue()
-                        return [types.TextContent(
-                            type="text",
-                            text=json.dumps(queue, indent=2)
-                        )]
+                        queue = await dispatcher.run("Queue", spotify_client.get_queue)
+                        return _respond("Queue", arguments, queue, utils.parse_queue)
 
 
                     case _:
@@ -212,22 +387,56 @@ async def handle_call_tool(
 
             case "GetInfo":
                 logger.info(f"Getting item info with arguments: {arguments}")
-                item_info = await spotify_client.get_info(
-                    item_id=arguments.get("item_id"),
-                    qtype=arguments.get("qtype", "track")
-                )
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps(item_info, indent=2)
-                )]
+                qtype = arguments.get("qtype", "track")
+                async with dispatcher.limit("GetInfo"):
+                    item_info = await spotify_client.get_info(
+                        item_id=arguments.get("item_id"),
+                        qtype=qtype,
+                        max_age=arguments.get("max_age"),
+                        force_refresh=arguments.get("force_refresh", False),
+                        allow_stale=arguments.get("allow_stale", True),
+                        cursor=arguments.get("cursor"),
+                        limit=arguments.get("limit")
+                    )
+                return _respond("GetInfo", arguments, item_info, _compact_info, qtype)
+
+            case "GenreArtists":
+                logger.info(f"Finding artists by genre with arguments: {arguments}")
+                genres = arguments.get("genres")
+                limit = arguments.get("limit", 50)
+                async with dispatcher.limit("GenreArtists"):
+                    if not genres:
+                        counts = await spotify_client.async_db.get_genre_counts(limit=limit)
+                        return _respond("GenreArtists", arguments, {'genres': counts})
+                    artists = await spotify_client.async_db.get_artists_by_genre(
+                        genres,
+                        partial=arguments.get("partial", False),
+                        min_popularity=arguments.get("min_popularity"),
+                        limit=limit
+                    )
+                payload = {'artists': [artist.to_dict() for artist in artists]}
+                return _respond("GenreArtists", arguments, payload, _compact_artists)
+
+            case "Trends":
+                logger.info(f"Computing artist trends with arguments: {arguments}")
+                try:
+                    async with dispatcher.limit("Trends"):
+                        movers = await spotify_client.async_db.get_trends(
+                            metric=arguments.get("metric", "monthly_listeners"),
+                            window=arguments.get("window", 30),
+                            limit=arguments.get("limit", 10),
+                            rank_by=arguments.get("rank_by", "pct"),
+                            min_value=arguments.get("min_value")
+                        )
+                except (ImportError, ValueError) as e:
+                    return [types.TextContent(type="text", text=str(e))]
+                return _respond("Trends", arguments, movers)
 
             case _:
                 error_msg = f"Unknown tool: {name}"
                 logger.error(error_msg)
                 raise ValueError(error_msg)
 
-    except SpotifyException as se:
-        error_msg = f"Spotify Client error occurred: {str(se)}"
     except sqlite3.Error as dbe:
         error_msg = f"Database error occurred: {str(dbe)}"
         logger.error(error_msg, exc_info=True)
@@ -235,20 +444,45 @@ async def handle_call_tool(
             type="text",
             text=f"A database error occurred: {str(dbe)}"
         )]
-        logger.error(error_msg, exc_info=True)
+    except TimeoutError:
         return [types.TextContent(
             type="text",
-            text=f"An error occurred with the Spotify Client: {str(se)}"
+            text=f"{name} timed out after {dispatcher.timeout} seconds."
         )]
     except Exception as e:
+        if _is_spotify_error(e):
+            error_msg = f"Spotify Client error occurred: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return [types.TextContent(
+                type="text",
+                text=f"An error occurred with the Spotify Client: {str(e)}"
+            )]
         error_msg = f"Unexpected error occurred: {str(e)}"
         logger.error(error_msg, exc_info=True)
         raise
 
 
+async def dump_metrics(interval: float):
+    """Append a metrics snapshot to LOGGING_PATH every `interval` seconds."""
+    log_dir = Path(os.getenv("LOGGING_PATH"))
+    while True:
+        await asyncio.sleep(interval)
+        metrics_file = log_dir / f"spotify_mcp_metrics_{datetime.now().strftime('%Y%m%d')}.jsonl"
+        try:
+            line = json.dumps({'timestamp': datetime.now().isoformat(), **stats_snapshot()})
+            with open(metrics_file, "a") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.error(f"Could not write metrics to {metrics_file}: {str(e)}")
+
+
 async def main():
     logger.info("Starting Spotify MCP server")
+    dump_task = None
     try:
+        metrics_interval = float(os.getenv("SPOTIFY_MCP_METRICS_INTERVAL", "0"))
+        if metrics_interval > 0 and os.getenv("LOGGING_PATH"):
+            dump_task = asyncio.create_task(dump_metrics(metrics_interval))
         options = server.create_initialization_options()
         async with stdio_server() as (read_stream, write_stream):
             logger.info("Server initialized successfully")
@@ -259,4 +493,10 @@ async def main():
             )
     except Exception as e:
         logger.error(f"Server error occurred: {str(e)}", exc_info=True)
-        raise
\ No newline at end of file
+        raise
+    finally:
+        if dump_task is not None:
+            dump_task.cancel()
+        dispatcher.shutdown()
+        if _spotify_client is not None:
+            _spotify_client.close()
\ No newline at end of file
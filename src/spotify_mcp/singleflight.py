@@ -0,0 +1,123 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+
+class _Call:
+    """An in-flight blocking call that other threads can wait on."""
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+def _mark_retrieved(future: asyncio.Future):
+    # Avoid "exception was never retrieved" warnings when nobody is waiting
+    if not future.cancelled():
+        future.exception()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one upstream request.
+
+    The first caller for a key runs the function; callers that arrive while it
+    is in flight wait for and share its result or exception. Keys are released
+    as soon as the call finishes, so this deduplicates concurrent work only and
+    never serves stale results.
+
+    `do`/`do_many` are for coroutines on the event loop, `do_sync` for blocking
+    callers on worker threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._calls: Dict[Hashable, _Call] = {}
+        # Number of calls answered by another caller's in-flight request
+        self.shared = 0
+
+    def _release(self, key: Hashable, future: asyncio.Future):
+        if self._futures.get(key) is future:
+            del self._futures[key]
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        """Await fn(*args, **kwargs), sharing the result with concurrent callers for `key`."""
+        future = self._futures.get(key)
+        if future is not None:
+            self.shared += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(fn(*args, **kwargs))
+        self._futures[key] = future
+        future.add_done_callback(lambda f: self._release(key, f))
+        future.add_done_callback(_mark_retrieved)
+        # A cancelled caller must not cancel the work other callers wait on
+        return await asyncio.shield(future)
+
+    async def do_many(self, keys: Iterable[Hashable],
+                      fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]) -> Dict[Hashable, Any]:
+        """Resolve many keys at once.
+
+        Keys already in flight are awaited; the rest are passed to `fn` in a
+        single call, which must return a dict keyed by those keys. Missing
+        entries resolve to None. As in `do`, `fn` runs in its own task, so a
+        cancelled caller stops waiting without failing the callers it shares
+        keys with.
+        """
+        loop = asyncio.get_running_loop()
+        keys = list(dict.fromkeys(keys))
+        waiting = {key: self._futures[key] for key in keys if key in self._futures}
+        owned = {key: loop.create_future() for key in keys if key not in waiting}
+        self.shared += len(waiting)
+
+        for key, future in owned.items():
+            self._futures[key] = future
+            future.add_done_callback(_mark_retrieved)
+
+        def settle(task: asyncio.Future):
+            for key, future in owned.items():
+                self._release(key, future)
+                if task.cancelled():
+                    future.cancel()
+                elif task.exception() is not None:
+                    future.set_exception(task.exception())
+                else:
+                    future.set_result(task.result().get(key))
+
+        if owned:
+            task = asyncio.ensure_future(fn(list(owned)))
+            task.add_done_callback(settle)
+            task.add_done_callback(_mark_retrieved)
+
+        futures = {**waiting, **owned}
+        return {key: await asyncio.shield(futures[key]) for key in keys}
+
+    def do_sync(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs), sharing the result with threads calling for the same `key`."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
@@ -1,120 +1,446 @@
+import asyncio
+import copy
+import functools
 import logging
 import os
-from typing import List, Dict, Any, Optional
+import threading
+from concurrent.futures import Executor
+from typing import AsyncIterator, List, Dict, Any, Optional
 from datetime import datetime
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
+from . import dispatch, schedule
 from .artists import ArtistDatabase
+from .async_artists import AsyncArtistDatabase
 from .models import Artist
+from .cache import TTLCache
+from .metrics import instrument, registry
+from .refresh import BackgroundRefresher
+from .singleflight import SingleFlight
 
 class Client:
     """Spotify API Client with batch processing capabilities"""
     
-    def __init__(self, logger: logging.Logger, db_path: str):
+    def __init__(self, logger: logging.Logger, db_path: str, executor: Optional[Executor] = None,
+                 search_cache_size: int = 256, search_cache_ttl: float = 300.0,
+                 cache_search_artists: bool = False, single_flight: Optional[SingleFlight] = None,
+                 artist_cache_size: int = 1024):
         self.logger = logger
         self.db_path = db_path
         self.MAX_BATCH_SIZE = 50
-        # Initialize Spotify client with environment variables
-        self.sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
-            client_id=os.getenv("SPOTIFY_CLIENT_ID"),
-            client_secret=os.getenv("SPOTIFY_CLIENT_SECRET"),
-            redirect_uri=os.getenv("SPOTIFY_REDIRECT_URI"),
-            scope="user-library-read playlist-read-private"
-        ))
-        # Initialize artist database
-        self.db = ArtistDatabase(db_path, logger)
-
-
-    async def get_info(self, item_id: str, qtype: str = "track") -> Dict[str, Any]:
-        """Get information about a Spotify item"""
+        self.MAX_PARALLEL_CHUNKS = 4
+        # Largest page Spotify serves for album and playlist tracks
+        self.PAGE_SIZES = {'album': 50, 'playlist': 100}
+        # Tracks returned per GetInfo call; callers page on with the cursor
+        self.DEFAULT_TRACK_LIMIT = 100
+        # Blocking spotipy/SQLite calls made from async methods run here
+        # (None means the event loop's default executor)
+        self.executor = executor
+        # The spotipy client and the artist database are built on first use,
+        # so importing the server or listing tools does neither
+        self._sp = None
+        self._db = None
+        self._async_db = None
+        self._init_lock = threading.Lock()
+        # Decoded artists the database keeps in memory
+        self.artist_cache_size = artist_cache_size
+        # Stale artists served from the database are refreshed in the background
+        self.refresher = BackgroundRefresher(self._refresh_artists, logger, batch_size=self.MAX_BATCH_SIZE)
+        # Repeated searches are answered in-process; artists found by a search
+        # can also be written to the database so later GetInfo calls hit it
+        self.search_cache = TTLCache(maxsize=search_cache_size, ttl=search_cache_ttl,
+                                     copy=copy.deepcopy)
+        self.cache_search_artists = cache_search_artists
+        # Concurrent requests for the same artist share one upstream call
+        self.flight = single_flight or SingleFlight()
+
+    @property
+    def sp(self):
+        """Spotify client, created from the SPOTIFY_* environment variables on first use."""
+        if self._sp is None:
+            with self._init_lock:
+                if self._sp is None:
+                    import spotipy
+                    from spotipy.oauth2 import SpotifyOAuth
+                    # Every Spotify Web API call is timed as 'spotify.<method>'
+                    self._sp = instrument(spotipy.Spotify(auth_manager=SpotifyOAuth(
+                        client_id=os.getenv("SPOTIFY_CLIENT_ID"),
+                        client_secret=os.getenv("SPOTIFY_CLIENT_SECRET"),
+                        redirect_uri=os.getenv("SPOTIFY_REDIRECT_URI"),
+                        scope="user-library-read playlist-read-private"
+                    )), "spotify")
+        return self._sp
+
+    @sp.setter
+    def sp(self, value):
+        self._sp = value
+
+    @property
+    def db(self) -> ArtistDatabase:
+        """Artist database, opened (and its schema created) on first use."""
+        if self._db is None:
+            with self._init_lock:
+                if self._db is None:
+                    self._db = ArtistDatabase(self.db_path, self.logger, cache_size=self.artist_cache_size)
+        return self._db
+
+    @db.setter
+    def db(self, value: ArtistDatabase):
+        self._db = value
+        self._async_db = None
+
+    @property
+    def async_db(self) -> AsyncArtistDatabase:
+        """Async access to the database: reads on a reader pool, saves group-committed by one writer thread."""
+        if self._async_db is None:
+            db = self.db
+            with self._init_lock:
+                if self._async_db is None:
+                    self._async_db = AsyncArtistDatabase(db)
+        return self._async_db
+
+    def close(self):
+        """Commit queued saves and close the database connections, if the database was opened."""
+        if self._async_db is not None:
+            self._async_db.close()
+            self._async_db = None
+        if self._db is not None:
+            self._db.close()
+
+    async def _call(self, func, *args, **kwargs):
+        """Run a blocking call off the event loop.
+        
+        On our own executor the call is tracked, so a tool slot held by the
+        caller is not released before it finishes (see dispatch.track).
+        """
+        if self.executor is not None:
+            return await dispatch.run_in(self.executor, func, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    async def _refresh_artists(self, artist_ids: List[str]):
+        """Background refresh target: fetch and save a batch of artists."""
+        await self.get_artists_batch(artist_ids, force_refresh=True)
+
+    def _is_fresh(self, artist: Artist, max_age: Optional[int] = None) -> bool:
+        """Check whether a cached artist row can be served without calling Spotify.
+        
+        Uses the popularity-tier schedule unless max_age (seconds) is given.
+        """
+        if max_age is None:
+            return not schedule.needs_standard_update(artist)
+        age = schedule.standard_age(artist)
+        return age is not None and age.total_seconds() <= max_age
+
+    async def get_info(self, item_id: str, qtype: str = "track", max_age: Optional[int] = None,
+                       force_refresh: bool = False, allow_stale: bool = True,
+                       cursor: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Get information about a Spotify item
+        
+        Artist lookups are served from the local database when the stored row
+        is still fresh. With allow_stale, a row past its tier schedule is also
+        returned at once while a background refresh is scheduled. The
+        response's 'source' is 'cache', 'stale_cache' or 'network'.
+        
+        Albums and playlists return up to `limit` tracks starting at `cursor`,
+        plus 'total' and a 'next_cursor' for the following page (None once
+        all tracks have been returned).
+        """
         self.logger.info(f"Getting info for {qtype} with ID {item_id}")
         
         try:
+            if qtype == "track":
+                return await self._call(self.sp.track, item_id)
+            
+            if qtype in self.PAGE_SIZES:
+                return await self._get_tracks_page(item_id, qtype, cursor, limit)
+            
             if qtype == "artist":
                 # Check if it's a batch request (comma-separated IDs)
                 if ',' in item_id:
                     artist_ids = [aid.strip() for aid in item_id.split(',')]
                     self.logger.info(f"Batch request detected for {len(artist_ids)} artists")
-                    return await self.get_artists_batch(artist_ids)
+                    return await self.get_artists_batch(artist_ids, max_age=max_age, force_refresh=force_refresh,
+                                                        allow_stale=allow_stale)
                 
-                # Single artist request
+                # Serve from the database if the row is fresh
+                if not force_refresh:
+                    cached = await self.async_db.get_artist(item_id)
+                    if cached and self._is_fresh(cached, max_age):
+                        self.logger.info(f"Serving artist {cached.name} from database cache")
+                        registry.increment("artist.cache")
+                        result = cached.to_dict()
+                        result['source'] = 'cache'
+                        return result
+                    # An explicit max_age means the caller wants data at least that recent
+                    if cached and allow_stale and max_age is None:
+                        self.logger.info(f"Serving stale artist {cached.name} and scheduling a refresh")
+                        self.refresher.schedule(item_id)
+                        registry.increment("artist.stale_cache")
+                        result = cached.to_dict()
+                        result['source'] = 'stale_cache'
+                        return result
+                
+                # Single artist request; concurrent lookups share one fetch
                 self.logger.info(f"Getting info for single artist {item_id}")
-                artist_data = self.sp.artist(item_id)
+                artist_data, _ = await self.flight.do(('artist', item_id), self._fetch_artist, item_id)
                 
-                try:
-                    # Convert to Artist model with source tracking
-                    artist = Artist.from_spotify_data(artist_data, source='api')
-                    self.logger.info(f"Converting Spotify data to Artist model for {artist.name} with source tracking")
-                    
-                    # Save to database
-                    if self.db.save_artist(artist):
-                        self.logger.info(f"Successfully saved artist {artist.name} to database")
-                    else:
-                        self.logger.warning(f"Failed to save artist {artist.name} to database")
-                        
-                except Exception as e:
-                    self.logger.error(f"Error processing artist data: {str(e)}")
-                    # Still return the data even if saving fails
-                    
-                return artist_data
+                registry.increment("artist.network")
+                result = dict(artist_data)
+                result['source'] = 'network'
+                return result
+            
+            raise ValueError(f"Unknown qtype {qtype}. Supported types are: track, album, artist, playlist")
         
         except Exception as e:
-            self.logger.error(f"Error fetching artist(s): {str(e)}")
+            self.logger.error(f"Error fetching {qtype} info: {str(e)}")
             raise
 
-    def search(self, query: str, qtype: str = "track", limit: int = 10) -> Dict[str, Any]:
+    def _fetch_tracks_page(self, item_id: str, qtype: str, offset: int, limit: int) -> Dict[str, Any]:
+        if qtype == "album":
+            return self.sp.album_tracks(item_id, limit=limit, offset=offset)
+        return self.sp.playlist_items(item_id, limit=limit, offset=offset)
+
+    async def _get_tracks_page(self, item_id: str, qtype: str, cursor: Optional[str] = None,
+                               limit: Optional[int] = None) -> Dict[str, Any]:
+        """One page of an album's or playlist's tracks, with a cursor to the next."""
+        try:
+            offset = int(cursor) if cursor else 0
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        limit = limit or self.DEFAULT_TRACK_LIMIT
+        
+        if offset == 0:
+            # The item itself embeds its first page of tracks
+            fetch = self.sp.album if qtype == "album" else self.sp.playlist
+            result = await self._call(fetch, item_id)
+            first_page = result.pop('tracks')
+        else:
+            result = {'id': item_id, 'type': qtype}
+            first_page = await self._call(self._fetch_tracks_page, item_id, qtype, offset,
+                                          min(limit, self.PAGE_SIZES[qtype]))
+        
+        total = first_page.get('total', 0)
+        tracks = [track async for track in self.iter_tracks(item_id, qtype, offset, limit, first_page)]
+        end = offset + limit
+        result.update({
+            'total': total,
+            'offset': offset,
+            'tracks': tracks,
+            'next_cursor': str(end) if end < total else None
+        })
+        return result
+
+    async def iter_tracks(self, item_id: str, qtype: str, offset: int = 0, limit: Optional[int] = None,
+                          first_page: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the tracks of an album or playlist in order
+        
+        The first page tells us the total; the remaining pages are then
+        requested by offset, MAX_PARALLEL_CHUNKS at a time, and yielded as each
+        window arrives so only that window is held in memory. Playlist entries
+        are unwrapped to their track (or episode); removed tracks are skipped.
+        """
+        page_size = self.PAGE_SIZES[qtype]
+        if first_page is None:
+            first_page = await self._call(self._fetch_tracks_page, item_id, qtype, offset, page_size)
+        total = first_page.get('total', 0)
+        end = total if limit is None else min(total, offset + limit)
+        
+        def tracks_of(page: Dict[str, Any], count: int):
+            for item in page.get('items', [])[:count]:
+                if not item:
+                    continue
+                track = item.get('track', item) if qtype == "playlist" else item
+                if track:
+                    yield track
+        
+        first_items = first_page.get('items', [])
+        for track in tracks_of(first_page, end - offset):
+            yield track
+        
+        offsets = list(range(offset + len(first_items), end, page_size)) if first_items else []
+        for i in range(0, len(offsets), self.MAX_PARALLEL_CHUNKS):
+            window = offsets[i:i + self.MAX_PARALLEL_CHUNKS]
+            pages = await asyncio.gather(*(
+                self._call(self._fetch_tracks_page, item_id, qtype, page_offset, min(page_size, end - page_offset))
+                for page_offset in window
+            ))
+            for page_offset, page in zip(window, pages):
+                for track in tracks_of(page, end - page_offset):
+                    yield track
+
+    async def _save_fetched_artist(self, artist_data: Dict[str, Any]) -> bool:
+        """Convert a Spotify artist payload and save it to the database."""
+        try:
+            # Convert to Artist model with source tracking
+            artist = Artist.from_spotify_data(artist_data, source='api')
+            self.logger.info(f"Converting Spotify data to Artist model for {artist.name} with source tracking")
+            
+            # Save to database
+            if await self.async_db.save_artist(artist):
+                self.logger.info(f"Successfully saved artist {artist.name} to database")
+                return True
+            self.logger.warning(f"Failed to save artist {artist.name} to database")
+            return False
+            
+        except Exception as e:
+            self.logger.error(f"Error processing artist data: {str(e)}")
+            return False
+
+    async def _fetch_artist(self, artist_id: str) -> tuple:
+        """Fetch one artist from Spotify and save it. Returns (artist_data, saved)."""
+        artist_data = await self._call(self.sp.artist, artist_id)
+        # Still return the data even if saving fails
+        return artist_data, await self._save_fetched_artist(artist_data)
+
+    async def _fetch_artists(self, keys: List[tuple]) -> Dict[tuple, tuple]:
+        """Fetch up to 50 ('artist', id) keys with one sp.artists call.
+        
+        The fetched artists are saved together through async_db, in the same
+        transaction as any other saves waiting at the time. Returns
+        {key: (artist_data, saved)}.
+        """
+        response = await self._call(self.sp.artists, [key[1] for key in keys])
+        
+        payloads = {}
+        artists = []
+        for key, artist_data in zip(keys, response['artists']):
+            if not artist_data:
+                continue
+            payloads[key] = artist_data
+            try:
+                artists.append(Artist.from_spotify_data(artist_data, source='api'))
+            except Exception as e:
+                self.logger.error(f"Error processing artist data: {str(e)}")
+        
+        saved = set()
+        if artists:
+            save_results = await self.async_db.save_artists(artists)
+            saved.update(save_results['successful'])
+        
+        return {key: (artist_data, key[1] in saved) for key, artist_data in payloads.items()}
+
+    @staticmethod
+    def _search_key(query: str, qtype: Optional[str], limit: int) -> tuple:
+        """Normalize search arguments so equivalent searches share a cache entry.
+
+        A missing or blank qtype searches tracks, as the search() default does.
+        """
+        qtypes = sorted({t.strip().lower() for t in (qtype or '').split(',') if t.strip()})
+        return (' '.join(query.split()).casefold(), ','.join(qtypes) or 'track', int(limit))
+
+    def search(self, query: str, qtype: Optional[str] = "track", limit: int = 10) -> Dict[str, Any]:
         """Search for items on Spotify"""
+        key = self._search_key(query, qtype, limit)
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            self.logger.info(f"Search cache hit for {qtype} with query: {query}")
+            return cached
+        
         self.logger.info(f"Searching for {qtype} with query: {query}")
         try:
-            return self.sp.search(q=query, type=qtype, limit=limit)
+            results = self.sp.search(q=query, type=key[1], limit=limit)
         except Exception as e:
             self.logger.error(f"Search error: {str(e)}")
             raise
+        
+        self.search_cache.set(key, results)
+        if self.cache_search_artists and 'artists' in results:
+            self._save_search_artists(results['artists'].get('items', []))
+        return results
+
+    def _save_search_artists(self, items: List[Dict[str, Any]]):
+        """Write artists returned by a search to the database."""
+        artists = []
+        for artist_data in items:
+            if not artist_data:
+                continue
+            try:
+                artists.append(Artist.from_spotify_data(artist_data, source='api'))
+            except Exception as e:
+                self.logger.error(f"Error parsing searched artist {artist_data.get('id', 'unknown')}: {str(e)}")
+        if artists:
+            self.db.save_artists_batch(artists)
 
-    async def get_artists_batch(self, artist_ids: List[str]) -> Dict[str, Any]:
-        """Get multiple artists in one request"""
+    async def get_artists_batch(self, artist_ids: List[str], max_age: Optional[int] = None,
+                                force_refresh: bool = False, allow_stale: bool = False) -> Dict[str, Any]:
+        """Get any number of artists
+        
+        Fresh rows come from the database (stale ones too when allow_stale is
+        set, with a background refresh scheduled); only the remaining IDs are
+        fetched from Spotify, in chunks of MAX_BATCH_SIZE with up to
+        MAX_PARALLEL_CHUNKS requests in flight. Artists are returned in request
+        order, 'sources' maps each ID to 'cache', 'stale_cache' or 'network',
+        and save_status lists the outcome of each chunk.
+        """
         if not artist_ids:
             raise ValueError("Artist IDs list cannot be empty")
             
-        if len(artist_ids) > self.MAX_BATCH_SIZE:
-            self.logger.warning(f"Request exceeds maximum batch size of {self.MAX_BATCH_SIZE}")
-            artist_ids = artist_ids[:self.MAX_BATCH_SIZE]
-            
         try:
-            # Use Spotify's artists endpoint
-            response = self.sp.artists(artist_ids)
-            
-            # Convert and save artists
-            saved_artists = []
-            failed_saves = []
+            by_id = {}
+            sources = {}
             
-            for artist_data in response['artists']:
-                try:
-                    # Convert to Artist model
-                    artist = Artist.from_spotify_data(artist_data, source='api')
-                    self.logger.info(f"Converting Spotify data to Artist model for {artist.name} with source tracking")
-                    
-                    # Save to database
-                    if self.db.save_artist(artist):
-                        self.logger.info(f"Successfully saved artist {artist.name} to database")
-                        saved_artists.append(artist.id)
-                    else:
-                        self.logger.warning(f"Failed to save artist {artist.name} to database")
-                        failed_saves.append(artist.id)
+            if not force_refresh:
+                cached = await self.async_db.get_artists_batch(artist_ids)
+                for artist in cached['found']:
+                    if self._is_fresh(artist, max_age):
+                        by_id[artist.id] = artist.to_dict()
+                        sources[artist.id] = 'cache'
+                    elif allow_stale and max_age is None:
+                        by_id[artist.id] = artist.to_dict()
+                        sources[artist.id] = 'stale_cache'
+                        self.refresher.schedule(artist.id)
                         
-                except Exception as e:
-                    self.logger.error(f"Error processing artist data: {str(e)}")
-                    failed_saves.append(artist_data.get('id', 'unknown'))
+            to_fetch = [aid for aid in dict.fromkeys(artist_ids) if aid not in by_id]
+            self.logger.info(f"Batch lookup: {len(by_id)} served from cache, {len(to_fetch)} to fetch")
             
-            self.logger.info(f"Batch processing complete. Saved: {len(saved_artists)}, Failed: {len(failed_saves)}")
+            chunks = [to_fetch[i:i + self.MAX_BATCH_SIZE] for i in range(0, len(to_fetch), self.MAX_BATCH_SIZE)]
+            semaphore = asyncio.Semaphore(self.MAX_PARALLEL_CHUNKS)
+            chunk_errors = []
             
-            # Return original response plus save status
-            response['save_status'] = {
-                'successful_saves': saved_artists,
-                'failed_saves': failed_saves
-            }
+            async def fetch_chunk(chunk: List[str]) -> Dict[str, Any]:
+                status = {'artist_ids': chunk, 'successful_saves': [], 'failed_saves': []}
+                async with semaphore:
+                    try:
+                        # IDs another caller is already fetching are awaited, not refetched
+                        fetched = await self.flight.do_many([('artist', aid) for aid in chunk], self._fetch_artists)
+                    except Exception as e:
+                        self.logger.error(f"Error fetching chunk of {len(chunk)} artists: {str(e)}")
+                        status['failed_saves'] = list(chunk)
+                        status['error'] = str(e)
+                        chunk_errors.append(e)
+                        return status
+                
+                for artist_id in chunk:
+                    artist_data, saved = fetched.get(('artist', artist_id)) or (None, False)
+                    if not artist_data:
+                        status['failed_saves'].append(artist_id)
+                        continue
+                    by_id[artist_id] = artist_data
+                    sources[artist_id] = 'network'
+                    status['successful_saves' if saved else 'failed_saves'].append(artist_id)
+                return status
+            
+            chunk_status = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))
             
-            return response
+            # Surface the error when nothing could be fetched at all
+            if chunks and len(chunk_errors) == len(chunks):
+                raise chunk_errors[0]
+            
+            for source in sources.values():
+                registry.increment(f"artist.{source}")
+            saved_artists = [aid for status in chunk_status for aid in status['successful_saves']]
+            failed_saves = [aid for status in chunk_status for aid in status['failed_saves']]
+            self.logger.info(f"Batch processing complete. Chunks: {len(chunks)}, Saved: {len(saved_artists)}, Failed: {len(failed_saves)}")
+            
+            # Return artists in request order plus save status
+            return {
+                'artists': [by_id.get(aid) for aid in artist_ids],
+                'sources': sources,
+                'save_status': {
+                    'successful_saves': saved_artists,
+                    'failed_saves': failed_saves,
+                    'chunks': chunk_status
+                }
+            }
             
         except Exception as e:
             self.logger.error(f"Error in batch artist fetch: {str(e)}")
@@ -0,0 +1,214 @@
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from .history import HISTORY_TABLE
+
+try:
+    import numpy as np
+except ImportError:  # optional: pip install "spotify-mcp[analytics]"
+    np = None
+
+# Metric name -> artist_stats_history column
+METRICS = {
+    'monthly_listeners': 'monthly_listeners',
+    'followers': 'follower_count',
+    'popularity': 'popularity',
+}
+
+WINDOWS = (7, 30, 90)
+
+RANK_BY = ('pct', 'delta', 'accel', 'z')
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('Trend analytics needs numpy: pip install "spotify-mcp[analytics]"')
+
+
+def load_history(conn: sqlite3.Connection) -> Dict[str, 'np.ndarray']:
+    """Load artist_stats_history into arrays ordered by artist, then snapshot time.
+
+    Returns 'artist_ids' (one per artist), 'codes' (each row's index into
+    artist_ids), 'days' (snapshot time as a Julian day number) and one float
+    array per metric, with NaN where the value is missing.
+    """
+    _require_numpy()
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    # A plain table scan, sorted afterwards: ordering in SQL walks the index and
+    # looks up every row, which takes longer than fetching the rows themselves
+    rows = cursor.execute(f'''
+        SELECT artist_id, julianday(snapshot_date), {', '.join(METRICS.values())}
+        FROM {HISTORY_TABLE}
+    ''').fetchall()
+
+    if not rows:
+        ids, *columns = [()] * (2 + len(METRICS))
+    else:
+        ids, *columns = zip(*rows)
+    # None (a missing value) becomes NaN
+    columns = [np.array(column, dtype=np.float64) for column in columns]
+
+    first_seen: Dict[str, int] = {}
+    codes = np.fromiter((first_seen.setdefault(artist_id, len(first_seen)) for artist_id in ids),
+                        dtype=np.int64, count=len(ids))
+    # Renumber so codes follow artist ID order
+    seen = list(first_seen)
+    by_id = sorted(range(len(seen)), key=seen.__getitem__)
+    artist_ids = [seen[i] for i in by_id]
+    rank = np.empty(len(seen), dtype=np.int64)
+    rank[by_id] = np.arange(len(seen))
+    codes = rank[codes]
+    order = np.lexsort((columns[0], codes))
+
+    history = {
+        'artist_ids': np.array(artist_ids, dtype=object),
+        'codes': codes[order],
+        'days': columns[0][order],
+    }
+    for metric, column in zip(METRICS, columns[1:]):
+        history[metric] = column[order]
+    return history
+
+
+def _metric_trends(codes, days, values, n_artists: int, windows: Sequence[int]) -> Dict[str, 'np.ndarray']:
+    """Per-artist current value and changes over each window for one metric."""
+    nan = np.full(n_artists, np.nan)
+    result = {'current': nan.copy(), 'last_day': nan.copy()}
+    for window in windows:
+        for name in ('delta', 'pct', 'accel'):
+            result[f'{name}_{window}d'] = nan.copy()
+
+    valid = ~np.isnan(values)
+    codes, days, values = codes[valid], days[valid], values[valid]
+    if not len(codes):
+        return result
+
+    # Rows are ordered by artist then time: the last row of each run of codes is the artist's latest value
+    breaks = np.flatnonzero(np.diff(codes))
+    first = np.concatenate(([0], breaks + 1))
+    last = np.concatenate((breaks, [len(codes) - 1]))
+    owners = codes[last]
+    current = values[last]
+    last_day = days[last]
+    result['current'][owners] = current
+    result['last_day'][owners] = last_day
+
+    # One sorted key for (artist, time), spaced so no lookback crosses into the previous artist
+    base = days.min()
+    spacing = days.max() - base + 2 * max(windows) + 1
+    keys = codes * spacing + (days - base)
+
+    def value_before(offset: float) -> 'np.ndarray':
+        """Each artist's value at its latest snapshot taken at least `offset` days before its last one.
+
+        NaN if that snapshot is more than another `offset` days older still, so a long
+        gap in the history is not reported as the change over a short window.
+        """
+        target = last_day - base - offset
+        index = np.searchsorted(keys, owners * spacing + target, side='right') - 1
+        found = (index >= first) & (days[np.maximum(index, 0)] - base >= target - offset)
+        return np.where(found, values[np.maximum(index, 0)], np.nan)
+
+    for window in windows:
+        past = value_before(window)
+        earlier = value_before(2 * window)
+        delta = current - past
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct = np.where(past > 0, delta / past * 100.0, np.nan)
+        result[f'delta_{window}d'][owners] = delta
+        result[f'pct_{window}d'][owners] = pct
+        # Change over this window minus the change over the one before it
+        result[f'accel_{window}d'][owners] = delta - (past - earlier)
+    return result
+
+
+def _zscores(values: 'np.ndarray') -> 'np.ndarray':
+    present = ~np.isnan(values)
+    if present.sum() < 2:
+        return np.full(len(values), np.nan)
+    std = values[present].std()
+    if std == 0:
+        return np.where(present, 0.0, np.nan)
+    return (values - values[present].mean()) / std
+
+
+def compute_trends(history: Dict[str, 'np.ndarray'], windows: Sequence[int] = WINDOWS,
+                   metrics: Optional[Sequence[str]] = None) -> Dict[str, 'np.ndarray']:
+    """Growth of every artist over each window, for each metric, in one pass per metric.
+
+    Returns columns of equal length, one entry per artist: 'artist_id', and
+    for each metric <metric> (latest value), <metric>_last_day, and per
+    window <metric>_delta_<w>d (change over the window), _pct_<w>d (change
+    as a percentage of the value at its start), _accel_<w>d (change over
+    the window minus the change over the window before it) and _z_<w>d (the
+    percentage change as a z-score across all artists). A window needs a
+    snapshot about `w` days before the artist's latest one; without it the
+    window's columns are NaN.
+    """
+    _require_numpy()
+    artist_ids = history['artist_ids']
+    trends: Dict[str, np.ndarray] = {'artist_id': artist_ids}
+    for metric in metrics or METRICS:
+        columns = _metric_trends(history['codes'], history['days'], history[metric], len(artist_ids), windows)
+        trends[metric] = columns.pop('current')
+        for name, column in columns.items():
+            trends[f'{metric}_{name}'] = column
+        for window in windows:
+            trends[f'{metric}_z_{window}d'] = _zscores(trends[f'{metric}_pct_{window}d'])
+    return trends
+
+
+def _snapshot_date(julian_day) -> Optional[str]:
+    if np.isnan(julian_day):
+        return None
+    return (datetime(1970, 1, 1) + timedelta(days=float(julian_day) - 2440587.5)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _number(value) -> Optional[float]:
+    if np.isnan(value):
+        return None
+    return round(float(value), 3)
+
+
+def top_movers(trends: Dict[str, 'np.ndarray'], metric: str = 'monthly_listeners', window: int = 30,
+               limit: int = 10, rank_by: str = 'pct', names: Optional[Dict[str, str]] = None,
+               min_value: Optional[float] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """The `limit` artists rising and falling most on one metric over one window.
+
+    rank_by is 'pct', 'delta', 'accel' or 'z'. Artists whose latest value is
+    below min_value are left out, so tiny artists doubling from a handful of
+    listeners do not crowd out the list.
+    """
+    _require_numpy()
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of {list(METRICS)}")
+    if rank_by not in RANK_BY:
+        raise ValueError(f"Unknown ranking '{rank_by}', expected one of {list(RANK_BY)}")
+    key = f'{metric}_{rank_by}_{window}d'
+    if key not in trends:
+        raise ValueError(f"No {window}-day window in these trends")
+
+    score = trends[key]
+    eligible = ~np.isnan(score)
+    if min_value is not None:
+        eligible &= trends[metric] >= min_value
+    candidates = np.flatnonzero(eligible)
+    order = candidates[np.argsort(score[candidates], kind='stable')]
+    risers = [i for i in order[::-1][:limit] if score[i] > 0]
+    fallers = [i for i in order[:limit] if score[i] < 0]
+
+    def entry(i):
+        artist_id = trends['artist_id'][i]
+        return {
+            'id': artist_id,
+            'name': (names or {}).get(artist_id),
+            metric: _number(trends[metric][i]),
+            'delta': _number(trends[f'{metric}_delta_{window}d'][i]),
+            'pct': _number(trends[f'{metric}_pct_{window}d'][i]),
+            'accel': _number(trends[f'{metric}_accel_{window}d'][i]),
+            'z': _number(trends[f'{metric}_z_{window}d'][i]),
+            'last_snapshot': _snapshot_date(trends[f'{metric}_last_day'][i]),
+        }
+    return {'risers': [entry(i) for i in risers], 'fallers': [entry(i) for i in fallers]}
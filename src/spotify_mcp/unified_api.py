@@ -9,20 +9,22 @@ from datetime import datetime
 import subprocess
 from typing import List, Dict, Any, Optional
 
+from . import schedule
 from .models import Artist
 from .spotify_api import Client as SpotifyClient
 from .artists import ArtistDatabase
+from .metrics import registry
+from .singleflight import SingleFlight
 
-# Import from project root for Partner API
+# Partner API modules live in the project root and are imported on first use
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from spotify_token_manager import SpotifyTokenManager
-from spotify_partner_api import SpotifyPartnerAPI
 
 class UnifiedSpotifyAPI:
     """Combined standard and partner Spotify API client."""
     
     def __init__(self, db_path: str, logger: Optional[logging.Logger] = None, tokens_file_path: Optional[str] = None,
-                 client_id: Optional[str] = None, client_secret: Optional[str] = None, redirect_uri: Optional[str] = None):
+                 client_id: Optional[str] = None, client_secret: Optional[str] = None, redirect_uri: Optional[str] = None,
+                 standard_client: Optional[SpotifyClient] = None):
         """Initialize with both standard and partner API clients.
         
         Args:
@@ -32,6 +34,7 @@ class UnifiedSpotifyAPI:
             client_id: Optional Spotify client ID (defaults to env var SPOTIFY_CLIENT_ID)
             client_secret: Optional Spotify client secret (defaults to env var SPOTIFY_CLIENT_SECRET)
             redirect_uri: Optional Spotify redirect URI (defaults to env var SPOTIFY_REDIRECT_URI)
+            standard_client: Optional existing Client to share (its database is shared too)
         """
         self.db_path = db_path
         self.logger = logger or logging.getLogger(__name__)
@@ -48,11 +51,15 @@ class UnifiedSpotifyAPI:
         else:
             self.logger.warning("Spotify API credentials not found in environment variables or parameters")
         
-        # Initialize standard API client (uses the credentials from env vars or parameters)
-        self.standard_client = SpotifyClient(self.logger, db_path)
-        
-        # Database connection
-        self.db = ArtistDatabase(db_path, self.logger)
+        # Concurrent updates and fetches for the same artist share one upstream call
+        if standard_client is not None:
+            self.flight = standard_client.flight
+            self.standard_client = standard_client
+        else:
+            self.flight = SingleFlight()
+            # Standard API client (uses the credentials from env vars or parameters);
+            # it connects to Spotify and the database only when first used
+            self.standard_client = SpotifyClient(self.logger, db_path, single_flight=self.flight)
         
         # Set up token management for Partner API
         # Using a single shared token manager to maximize token reuse
@@ -61,8 +68,8 @@ class UnifiedSpotifyAPI:
             "tokens.json"
         )
         self.logger.info(f"Using tokens file: {self.tokens_file_path}")
-        self.token_manager = SpotifyTokenManager(self.tokens_file_path)
-        self.partner_api = SpotifyPartnerAPI(token_manager=self.token_manager)
+        self._token_manager = None
+        self._partner_api = None
         
         # Partner API tool paths (for legacy/fallback support)
         self.tools_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "tools")
@@ -70,6 +77,33 @@ class UnifiedSpotifyAPI:
         self.partner_update_script = os.path.join(self.tools_dir, "update_artist_from_enhanced_data.py")
         self.partner_fetch_script = os.path.join(os.path.dirname(self.tools_dir), "tests", "test_spotify_api.py")
         
+    @property
+    def db(self) -> ArtistDatabase:
+        """The standard client's database, so both APIs share one ArtistDatabase."""
+        return self.standard_client.db
+
+    @property
+    def async_db(self):
+        """The standard client's AsyncArtistDatabase, so reads and saves stay off the event loop."""
+        return self.standard_client.async_db
+
+    @property
+    def token_manager(self):
+        """Partner API token manager, loaded from the tokens file on first use."""
+        if self._token_manager is None:
+            from spotify_token_manager import SpotifyTokenManager
+            self._token_manager = SpotifyTokenManager(self.tokens_file_path)
+        return self._token_manager
+
+    @property
+    def partner_api(self):
+        """Partner API client, sharing the token manager and single-flight layer."""
+        if self._partner_api is None:
+            from spotify_partner_api import SpotifyPartnerAPI
+            self._partner_api = SpotifyPartnerAPI(token_manager=self.token_manager, single_flight=self.flight,
+                                                  metrics=registry)
+        return self._partner_api
+
     async def update_artist(self, artist_id: str, force_standard: bool = False, 
                            force_partner: bool = False) -> Optional[Artist]:
         """
@@ -83,8 +117,14 @@ class UnifiedSpotifyAPI:
         Returns:
             Updated artist object with combined data
         """
-        # 1. Get existing artist from database
-        existing = self.db.get_artist(artist_id)
+        # Callers updating the same artist concurrently wait for the first one
+        return await self.flight.do(("update", artist_id, force_standard, force_partner),
+                                    self._update_artist, artist_id, force_standard, force_partner)
+    
+    async def _update_artist(self, artist_id: str, force_standard: bool, force_partner: bool) -> Optional[Artist]:
+        """Run one artist update; see update_artist."""
+        # 1. Get the existing artist's refresh times (no JSON fields needed)
+        existing = await self.async_db.get_artist_summary(artist_id)
         
         # 2. Determine which APIs to call based on update schedule
         needs_standard = force_standard or self._needs_standard_update(existing)
@@ -101,7 +141,7 @@ class UnifiedSpotifyAPI:
         if needs_standard:
             self.logger.info(f"Updating artist {artist_id} with standard API")
             try:
-                await self.standard_client.get_info(artist_id, qtype="artist")
+                await self.standard_client.get_info(artist_id, qtype="artist", force_refresh=True)
                 update_result["standard_updated"] = True
             except Exception as e:
                 error_msg = f"Standard API update failed: {str(e)}"
@@ -122,7 +162,7 @@ class UnifiedSpotifyAPI:
                 update_result["errors"].append(error_msg)
         
         # 5. Get the updated artist from database
-        updated_artist = self.db.get_artist(artist_id)
+        updated_artist = await self.async_db.get_artist(artist_id)
         
         # 6. Add update status to artist data for reference
         if updated_artist and hasattr(updated_artist, 'data_sources'):
@@ -160,7 +200,7 @@ class UnifiedSpotifyAPI:
             else:
                 self.logger.info("No valid token available, will retrieve a new one")
                 
-            artist_data = self.partner_api.get_artist_details(artist_id)
+            artist_data = await asyncio.to_thread(self.partner_api.get_artist_details, artist_id)
             if not artist_data:
                 self.logger.error(f"Failed to get Partner API data for artist {artist_id}")
                 return False
@@ -172,14 +212,14 @@ class UnifiedSpotifyAPI:
                 return False
                 
             # Get existing artist from database
-            artist = self.db.get_artist(artist_id)
+            artist = await self.async_db.get_artist(artist_id)
             if not artist:
                 self.logger.error(f"Artist {artist_id} not found in database")
                 return False
                 
             # Update artist with enhanced data
             artist.monthly_listeners = metrics.get("monthly_listeners")
-            artist.enhanced_data_updated = datetime.now()
+            artist.enhanced_data_updated = datetime.utcnow()
             
             # Save social links and upcoming tours as JSON
             social_links = metrics.get("social_links", {})
@@ -199,7 +239,9 @@ class UnifiedSpotifyAPI:
             artist.data_sources["upcoming_tours"] = "partner_api"
             
             # Save to database
-            self.db.save_artist(artist)
+            if not await self.async_db.save_artist(artist):
+                self.logger.error(f"Failed to save Partner API data for artist {artist_id}")
+                return False
             self.logger.info(f"Successfully updated artist {artist.name} with Partner API data")
             return True
             
@@ -298,34 +340,10 @@ class UnifiedSpotifyAPI:
             self.logger.error(f"Error in update_partner_data: {str(e)}")
             return False
     
-    def _needs_standard_update(self, artist: Optional[Artist]) -> bool:
+    def _needs_standard_update(self, artist: Optional[schedule.ArtistLike]) -> bool:
         """Determine if artist needs standard API update based on tier."""
-        if not artist or not artist.last_updated:
-            return True
-            
-        days_since_update = (datetime.now() - artist.last_updated).days
-        
-        if artist.popularity >= 75 and days_since_update >= 3:
-            return True
-        elif artist.popularity >= 50 and days_since_update >= 7:
-            return True
-        elif days_since_update >= 14:
-            return True
-            
-        return False
+        return schedule.needs_standard_update(artist)
     
-    def _needs_partner_update(self, artist: Optional[Artist]) -> bool:
+    def _needs_partner_update(self, artist: Optional[schedule.ArtistLike]) -> bool:
         """Determine if artist needs partner API update based on tier."""
-        if not artist or not artist.enhanced_data_updated:
-            return True
-            
-        days_since_update = (datetime.now() - artist.enhanced_data_updated).days if artist.enhanced_data_updated else float('inf')
-        
-        if artist.popularity >= 75 and days_since_update >= 7:
-            return True
-        elif artist.popularity >= 50 and days_since_update >= 14:
-            return True
-        elif days_since_update >= 30:
-            return True
-            
-        return False
+        return schedule.needs_partner_update(artist)
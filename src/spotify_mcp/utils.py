@@ -124,11 +124,61 @@ def parse_album(album_item: dict, detailed=False) -> dict:
     return narrowed_item
 
 
+def parse_artist_info(artist_item: dict) -> Optional[dict]:
+    """Summarize a GetInfo artist payload (Spotify API or database record)."""
+    if not artist_item:
+        return None
+    followers = artist_item.get('followers')
+    narrowed_item = {
+        'id': artist_item['id'],
+        'name': artist_item['name'],
+        'genres': artist_item.get('genres', []),
+        'popularity': artist_item.get('popularity'),
+        'followers': followers.get('total') if isinstance(followers, dict) else followers,
+    }
+    for k in ['monthly_listeners', 'upcoming_tours_count', 'last_updated', 'enhanced_data_updated', 'source']:
+        if artist_item.get(k) is not None:
+            narrowed_item[k] = artist_item[k]
+    return narrowed_item
+
+
+def parse_queue_item(item: dict) -> Optional[dict]:
+    """Parse a queue entry, which may be a track or a podcast episode."""
+    if not item:
+        return None
+    if item.get('type', 'track') == 'track':
+        return parse_track(item)
+    return {'name': item.get('name'), 'id': item.get('id'), 'type': item.get('type')}
+
+
+def parse_queue(queue: dict) -> dict:
+    return {
+        'currently_playing': parse_queue_item(queue.get('currently_playing')),
+        'queue': [parse_queue_item(item) for item in queue.get('queue', []) if item],
+    }
+
+
+def parse_playback(playback: dict) -> Optional[dict]:
+    if not playback:
+        return None
+    narrowed_item = {
+        'is_playing': playback.get('is_playing'),
+        'progress_ms': playback.get('progress_ms'),
+        'shuffle_state': playback.get('shuffle_state'),
+        'repeat_state': playback.get('repeat_state'),
+        'track': parse_queue_item(playback.get('item')),
+    }
+    device = playback.get('device')
+    if device:
+        narrowed_item['device'] = {k: device.get(k) for k in ['name', 'type', 'volume_percent']}
+    return narrowed_item
+
+
 def parse_search_results(results: Dict, qtype: str):
     _results = defaultdict(list)
 
     for q in qtype.split(","):
-        match q:
+        match q.strip().lower():
             case "track":
                 for idx, item in enumerate(results['tracks']['items']):
                     if not item: continue
@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+# artist_stats_history and the triggers that fill it, as in the shipped spotify_artists.db
+HISTORY_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS artist_stats_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        artist_id TEXT NOT NULL,
+        snapshot_date TIMESTAMP NOT NULL,
+        popularity INTEGER,
+        follower_count INTEGER,
+        monthly_listeners INTEGER,
+        genres TEXT, top_tracks_total_plays BIGINT, upcoming_tours_count INTEGER, upcoming_tours_json TEXT,
+        FOREIGN KEY (artist_id) REFERENCES artists(id),
+        UNIQUE(artist_id, snapshot_date)
+    );
+    CREATE TRIGGER track_artist_inserts
+    AFTER INSERT ON artists
+    BEGIN
+        INSERT INTO artist_stats_history (
+            artist_id, snapshot_date, popularity, follower_count, monthly_listeners,
+            top_tracks_total_plays, upcoming_tours_count, upcoming_tours_json, genres
+        )
+        VALUES (
+            NEW.id, DATETIME('now'), NEW.popularity, CAST(JSON_EXTRACT(NEW.followers, '$.total') AS INTEGER),
+            NEW.monthly_listeners, NEW.top_tracks_total_plays, NEW.upcoming_tours_count,
+            NEW.upcoming_tours_json, NEW.genres
+        );
+    END;
+    CREATE TRIGGER track_artist_updates
+    AFTER UPDATE ON artists
+    WHEN NEW.popularity != OLD.popularity
+       OR JSON_EXTRACT(NEW.followers, '$.total') != JSON_EXTRACT(OLD.followers, '$.total')
+       OR NEW.monthly_listeners != OLD.monthly_listeners
+       OR NEW.top_tracks_total_plays != OLD.top_tracks_total_plays
+       OR NEW.upcoming_tours_count != OLD.upcoming_tours_count
+       OR NEW.upcoming_tours_json != OLD.upcoming_tours_json
+       OR NEW.genres != OLD.genres
+    BEGIN
+        INSERT INTO artist_stats_history (
+            artist_id, snapshot_date, popularity, follower_count, monthly_listeners,
+            top_tracks_total_plays, upcoming_tours_count, upcoming_tours_json, genres
+        )
+        VALUES (
+            NEW.id, DATETIME('now'), NEW.popularity, CAST(JSON_EXTRACT(NEW.followers, '$.total') AS INTEGER),
+            NEW.monthly_listeners, NEW.top_tracks_total_plays, NEW.upcoming_tours_count,
+            NEW.upcoming_tours_json, NEW.genres
+        );
+    END;
+'''
+
+
+@pytest.fixture
+def history_db_path(tmp_path):
+    """Path of a database holding the shipped artists schema: the artists table with its history triggers"""
+    path = str(tmp_path / "history.db")
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE artists (
+            id TEXT PRIMARY KEY, name TEXT NOT NULL, external_urls TEXT, followers TEXT, genres TEXT,
+            href TEXT, images TEXT, popularity INTEGER, uri TEXT, type TEXT, last_updated TIMESTAMP,
+            monthly_listeners INTEGER, social_links_json TEXT, upcoming_tours_count INTEGER,
+            upcoming_tours_json TEXT, enhanced_data_updated TIMESTAMP, data_sources TEXT,
+            top_tracks_total_plays BIGINT
+        );
+    ''' + HISTORY_SCHEMA)
+    conn.close()
+    return path
@@ -0,0 +1,73 @@
+import os
+from datetime import datetime
+
+import pytest
+from spotify_mcp import archive
+from spotify_mcp.archive import ResponseArchive
+
+
+def response(artist_id: str, listeners: int) -> dict:
+    """A Partner API-like response"""
+    return {
+        'data': {'artistUnion': {
+            'id': artist_id,
+            'stats': {'monthlyListeners': listeners, 'followers': 1000},
+            'profile': {'name': f'Artist {artist_id}', 'biography': {'text': 'x' * 2000}},
+        }},
+        'extensions': {}
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResponseArchive(str(tmp_path / "archive"))
+    yield store
+    store.close()
+
+
+def test_round_trip_and_dedup(store):
+    first = store.put('a1', 'response', response('a1', 100), fetched_at=datetime(2025, 3, 1))
+    # Same content with keys in another order is the same document
+    reordered = {'extensions': {}, 'data': response('a1', 100)['data']}
+    assert store.put('a1', 'response', reordered, fetched_at=datetime(2025, 3, 2)) == first
+    store.put('a1', 'response', response('a1', 150), fetched_at=datetime(2025, 3, 3))
+    store.put('a1', 'metrics', {'monthly_listeners': 150}, fetched_at=datetime(2025, 3, 3))
+
+    assert store.get(first) == response('a1', 100)
+    assert store.latest('a1')['data']['artistUnion']['stats']['monthlyListeners'] == 150
+    assert store.latest('a1', 'metrics') == {'monthly_listeners': 150}
+    assert store.latest('missing') is None
+    assert [e['fetched_at'][:10] for e in store.entries(artist_id='a1', kind='response')] == [
+        '2025-03-01', '2025-03-02', '2025-03-03'
+    ]
+    stats = store.stats()
+    assert (stats['entries'], stats['documents']) == (4, 3)
+    assert stats['stored_bytes'] < stats['raw_bytes'] / 5
+    with pytest.raises(KeyError):
+        store.get('0' * 64)
+
+
+def test_segments_rotate_and_survive_reopening(tmp_path):
+    directory = str(tmp_path / "archive")
+    store = ResponseArchive(directory, segment_size=300)
+    hashes = [store.put(f'a{i}', 'response', response(f'a{i}', i)) for i in range(5)]
+    assert store.stats()['segments'] > 1
+    store.close()
+
+    # Bytes left behind by a writer that died before indexing them are skipped
+    with open(os.path.join(directory, archive.SEGMENT_PATTERN.format(1)), 'ab') as f:
+        f.write(b'partial write')
+    store = ResponseArchive(directory, segment_size=300)
+    hashes.append(store.put('a5', 'response', response('a5', 5)))
+    assert [store.get(h)['data']['artistUnion']['stats']['monthlyListeners'] for h in hashes] == list(range(6))
+    assert [doc['data']['artistUnion']['id'] for _, doc in store.iter_documents()] == [f'a{i}' for i in range(6)]
+    store.close()
+
+
+def test_zlib_without_zstandard(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, 'zstandard', None)
+    store = ResponseArchive(str(tmp_path / "archive"))
+    digest = store.put('a1', 'response', response('a1', 100))
+    assert store.stats()['codec'] == 'zlib'
+    assert store.get(digest) == response('a1', 100)
+    store.close()
@@ -0,0 +1,419 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import Mock
+from spotify_mcp import schedule
+from spotify_mcp.artists import ArtistDatabase, ensure_refresh_schedule, select_due_artists
+from spotify_mcp.history import ensure_history_triggers
+from spotify_mcp.schedule import Tier
+from spotify_mcp.models import Artist
+
+
+def create_mock_artist(artist_id: str, name: str, popularity: int = 80) -> dict:
+    """Helper to create mock artist data"""
+    return {
+        'id': artist_id,
+        'name': name,
+        'external_urls': {'spotify': f'https://open.spotify.com/artist/{artist_id}'},
+        'followers': {'href': None, 'total': 1000},
+        'genres': ['house'],
+        'href': f'https://api.spotify.com/v1/artists/{artist_id}',
+        'images': [{'height': 640, 'url': 'http://example.com/image.jpg', 'width': 640}],
+        'popularity': popularity,
+        'uri': f'spotify:artist:{artist_id}',
+        'type': 'artist'
+    }
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Create an ArtistDatabase in a temporary directory"""
+    db = ArtistDatabase(str(tmp_path / "artists.db"), Mock())
+    yield db
+    db.close()
+
+
+def test_connection_reused_per_thread(db):
+    with db.get_connection() as first:
+        pass
+    with db.get_connection() as second:
+        assert second is first
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db.get_connection().__enter__()))
+    thread.start()
+    thread.join()
+    assert other[0] is not first
+
+
+def test_wal_mode_and_busy_timeout(db):
+    with db.get_connection() as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 10000
+
+
+def test_uncommitted_write_rolled_back_on_error(db):
+    with pytest.raises(RuntimeError):
+        with db.get_connection() as conn:
+            conn.execute("INSERT INTO artists (id, name) VALUES ('x', 'X')")
+            raise RuntimeError('boom')
+    assert db.get_artist('x') is None
+
+
+def test_reads_while_another_connection_writes(db):
+    assert db.save_artist(Artist.from_spotify_data(create_mock_artist('id1', 'Before')))
+    writer = sqlite3.connect(db.db_path)
+    writer.execute("UPDATE artists SET name = 'During' WHERE id = 'id1'")
+    try:
+        # The open write transaction does not block readers under WAL
+        assert db.get_artist('id1').name == 'Before'
+    finally:
+        writer.commit()
+        writer.close()
+    assert db.get_artist('id1').name == 'During'
+
+
+def test_close_reconnects_on_next_use(db):
+    db.close()
+    assert db.get_artist('missing') is None
+
+
+def save_partner_artist(db, artist_id: str):
+    """Save an artist carrying Partner API fields"""
+    artist = Artist.from_spotify_data(create_mock_artist(artist_id, 'Partner'))
+    artist.monthly_listeners = 12345
+    artist.upcoming_tours_count = 2
+    artist.data_sources['monthly_listeners'] = 'partner_api'
+    assert db.save_artist(artist)
+
+
+def test_standard_save_preserves_partner_columns(db):
+    save_partner_artist(db, 'id1')
+    with db.get_connection() as conn:
+        conn.execute('ALTER TABLE artists ADD COLUMN top_tracks_total_plays BIGINT')
+        conn.execute("UPDATE artists SET top_tracks_total_plays = 999 WHERE id = 'id1'")
+        conn.commit()
+
+    assert db.save_artist(Artist.from_spotify_data(create_mock_artist('id1', 'Renamed', popularity=50)))
+    saved = db.get_artist('id1')
+    assert (saved.name, saved.popularity) == ('Renamed', 50)
+    assert (saved.monthly_listeners, saved.upcoming_tours_count) == (12345, 2)
+    assert saved.data_sources['monthly_listeners'] == 'partner_api'
+    with db.get_connection() as conn:
+        assert conn.execute("SELECT top_tracks_total_plays FROM artists WHERE id = 'id1'").fetchone()[0] == 999
+
+
+def test_save_updates_in_place_without_insert_trigger(db):
+    with db.get_connection() as conn:
+        conn.execute('CREATE TABLE history (artist_id TEXT)')
+        conn.execute('CREATE TRIGGER on_insert AFTER INSERT ON artists BEGIN '
+                     'INSERT INTO history VALUES (NEW.id); END')
+        conn.commit()
+
+    for popularity in (80, 81, 82):
+        assert db.save_artist(Artist.from_spotify_data(create_mock_artist('id1', 'Artist', popularity)))
+    with db.get_connection() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM history').fetchone()[0] == 1
+    assert db.get_artist('id1').popularity == 82
+
+
+def test_batch_save_preserves_partner_columns(db):
+    save_partner_artist(db, 'id1')
+    result = db.save_artists_batch([Artist.from_spotify_data(create_mock_artist(aid, f'Batch {aid}'))
+                                    for aid in ('id1', 'id2')])
+    assert result['successful'] == ['id1', 'id2']
+    saved = db.get_artist('id1')
+    assert (saved.name, saved.monthly_listeners) == ('Batch id1', 12345)
+
+
+def test_batch_save_reports_failed_rows_and_keeps_the_rest(db):
+    artists = [Artist.from_spotify_data(create_mock_artist(f'id{i}', f'Artist {i}')) for i in range(3)]
+    artists[1].name = None  # violates NOT NULL
+    result = db.save_artists_batch(artists)
+    assert sorted(result['successful']) == ['id0', 'id2']
+    assert result['failed'] == ['id1']
+    assert 'NOT NULL' in result['errors']['id1']
+    assert db.get_artist('id0') is not None and db.get_artist('id2') is not None
+    assert db.get_artist('id1') is None
+
+
+def test_get_artists_batch_chunks_and_keeps_request_order(db):
+    db.MAX_QUERY_PARAMS = 3
+    ids = [f'id{i}' for i in range(10)]
+    assert db.save_artists_batch([Artist.from_spotify_data(create_mock_artist(aid, aid)) for aid in ids])['failed'] == []
+
+    requested = ['id7', 'missing', 'id2', 'id9', 'id7', 'id0']
+    result = db.get_artists_batch(requested)
+    assert [a.id for a in result['found']] == ['id7', 'id2', 'id9', 'id0']
+    assert result['missing'] == ['missing']
+
+
+def test_iter_artists_filters_in_batches(db):
+    artists = [Artist.from_spotify_data(create_mock_artist(f'id{i:02d}', f'Artist {i}', popularity=i))
+               for i in range(30)]
+    db.save_artists_batch(artists)
+
+    popular = [a.id for a in db.iter_artists('popularity >= ?', (20,), batch_size=4)]
+    assert popular == [f'id{i}' for i in range(20, 30)]
+    assert sum(1 for _ in db.iter_artists(batch_size=7)) == 30
+
+
+def store_refreshed(db, artist_id: str, popularity: int, standard_days_ago: int, partner_days_ago=None):
+    """Save an artist refreshed the given number of days ago"""
+    artist = Artist.from_spotify_data(create_mock_artist(artist_id, artist_id, popularity))
+    artist.last_updated = datetime.utcnow() - timedelta(days=standard_days_ago)
+    if partner_days_ago is not None:
+        artist.enhanced_data_updated = datetime.utcnow() - timedelta(days=partner_days_ago)
+    assert db.save_artist(artist)
+
+
+def test_due_columns_follow_tier_schedule(db):
+    store_refreshed(db, 'top_due', popularity=80, standard_days_ago=4, partner_days_ago=1)
+    store_refreshed(db, 'low_fresh', popularity=10, standard_days_ago=4, partner_days_ago=1)
+    store_refreshed(db, 'mid_partner', popularity=60, standard_days_ago=1, partner_days_ago=20)
+    store_refreshed(db, 'never_enhanced', popularity=60, standard_days_ago=1)
+
+    assert [a['id'] for a in db.get_artists_due(partner=False)] == ['top_due']
+    partner_due = db.get_artists_due(standard=False)
+    assert [a['id'] for a in partner_due] == ['never_enhanced', 'mid_partner']
+    assert partner_due[0]['tier'] == 'mid_tier'
+    assert [a['id'] for a in db.get_artists_due(min_popularity=50, max_popularity=75)] == ['never_enhanced', 'mid_partner']
+
+
+def test_due_at_recomputed_on_update_and_schedule_change(db):
+    store_refreshed(db, 'id1', popularity=80, standard_days_ago=4, partner_days_ago=1)
+    assert db.get_artists_due(partner=False)
+    store_refreshed(db, 'id1', popularity=80, standard_days_ago=0, partner_days_ago=1)
+    assert not db.get_artists_due(partner=False)
+
+    # A longer top-tier interval in config rebuilds the triggers and the stored values
+    store_refreshed(db, 'id1', popularity=80, standard_days_ago=4, partner_days_ago=1)
+    relaxed = (Tier('top_tier', 75, 5, 7),) + schedule.DEFAULT_TIERS[1:]
+    with db.get_connection() as conn:
+        assert ensure_refresh_schedule(conn, relaxed)
+        assert not ensure_refresh_schedule(conn, relaxed)
+        assert select_due_artists(conn, partner=False, tiers=relaxed) == []
+
+
+def test_due_artists_ordered_by_tier_and_query_is_read_only(db):
+    store_refreshed(db, 'low_overdue', popularity=10, standard_days_ago=60, partner_days_ago=1)
+    store_refreshed(db, 'mid_due', popularity=55, standard_days_ago=10, partner_days_ago=1)
+    store_refreshed(db, 'top_due', popularity=80, standard_days_ago=4, partner_days_ago=1)
+    store_refreshed(db, 'top_popular', popularity=90, standard_days_ago=3, partner_days_ago=1)
+
+    relaxed = (Tier('top_tier', 75, 5, 7),) + schedule.DEFAULT_TIERS[1:]
+    with db.get_connection() as conn:
+        changes = conn.total_changes
+        due = select_due_artists(conn, partner=False, tiers=relaxed)
+        assert conn.total_changes == changes
+    # The stored due dates still follow the default schedule: no triggers were rebuilt
+    assert [a['id'] for a in due] == ['top_popular', 'top_due', 'mid_due', 'low_overdue']
+
+def test_due_query_uses_index(db):
+    with db.get_connection() as conn:
+        plan = ' '.join(row[3] for row in conn.execute(
+            'EXPLAIN QUERY PLAN SELECT id FROM artists WHERE standard_due_at <= ? ORDER BY standard_due_at', ('x',)))
+    assert 'idx_standard_due_at' in plan
+
+
+def test_cache_serves_copies_and_counts_hits(db):
+    assert db.save_artist(Artist.from_spotify_data(create_mock_artist('id1', 'Cached')))
+    first = db.get_artist('id1')
+    first.genres.append('modified')
+    first.followers.total = 0
+
+    second = db.get_artist('id1')
+    assert (second.genres, second.followers.total) == (['house'], 1000)
+    assert db.get_artists_batch(['id1', 'id2'])['missing'] == ['id2']
+    stats = db.cache.stats()
+    assert (stats['hits'], stats['size']) == (2, 1)
+    assert stats['bytes'] > 0
+
+
+def test_saves_invalidate_cached_artists(db):
+    save_partner_artist(db, 'id1')
+    assert db.get_artist('id1').monthly_listeners == 12345
+    assert db.save_artist(Artist.from_spotify_data(create_mock_artist('id1', 'Renamed')))
+    assert db.get_artist('id1').name == 'Renamed'
+
+    db.save_artists_batch([Artist.from_spotify_data(create_mock_artist('id1', 'Batch'))])
+    saved = db.get_artist('id1')
+    assert (saved.name, saved.monthly_listeners) == ('Batch', 12345)
+
+
+def test_other_process_commit_clears_cache(db):
+    assert db.save_artist(Artist.from_spotify_data(create_mock_artist('id1', 'Before')))
+    assert db.get_artist('id1').name == 'Before'
+    assert db.get_artist('id1').name == 'Before'
+
+    writer = sqlite3.connect(db.db_path)
+    writer.execute("UPDATE artists SET name = 'External' WHERE id = 'id1'")
+    writer.commit()
+    writer.close()
+    assert db.get_artist('id1').name == 'External'
+    assert db.cache.stats()['invalidations'] >= 1
+
+
+def test_cache_disabled_with_zero_size(tmp_path):
+    db = ArtistDatabase(str(tmp_path / "artists.db"), Mock(), cache_size=0)
+    assert db.save_artist(Artist.from_spotify_data(create_mock_artist('id1', 'Uncached')))
+    assert db.get_artist('id1').name == 'Uncached'
+    assert len(db.cache) == 0
+    db.close()
+
+
+def test_saves_from_other_threads_keep_unrelated_entries_cached(db):
+    assert db.save_artist(Artist.from_spotify_data(create_mock_artist('id1', 'Cached')))
+    assert db.get_artist('id1') is not None
+
+    thread = threading.Thread(target=lambda: db.save_artist(Artist.from_spotify_data(create_mock_artist('id2', 'Other'))))
+    thread.start()
+    thread.join()
+    assert db.get_artist('id1').name == 'Cached'
+    assert db.cache.stats()['hits'] == 1
+
+
+def test_unchanged_artist_saved_without_reencoding(db, monkeypatch):
+    from spotify_mcp import models
+    row = Artist.from_spotify_data(create_mock_artist('id1', 'Stored')).to_db_dict()
+    row['genres'] = '["house","techno"]'  # stored text is kept as it was, not respelled
+    artist = Artist.from_db_dict(row)
+    assert not hasattr(artist, '__dict__')
+
+    dumps = Mock(side_effect=models.dumps)
+    monkeypatch.setattr(models, 'dumps', dumps)
+    saved = artist.to_db_dict()
+    assert dumps.call_count == 0
+    assert {k: saved[k] for k in ('genres', 'images', 'data_sources')} == {
+        k: row[k] for k in ('genres', 'images', 'data_sources')}
+
+    copied = artist.copy()
+    copied.followers.total = 5
+    copied.genres.append('trance')
+    copied.data_sources['update_status'] = {'ok': True}
+    saved = copied.to_db_dict()
+    assert dumps.call_count == 3
+    assert (saved['followers'], saved['genres']) == ('{"href": null, "total": 5}', '["house", "techno", "trance"]')
+    copied.data_sources['update_status']['ok'] = False  # nested values are not cached
+    assert '"ok": false' in copied.to_db_dict()['data_sources']
+    assert artist.to_db_dict()['genres'] == '["house","techno"]'
+
+
+def test_json_fields_decoded_on_first_read(monkeypatch):
+    from spotify_mcp import models
+    row = Artist.from_spotify_data(create_mock_artist('id1', 'Lazy')).to_db_dict()
+    row['data_sources'] = '{broken'
+    row['json_ok'] = 1  # as selected by ArtistDatabase
+    loads = Mock(side_effect=models.loads)
+    monkeypatch.setattr(models, 'loads', loads)
+
+    artist = Artist.from_db_dict(row)
+    copied = artist.copy()
+    assert (artist.id, artist.popularity) == ('id1', 80)
+    assert loads.call_count == 0
+    assert artist.genres == ['house'] and loads.call_count == 1
+    assert copied.followers.total == 1000
+    assert artist.data_sources == {}  # unreadable data sources read as empty
+    saved = artist.to_db_dict()
+    assert (saved['images'], saved['data_sources']) == (row['images'], '{}')
+
+
+def test_from_db_dict_rejects_invalid_json():
+    row = Artist.from_spotify_data(create_mock_artist('id1', 'Corrupt')).to_db_dict()
+    row['images'] = 'not json'
+    with pytest.raises(ValueError):
+        Artist.from_db_dict(row)
+    with pytest.raises(ValueError):
+        Artist.from_db_dict(dict(row, json_ok=0))
+
+
+def test_rows_with_invalid_json_skipped_when_loaded(db):
+    db.save_artists_batch([Artist.from_spotify_data(create_mock_artist(f'id{i}', f'Artist {i}')) for i in range(3)])
+    with db.get_connection() as conn:
+        conn.execute("UPDATE artists SET images = 'not json' WHERE id = 'id1'")
+        conn.commit()
+    db.cache.clear()
+
+    result = db.get_artists_batch(['id0', 'id1', 'id2'])
+    assert [a.id for a in result['found']] == ['id0', 'id2']
+    assert result['missing'] == ['id1'] and 'id1' in result['errors']
+    assert result['found'][0].images[0].height == 640
+    assert db.get_artist('id1') is None
+    assert [a.id for a in db.iter_artists(batch_size=1)] == ['id0', 'id2']
+
+def test_summaries_read_no_json(db):
+    artists = [Artist.from_spotify_data(create_mock_artist(f'id{i}', f'Artist {i}', popularity=60 + i))
+               for i in range(3)]
+    artists[0].monthly_listeners = 5000
+    db.save_artists_batch(artists)
+    with db.get_connection() as conn:
+        conn.execute("UPDATE artists SET genres = 'not json'")
+
+    summary = db.get_artist_summary('id0')
+    assert (summary.name, summary.popularity, summary.monthly_listeners) == ('Artist 0', 60, 5000)
+    assert summary.last_updated == artists[0].last_updated
+    assert not schedule.needs_standard_update(summary)
+    assert db.get_artist_summary('missing') is None
+    assert [s.id for s in db.iter_artist_summaries('popularity >= ?', (61,), batch_size=1)] == ['id1', 'id2']
+
+
+def test_partner_staleness_uses_utc(monkeypatch):
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2025, 1, 10, 12)  # local clock, ahead of UTC
+
+        @classmethod
+        def utcnow(cls):
+            return datetime(2025, 1, 10, 2)
+
+    monkeypatch.setattr(schedule, 'datetime', Clock)
+    artist = Artist.from_spotify_data(create_mock_artist('id1', 'Top', popularity=80))
+    days = schedule.tier_for(80).partner_api_days
+    # Written as SQLite CURRENT_TIMESTAMP (UTC) just under `days` days ago
+    artist.enhanced_data_updated = datetime(2025, 1, 10, 4) - timedelta(days=days)
+    assert not schedule.needs_partner_update(artist)
+
+
+def test_importing_artists_does_not_load_numpy():
+    import subprocess
+    import sys
+    code = "import sys, spotify_mcp.artists; assert 'numpy' not in sys.modules"
+    assert subprocess.run([sys.executable, '-c', code]).returncode == 0
+
+
+def test_saves_within_one_second_with_history_triggers(history_db_path):
+    db = ArtistDatabase(history_db_path, Mock())
+    try:
+        with db.get_connection() as conn:
+            assert not ensure_history_triggers(conn)  # rewritten once, at init
+        artist = Artist.from_spotify_data(create_mock_artist('id1', 'Artist 1', popularity=60))
+        assert db.save_artist(artist)
+        # A standard save followed by a Partner save, both changing tracked stats
+        artist.popularity = 61
+        assert db.save_artist(artist)
+        artist.popularity, artist.monthly_listeners = 62, 5000
+        assert db.save_artist(artist)
+        assert db.get_artist('id1').monthly_listeners == 5000
+        with db.get_connection() as conn:
+            latest = conn.execute('SELECT popularity, monthly_listeners FROM artist_stats_history '
+                                  "WHERE artist_id = 'id1' ORDER BY snapshot_date DESC").fetchone()
+        assert tuple(latest) == (62, 5000)
+    finally:
+        db.close()
+
+
+def test_batch_resave_within_one_second_with_history_triggers(history_db_path):
+    db = ArtistDatabase(history_db_path, Mock())
+    try:
+        assert db.save_artist(Artist.from_spotify_data(create_mock_artist('id1', 'Artist 1', popularity=60)))
+        results = db.save_artists_batch([
+            Artist.from_spotify_data(create_mock_artist('id1', 'Artist 1', popularity=61)),
+            Artist.from_spotify_data(create_mock_artist('id2', 'Artist 2', popularity=70)),
+        ])
+        assert (results['successful'], results['failed']) == (['id1', 'id2'], [])
+        assert db.get_artist('id1').popularity == 61
+    finally:
+        db.close()
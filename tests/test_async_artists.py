@@ -0,0 +1,124 @@
+import asyncio
+import threading
+
+import pytest
+from unittest.mock import Mock
+from spotify_mcp.artists import ArtistDatabase
+from spotify_mcp.async_artists import AsyncArtistDatabase
+from spotify_mcp.models import Artist
+
+
+def create_mock_artist(artist_id: str, name: str, popularity: int = 80) -> Artist:
+    """Helper to create an Artist"""
+    return Artist.from_spotify_data({
+        'id': artist_id,
+        'name': name,
+        'external_urls': {'spotify': f'https://open.spotify.com/artist/{artist_id}'},
+        'followers': {'href': None, 'total': 1000},
+        'genres': ['house'],
+        'href': f'https://api.spotify.com/v1/artists/{artist_id}',
+        'images': [],
+        'popularity': popularity,
+        'uri': f'spotify:artist:{artist_id}',
+        'type': 'artist'
+    })
+
+
+@pytest.fixture
+def adb(tmp_path):
+    """Create an AsyncArtistDatabase whose writer can be held up by the test"""
+    db = ArtistDatabase(str(tmp_path / "artists.db"), Mock())
+    release = threading.Event()
+    save = db.save_artists_batch
+
+    def held_save(artists):
+        release.wait(5)
+        return save(artists)
+    db.save_artists_batch = Mock(side_effect=held_save)
+    db.release = release
+    adb = AsyncArtistDatabase(db)
+    yield adb
+    release.set()
+    adb.close()
+    db.close()
+
+
+async def wait_for_first_group(adb):
+    """Let the writer pick up the first queued save and block on it"""
+    while not adb.db.save_artists_batch.called:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_saves_share_one_commit(adb):
+    first = asyncio.ensure_future(adb.save_artist(create_mock_artist('id0', 'First')))
+    await wait_for_first_group(adb)
+    rest = [asyncio.ensure_future(adb.save_artists([create_mock_artist(f'id{i}', f'Artist {i}')]))
+            for i in range(1, 11)]
+    await asyncio.sleep(0.05)
+    adb.db.release.set()
+
+    assert await first is True
+    results = await asyncio.gather(*rest)
+    assert [r['successful'] for r in results] == [[f'id{i}'] for i in range(1, 11)]
+    assert [len(call.args[0]) for call in adb.db.save_artists_batch.call_args_list] == [1, 10]
+    assert (await adb.get_artist('id10')).name == 'Artist 10'
+
+
+@pytest.mark.asyncio
+async def test_saves_of_one_artist_applied_in_order(adb):
+    first = asyncio.ensure_future(adb.save_artist(create_mock_artist('other', 'Other')))
+    await wait_for_first_group(adb)
+    saves = [asyncio.ensure_future(adb.save_artist(create_mock_artist('id1', f'Version {v}', popularity=v)))
+             for v in range(3)]
+    await asyncio.sleep(0.05)
+    adb.db.release.set()
+
+    assert await asyncio.gather(first, *saves) == [True] * 4
+    assert adb.db.save_artists_batch.call_count == 4
+    assert (await adb.get_artist('id1')).name == 'Version 2'
+
+
+@pytest.mark.asyncio
+async def test_failed_rows_reported_to_their_caller(adb):
+    adb.db.release.set()
+    bad = create_mock_artist('bad', 'Bad')
+    bad.name = None  # violates NOT NULL
+    good, failed = await asyncio.gather(
+        adb.save_artists([create_mock_artist('good', 'Good')]),
+        adb.save_artists([bad])
+    )
+    assert (good['successful'], good['failed']) == (['good'], [])
+    assert (failed['successful'], failed['failed']) == ([], ['bad'])
+    assert 'NOT NULL' in failed['errors']['bad']
+    assert (await adb.get_artists_batch(['good', 'bad']))['missing'] == ['bad']
+
+
+@pytest.mark.asyncio
+async def test_failure_in_group_commit_stays_with_its_caller(history_db_path):
+    db = ArtistDatabase(history_db_path, Mock())
+    release = threading.Event()
+    save = db.save_artists_batch
+    db.save_artists_batch = Mock(side_effect=lambda artists: release.wait(5) and save(artists))
+    adb = AsyncArtistDatabase(db)
+    try:
+        first = asyncio.ensure_future(adb.save_artist(create_mock_artist('id0', 'First', popularity=60)))
+        await wait_for_first_group(adb)
+        bad = create_mock_artist('bad', 'Bad')
+        bad.name = None  # violates NOT NULL
+        # Re-saving id0 within the second writes a colliding history snapshot
+        group = [asyncio.ensure_future(adb.save_artists([artist])) for artist in (
+            create_mock_artist('id0', 'First', popularity=61), create_mock_artist('id1', 'Second'), bad)]
+        await asyncio.sleep(0.05)
+        release.set()
+
+        assert await first is True
+        resaved, new, failed = await asyncio.gather(*group)
+        assert [len(call.args[0]) for call in db.save_artists_batch.call_args_list] == [1, 3]
+        assert (resaved['successful'], new['successful']) == (['id0'], ['id1'])
+        assert (failed['failed'], 'transaction' in failed['errors']) == (['bad'], False)
+        assert (await adb.get_artist('id0')).popularity == 61
+    finally:
+        release.set()
+        adb.close()
+        db.close()
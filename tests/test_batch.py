@@ -36,6 +36,9 @@ def mock_db():
     """Create mock database"""
     mock = Mock()
     mock.save_artist.return_value = True
+    mock.save_artists_batch.side_effect = lambda artists: {
+        'successful': [a.id for a in artists], 'failed': [], 'errors': {}
+    }
     return mock
 
 @pytest.fixture
@@ -80,7 +83,10 @@ async def test_large_batch_handling(mock_spotify, mock_db, mock_logger):
 
 @pytest.mark.asyncio
 async def test_database_failure(mock_spotify, mock_db, mock_logger):
-    mock_db.save_artist.return_value = False  # Simulate database save failure
+    # Simulate database save failure
+    mock_db.save_artists_batch.side_effect = lambda artists: {
+        'successful': [], 'failed': [a.id for a in artists], 'errors': {}
+    }
     processor = ArtistBatchProcessor(mock_spotify, mock_logger, mock_db)
     result = await processor.process_artist_batch(['id1'])
     
@@ -88,4 +94,12 @@ async def test_database_failure(mock_spotify, mock_db, mock_logger):
     assert result['success_count'] == 0
     assert result['failure_count'] == 1
     assert 'id1' in result['failed']
-    assert 'Database save failed' in result['errors']['id1']
\ No newline at end of file
+    assert 'Database save failed' in result['errors']['id1']
+
+@pytest.mark.asyncio
+async def test_chunk_saved_in_one_call(mock_spotify, mock_db, mock_logger):
+    processor = ArtistBatchProcessor(mock_spotify, mock_logger, mock_db)
+    await processor.process_artist_batch(['id1', 'id2', 'id3'])
+    mock_db.save_artists_batch.assert_called_once()
+    assert [a.id for a in mock_db.save_artists_batch.call_args.args[0]] == ['id1', 'id2']
+    mock_db.save_artist.assert_not_called()
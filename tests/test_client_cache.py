@@ -0,0 +1,278 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import Mock
+from spotify_mcp.cache import LRUCache, TTLCache
+from spotify_mcp.spotify_api import Client
+from spotify_mcp.models import Artist
+
+
+def create_mock_artist(artist_id: str, name: str, popularity: int = 80) -> dict:
+    """Helper to create mock artist data"""
+    return {
+        'id': artist_id,
+        'name': name,
+        'external_urls': {'spotify': f'https://open.spotify.com/artist/{artist_id}'},
+        'followers': {'href': None, 'total': 1000},
+        'genres': ['house'],
+        'href': f'https://api.spotify.com/v1/artists/{artist_id}',
+        'images': [{'height': 640, 'url': 'http://example.com/image.jpg', 'width': 640}],
+        'popularity': popularity,
+        'uri': f'spotify:artist:{artist_id}',
+        'type': 'artist'
+    }
+
+
+def store_artist(client, artist_id: str, popularity: int, age: timedelta):
+    """Save an artist row that was refreshed `age` ago"""
+    artist = Artist.from_spotify_data(create_mock_artist(artist_id, f'Cached {artist_id}', popularity))
+    artist.last_updated = datetime.utcnow() - age
+    assert client.db.save_artist(artist)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Create a Client backed by a temporary database and a mock Spotify"""
+    monkeypatch.setenv("SPOTIFY_CLIENT_ID", "test")
+    monkeypatch.setenv("SPOTIFY_CLIENT_SECRET", "test")
+    monkeypatch.setenv("SPOTIFY_REDIRECT_URI", "http://localhost:8888")
+    client = Client(Mock(), db_path=str(tmp_path / "artists.db"))
+    client.sp = Mock()
+    client.sp.artist.side_effect = lambda aid: create_mock_artist(aid, f'Fetched {aid}')
+    client.sp.artists.side_effect = lambda ids: {'artists': [create_mock_artist(aid, f'Fetched {aid}') for aid in ids]}
+    yield client
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_miss_fetches_and_saves(client):
+    result = await client.get_info('id1', qtype='artist')
+    assert result['source'] == 'network'
+    assert client.sp.artist.call_count == 1
+    assert client.db.get_artist('id1') is not None
+
+
+@pytest.mark.asyncio
+async def test_fresh_row_served_from_cache(client):
+    store_artist(client, 'id1', popularity=80, age=timedelta(days=1))
+    result = await client.get_info('id1', qtype='artist')
+    assert result['source'] == 'cache'
+    assert result['name'] == 'Cached id1'
+    client.sp.artist.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_stale_row_uses_tier_schedule(client):
+    # Top tier refreshes every 3 days, low tier every 14
+    store_artist(client, 'top', popularity=80, age=timedelta(days=4))
+    store_artist(client, 'low', popularity=10, age=timedelta(days=4))
+    assert (await client.get_info('top', qtype='artist', allow_stale=False))['source'] == 'network'
+    assert (await client.get_info('low', qtype='artist', allow_stale=False))['source'] == 'cache'
+
+
+@pytest.mark.asyncio
+async def test_max_age_and_force_refresh_override(client):
+    store_artist(client, 'id1', popularity=80, age=timedelta(hours=2))
+    assert (await client.get_info('id1', qtype='artist', max_age=3600))['source'] == 'network'
+    assert (await client.get_info('id1', qtype='artist', force_refresh=True))['source'] == 'network'
+    assert (await client.get_info('id1', qtype='artist'))['source'] == 'cache'
+
+
+@pytest.mark.asyncio
+async def test_batch_fetches_only_missing_in_request_order(client):
+    store_artist(client, 'id2', popularity=80, age=timedelta(hours=1))
+    result = await client.get_info('id1,id2,id3', qtype='artist')
+    client.sp.artists.assert_called_once_with(['id1', 'id3'])
+    assert [a['id'] for a in result['artists']] == ['id1', 'id2', 'id3']
+    assert result['sources'] == {'id1': 'network', 'id2': 'cache', 'id3': 'network'}
+
+
+@pytest.mark.asyncio
+async def test_stale_row_returned_and_refreshed_in_background(client):
+    store_artist(client, 'id1', popularity=80, age=timedelta(days=4))
+    result = await client.get_info('id1', qtype='artist')
+    assert result['source'] == 'stale_cache'
+    assert result['name'] == 'Cached id1'
+    client.sp.artist.assert_not_called()
+
+    await client.refresher.drain()
+    client.sp.artists.assert_called_once_with(['id1'])
+    assert (await client.get_info('id1', qtype='artist'))['source'] == 'cache'
+
+
+@pytest.mark.asyncio
+async def test_burst_of_stale_lookups_is_batched_and_deduplicated(client):
+    ids = [f'id{i}' for i in range(60)]
+    for artist_id in ids:
+        store_artist(client, artist_id, popularity=80, age=timedelta(days=4))
+    # Keep the workers waiting until the whole burst has been scheduled
+    client.refresher.delay = 0.5
+
+    for artist_id in ids + ids[:10]:
+        assert (await client.get_info(artist_id, qtype='artist'))['source'] == 'stale_cache'
+
+    await client.refresher.drain()
+    requested = [aid for call in client.sp.artists.call_args_list for aid in call.args[0]]
+    assert client.sp.artists.call_count == 2
+    assert sorted(requested) == sorted(ids)
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_cache_expires_entries():
+    now = [0.0]
+    cache = TTLCache(maxsize=10, ttl=5, clock=lambda: now[0])
+    cache.set('a', 1)
+    now[0] = 4.9
+    assert cache.get('a') == 1
+    now[0] = 5.0
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expirations']) == (1, 1, 1)
+
+
+def test_lru_cache_tracks_bytes_and_drops_sets_from_before_an_invalidation():
+    cache = LRUCache(maxsize=2, copy=list)
+    cache.set('a', [1])
+    cache.set('b', [2])
+    cache.set('c', [3])
+    assert cache.get('a') is None
+    assert cache.stats()['evictions'] == 1
+
+    generation = cache.generation
+    cache.pop('b')
+    cache.set('b', ['stale'], generation)
+    assert cache.get('b') is None
+    cache.clear()
+    assert cache.stats()['bytes'] == 0
+
+def test_search_cache_normalizes_keys(client):
+    client.sp.search.return_value = {'tracks': {'items': []}, 'albums': {'items': []}}
+    client.search('Daft  Punk', qtype='track,album', limit=5)
+    client.search('daft punk', qtype='album, track', limit=5)
+    client.search('daft punk', qtype='album,track', limit=10)
+    assert client.sp.search.call_count == 2
+    assert client.search_cache.stats()['hits'] == 1
+
+
+def test_search_cache_hit_returns_a_copy(client):
+    client.sp.search.return_value = {'tracks': {'items': [{'id': 't1'}]}}
+    first = client.search('daft punk', qtype=None)
+    first['tracks']['items'].clear()
+    second = client.search('daft punk')
+    assert second == {'tracks': {'items': [{'id': 't1'}]}}
+    client.sp.search.assert_called_once_with(q='daft punk', type='track', limit=10)
+
+
+def test_search_artists_written_to_database(client):
+    client.cache_search_artists = True
+    client.sp.search.return_value = {'artists': {'items': [create_mock_artist('id1', 'Searched'), None]}}
+    client.search('searched', qtype='artist')
+    assert client.db.get_artist('id1').name == 'Searched'
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_fetch(client):
+    def slow_artist(aid):
+        time.sleep(0.1)
+        return create_mock_artist(aid, f'Fetched {aid}')
+    client.sp.artist.side_effect = slow_artist
+
+    results = await asyncio.gather(*(client.get_info('id1', qtype='artist') for _ in range(5)))
+    assert client.sp.artist.call_count == 1
+    assert all(r['name'] == 'Fetched id1' for r in results)
+
+
+@pytest.mark.asyncio
+async def test_overlapping_batches_fetch_each_id_once(client):
+    def slow_artists(ids):
+        time.sleep(0.1)
+        return {'artists': [create_mock_artist(aid, f'Fetched {aid}') for aid in ids]}
+    client.sp.artists.side_effect = slow_artists
+
+    first, second = await asyncio.gather(
+        client.get_artists_batch(['id1', 'id2', 'id2']),
+        client.get_artists_batch(['id2', 'id3'])
+    )
+    requested = [aid for call in client.sp.artists.call_args_list for aid in call.args[0]]
+    assert sorted(requested) == ['id1', 'id2', 'id3']
+    assert [a['id'] for a in first['artists']] == ['id1', 'id2', 'id2']
+    assert [a['id'] for a in second['artists']] == ['id2', 'id3']
+
+
+@pytest.mark.asyncio
+async def test_large_batch_split_into_chunks(client):
+    ids = [f'id{i}' for i in range(120)]
+    client.db.save_artists_batch = Mock(wraps=client.db.save_artists_batch)
+
+    result = await client.get_artists_batch(ids)
+    assert [len(call.args[0]) for call in client.sp.artists.call_args_list] == [50, 50, 20]
+    # Chunks that finish together share a group commit
+    assert sorted(a.id for call in client.db.save_artists_batch.call_args_list for a in call.args[0]) == sorted(ids)
+    assert [a['id'] for a in result['artists']] == ids
+    assert [len(c['successful_saves']) for c in result['save_status']['chunks']] == [50, 50, 20]
+
+
+@pytest.mark.asyncio
+async def test_batch_save_preserves_partner_fields(client):
+    artist = Artist.from_spotify_data(create_mock_artist('id1', 'Partner'))
+    artist.monthly_listeners = 12345
+    artist.data_sources['monthly_listeners'] = 'partner_api'
+    artist.last_updated = datetime.utcnow() - timedelta(days=30)
+    assert client.db.save_artist(artist)
+
+    await client.get_artists_batch(['id1'], force_refresh=True)
+    saved = client.db.get_artist('id1')
+    assert saved.name == 'Fetched id1'
+    assert saved.monthly_listeners == 12345
+
+
+def create_mock_page(total: int, offset: int, limit: int, wrap: bool = False) -> dict:
+    """Helper to create one page of album or playlist tracks"""
+    items = [{'id': f't{i}', 'name': f'Track {i}', 'type': 'track', 'artists': [{'name': 'Artist'}]}
+             for i in range(offset, min(total, offset + limit))]
+    if wrap:
+        items = [{'added_at': None, 'track': t} for t in items]
+    return {'items': items, 'total': total, 'offset': offset, 'limit': limit}
+
+
+@pytest.mark.asyncio
+async def test_album_pages_fetched_concurrently_with_cursor(client):
+    client.sp.album.return_value = {'id': 'alb', 'name': 'Album', 'tracks': create_mock_page(260, 0, 50)}
+    client.sp.album_tracks.side_effect = lambda aid, limit, offset: create_mock_page(260, offset, limit)
+
+    first = await client.get_info('alb', qtype='album', limit=200)
+    assert [t['id'] for t in first['tracks']] == [f't{i}' for i in range(200)]
+    assert sorted(c.kwargs['offset'] for c in client.sp.album_tracks.call_args_list) == [50, 100, 150]
+    assert (first['total'], first['next_cursor']) == (260, '200')
+
+    second = await client.get_info('alb', qtype='album', cursor=first['next_cursor'], limit=200)
+    assert [t['id'] for t in second['tracks']] == [f't{i}' for i in range(200, 260)]
+    assert second['next_cursor'] is None
+
+
+@pytest.mark.asyncio
+async def test_iter_tracks_unwraps_playlist_items(client):
+    client.sp.playlist_items.side_effect = lambda pid, limit, offset: create_mock_page(150, offset, limit, wrap=True)
+    tracks = [t['id'] async for t in client.iter_tracks('pl', 'playlist')]
+    assert tracks == [f't{i}' for i in range(150)]
+    assert client.sp.playlist_items.call_count == 2
+
+
+def test_client_opens_database_on_first_use(tmp_path):
+    db_path = tmp_path / "lazy.db"
+    client = Client(Mock(), db_path=str(db_path))
+    assert not db_path.exists()
+    assert client.db.get_artist('missing') is None
+    assert db_path.exists()
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from unittest.mock import Mock
+from spotify_mcp.dispatch import ToolDispatcher
+from spotify_mcp.spotify_api import Client
+
+
+@pytest.fixture
+def mock_logger():
+    """Create mock logger"""
+    return Mock()
+
+
+@pytest.fixture
+def dispatcher(mock_logger):
+    dispatcher = ToolDispatcher(mock_logger, max_workers=4, tool_limits={"Search": 4, "Playback": 1}, timeout=5)
+    yield dispatcher
+    dispatcher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_calls_run_off_event_loop(dispatcher):
+    loop_thread = threading.get_ident()
+    worker_thread = await dispatcher.run("Search", threading.get_ident)
+    assert worker_thread != loop_thread
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_overlap(dispatcher):
+    start = time.perf_counter()
+    await asyncio.gather(*(dispatcher.run("Search", time.sleep, 0.2) for _ in range(4)))
+    assert time.perf_counter() - start < 0.6
+
+
+@pytest.mark.asyncio
+async def test_per_tool_limit_serializes_calls(dispatcher):
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def playback_command():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+
+    await asyncio.gather(*(dispatcher.run("Playback", playback_command) for _ in range(3)))
+    assert peak == 1
+
+
+@pytest.mark.asyncio
+async def test_timeout_cancels_call(mock_logger):
+    dispatcher = ToolDispatcher(mock_logger, max_workers=2, timeout=0.1)
+    try:
+        with pytest.raises(TimeoutError):
+            await dispatcher.run("Search", time.sleep, 0.5)
+        # The slot is released once the timed-out call finishes
+        assert await dispatcher.run("Search", lambda: "ok") == "ok"
+    finally:
+        dispatcher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_timed_out_call_keeps_slot_until_it_finishes(mock_logger):
+    dispatcher = ToolDispatcher(mock_logger, max_workers=2, tool_limits={"Playback": 1}, timeout=0.1)
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def playback_command(duration):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(duration)
+        with lock:
+            active -= 1
+
+    try:
+        with pytest.raises(TimeoutError):
+            await dispatcher.run("Playback", playback_command, 0.4)
+        await dispatcher.run("Playback", playback_command, 0)
+        assert peak == 1
+    finally:
+        dispatcher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_client_calls_keep_slot_until_they_finish(mock_logger, tmp_path):
+    dispatcher = ToolDispatcher(mock_logger, max_workers=2, tool_limits={"GetInfo": 1}, timeout=0.1)
+    client = Client(mock_logger, db_path=str(tmp_path / "artists.db"), executor=dispatcher.executor)
+    finished = []
+
+    def lookup(duration):
+        time.sleep(duration)
+        finished.append(duration)
+
+    try:
+        with pytest.raises(TimeoutError):
+            async with dispatcher.limit("GetInfo"):
+                await client._call(lookup, 0.4)
+        async with dispatcher.limit("GetInfo"):
+            assert finished == [0.4]
+    finally:
+        dispatcher.shutdown()
@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+import pytest
+from unittest.mock import Mock
+from spotify_mcp.artists import ArtistDatabase
+from spotify_mcp.history import compact_history
+from spotify_mcp.models import Artist
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds  # noqa: E402
+from spotify_mcp.export import export_tables, load_watermarks  # noqa: E402
+
+
+def create_mock_artist(artist_id: str, popularity: int, updated: datetime) -> Artist:
+    """Helper to create an Artist with enhanced data in both stored tour formats"""
+    artist = Artist.from_spotify_data({
+        'id': artist_id,
+        'name': f'Artist {artist_id}',
+        'external_urls': {'spotify': f'https://open.spotify.com/artist/{artist_id}'},
+        'followers': {'href': None, 'total': 1000},
+        'genres': ['house', 'tech house'],
+        'href': f'https://api.spotify.com/v1/artists/{artist_id}',
+        'images': [{'url': 'https://i.scdn.co/image/x', 'height': 640, 'width': 640}],
+        'popularity': popularity,
+        'uri': f'spotify:artist:{artist_id}',
+        'type': 'artist'
+    })
+    artist.last_updated = updated
+    artist.monthly_listeners = 5000
+    artist.social_links_json = json.dumps({
+        'instagram': 'https://instagram.com/x',
+        'twitter': {'handle': 'x', 'url': 'https://twitter.com/x'}
+    })
+    artist.upcoming_tours_count = 1
+    artist.upcoming_tours_json = json.dumps({'total_count': 1, 'dates': [{
+        'title': 'Show', 'date': '2025-04-04T17:00-07:00',
+        'location': {'name': 'Cow Palace', 'city': 'Daly City'}, 'festival': False
+    }]})
+    return artist
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Create a database with artists, history and top cities"""
+    path = str(tmp_path / "artists.db")
+    db = ArtistDatabase(path, Mock())
+    db.save_artists_batch([create_mock_artist('a1', 70, datetime(2025, 3, 1)),
+                           create_mock_artist('a2', 80, datetime(2025, 3, 2))])
+    db.close()
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE artist_stats_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, artist_id TEXT NOT NULL, snapshot_date TIMESTAMP NOT NULL,
+            popularity INTEGER, follower_count INTEGER, monthly_listeners INTEGER,
+            genres TEXT, top_tracks_total_plays BIGINT, upcoming_tours_count INTEGER, upcoming_tours_json TEXT
+        );
+        CREATE TABLE artist_top_cities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, artist_id TEXT NOT NULL, city TEXT NOT NULL,
+            country TEXT NOT NULL, region TEXT, listeners INTEGER NOT NULL, snapshot_date TIMESTAMP NOT NULL
+        );
+        INSERT INTO artist_stats_history (artist_id, snapshot_date, popularity, genres, upcoming_tours_json)
+        VALUES ('a1', '2025-03-01 10:00:00', 70, '["house"]', '[{"title": "Show", "date": "2025-04-04T22:00Z"}]');
+        INSERT INTO artist_top_cities (artist_id, city, country, listeners, snapshot_date)
+        VALUES ('a1', 'Berlin', 'DE', 1200, '2025-03-01 10:00:00');
+    ''')
+    conn.close()
+    return path
+
+
+def export(db_path, out_dir, **kwargs):
+    conn = sqlite3.connect(db_path)
+    try:
+        return export_tables(conn, str(out_dir), **kwargs)
+    finally:
+        conn.close()
+
+
+def test_json_columns_flattened_to_typed_columns(db_path, tmp_path):
+    report = export(db_path, tmp_path / "out")
+    assert {table: r['rows'] for table, r in report.items()} == {
+        'artists': 2, 'artist_stats_history': 1, 'artist_top_cities': 1
+    }
+
+    artists = ds.dataset(str(tmp_path / "out" / "artists")).to_table()
+    assert artists.schema.field('genres').type == pa.list_(pa.string())
+    assert artists.schema.field('last_updated').type == pa.timestamp('us')
+    a1 = artists.to_pylist()[0]
+    assert (a1['followers_total'], a1['spotify_url']) == (1000, 'https://open.spotify.com/artist/a1')
+    assert a1['images'] == [{'url': 'https://i.scdn.co/image/x', 'height': 640, 'width': 640}]
+    assert dict(a1['social_links']) == {'instagram': 'https://instagram.com/x', 'twitter': 'https://twitter.com/x'}
+    tour = a1['upcoming_tours'][0]
+    assert (tour['venue'], tour['city'], tour['festival']) == ('Cow Palace', 'Daly City', False)
+    assert tour['date'].replace(tzinfo=None) == datetime(2025, 4, 5, 0, 0)
+
+
+def test_incremental_export_writes_only_the_delta(db_path, tmp_path):
+    out = tmp_path / "out"
+    export(db_path, out)
+    assert export(db_path, out)['artists'] == {'rows': 0, 'file': None,
+                                              'watermark': ['2025-03-02 00:00:00', ['a2']]}
+
+    db = ArtistDatabase(db_path, Mock())
+    db.save_artist(create_mock_artist('a1', 75, datetime(2025, 3, 5)))
+    db.close()
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO artist_stats_history (artist_id, snapshot_date, popularity, genres) "
+                 "VALUES ('a1', '2025-03-05 10:00:00', 75, '[\"house\"]')")
+    conn.commit()
+    compact_history(conn, now=datetime(2025, 3, 6))  # JSON moved out of the history rows
+    conn.close()
+
+    report = export(db_path, out)
+    assert (report['artists']['rows'], report['artist_stats_history']['rows'],
+            report['artist_top_cities']['rows']) == (1, 1, 0)
+    delta = ds.dataset(report['artist_stats_history']['file']).to_table().to_pylist()
+    assert delta[0]['genres'] == ['house']
+    assert load_watermarks(str(out))['artist_stats_history'] == 2
+    assert ds.dataset(str(out / "artists")).count_rows() == 3
+
+    assert export(db_path, tmp_path / "full", full=True, fmt='arrow')['artists']['rows'] == 2
+    assert os.listdir(tmp_path / "full" / "artists")[0].endswith('.arrow')
+
+
+def test_partner_only_update_exported(db_path, tmp_path):
+    out = tmp_path / "out"
+    export(db_path, out)
+
+    # A Partner API refresh on the watermark's day, written space separated,
+    # leaves last_updated ('T' separated) untouched
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE artists SET monthly_listeners = 9000, enhanced_data_updated = '2025-03-02 08:00:00' "
+                 "WHERE id = 'a1'")
+    conn.commit()
+    conn.close()
+
+    report = export(db_path, out)
+    assert report['artists']['rows'] == 1
+    assert report['artists']['watermark'] == ['2025-03-02 08:00:00', ['a1']]
+    assert ds.dataset(report['artists']['file']).to_table().to_pylist()[0]['monthly_listeners'] == 9000
+    assert export(db_path, out)['artists']['rows'] == 0
+
+
+def test_artist_refreshed_in_the_watermark_second_exported(db_path, tmp_path):
+    out = tmp_path / "out"
+    export(db_path, out)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE artists SET last_updated = '2025-03-02 00:00:00' WHERE id = 'a1'")
+    conn.commit()
+    conn.close()
+
+    report = export(db_path, out)
+    assert report['artists']['rows'] == 1
+    assert report['artists']['watermark'] == ['2025-03-02 00:00:00', ['a2', 'a1']]
+    assert export(db_path, out)['artists']['rows'] == 0
+
+
+def test_export_inside_callers_transaction(db_path, tmp_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("INSERT INTO artist_top_cities (artist_id, city, country, listeners, snapshot_date) "
+                     "VALUES ('a2', 'Paris', 'FR', 900, '2025-03-02 10:00:00')")
+        assert conn.in_transaction
+        report = export_tables(conn, str(tmp_path / "out"))
+        assert report['artist_top_cities']['rows'] == 2
+        assert conn.in_transaction
+        conn.commit()
+    finally:
+        conn.close()
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM artist_top_cities").fetchone()[0] == 2
+    conn.close()
+
+
+def test_unknown_format_rejected(db_path, tmp_path):
+    with pytest.raises(ValueError):
+        export(db_path, tmp_path / "out", fmt='csv')
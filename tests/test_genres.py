@@ -0,0 +1,100 @@
+import json
+
+import pytest
+from unittest.mock import Mock
+from spotify_mcp.artists import ArtistDatabase, ensure_genre_index
+from spotify_mcp.models import Artist
+
+
+def create_mock_artist(artist_id: str, genres: list, popularity: int = 80) -> Artist:
+    """Helper to create an Artist with the given genres"""
+    return Artist.from_spotify_data({
+        'id': artist_id,
+        'name': f'Artist {artist_id}',
+        'external_urls': {'spotify': f'https://open.spotify.com/artist/{artist_id}'},
+        'followers': {'href': None, 'total': 1000},
+        'genres': genres,
+        'href': f'https://api.spotify.com/v1/artists/{artist_id}',
+        'images': [],
+        'popularity': popularity,
+        'uri': f'spotify:artist:{artist_id}',
+        'type': 'artist'
+    })
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Create an ArtistDatabase with a few tagged artists"""
+    db = ArtistDatabase(str(tmp_path / "artists.db"), Mock())
+    db.save_artists_batch([
+        create_mock_artist('a1', ['Tech House', 'house'], popularity=70),
+        create_mock_artist('a2', ['deep house'], popularity=90),
+        create_mock_artist('a3', ['techno'], popularity=60),
+    ])
+    yield db
+    db.close()
+
+
+def genre_rows(db):
+    with db.get_connection() as conn:
+        return sorted(tuple(row) for row in conn.execute('SELECT artist_id, genre FROM artist_genres'))
+
+
+def test_genre_rows_follow_inserts_updates_and_deletes(db):
+    assert genre_rows(db) == [('a1', 'house'), ('a1', 'tech house'), ('a2', 'deep house'), ('a3', 'techno')]
+
+    db.save_artist(create_mock_artist('a3', ['Techno', 'minimal techno']))
+    with db.get_connection() as conn:
+        conn.execute("DELETE FROM artists WHERE id = 'a1'")
+        conn.commit()
+    assert genre_rows(db) == [('a2', 'deep house'), ('a3', 'minimal techno'), ('a3', 'techno')]
+
+
+def test_existing_rows_backfilled(db):
+    with db.get_connection() as conn:
+        # As in a database created before artist_genres existed
+        for trigger in ('artist_genres_insert', 'artist_genres_update', 'artist_genres_delete'):
+            conn.execute(f'DROP TRIGGER {trigger}')
+        conn.execute('DROP TABLE artist_genres')
+        conn.execute("UPDATE artists SET genres = 'not json' WHERE id = 'a3'")
+        conn.commit()
+        assert ensure_genre_index(conn) is True
+        assert ensure_genre_index(conn) is False
+    assert genre_rows(db) == [('a1', 'house'), ('a1', 'tech house'), ('a2', 'deep house')]
+
+
+def test_artists_by_genre_exact_and_partial(db):
+    assert [a.id for a in db.get_artists_by_genre(['HOUSE'])] == ['a1']
+    assert [a.id for a in db.get_artists_by_genre(['house'], partial=True)] == ['a2', 'a1']
+    assert [a.id for a in db.get_artists_by_genre(['house', 'techno'], min_popularity=65)] == ['a1']
+    assert [a.id for a in db.get_artists_by_genre(['tech'], partial=True, limit=1)] == ['a1']
+    assert db.get_genre_counts(contains='house') == [
+        {'genre': 'deep house', 'artists': 1}, {'genre': 'house', 'artists': 1}, {'genre': 'tech house', 'artists': 1}
+    ]
+
+
+def test_genre_query_uses_index(db):
+    with db.get_connection() as conn:
+        plan = ' '.join(row[3] for row in conn.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM artists WHERE id IN '
+            '(SELECT artist_id FROM artist_genres WHERE genre IN (?))', ('house',)))
+    assert 'idx_artist_genres_genre' in plan
+
+
+@pytest.mark.asyncio
+async def test_genre_artists_tool(monkeypatch, tmp_path):
+    monkeypatch.setenv("SPOTIFY_CLIENT_ID", "test")
+    monkeypatch.setenv("SPOTIFY_CLIENT_SECRET", "test")
+    monkeypatch.setenv("SPOTIFY_REDIRECT_URI", "http://localhost:8888")
+    from spotify_mcp import server
+    client = server.spotify_client
+    monkeypatch.setattr(client, 'db', ArtistDatabase(str(tmp_path / "tool.db"), Mock()))
+    client.db.save_artists_batch([create_mock_artist('a1', ['tech house'], popularity=70),
+                                  create_mock_artist('a2', ['deep house'], popularity=90)])
+
+    found = await server.handle_call_tool("SpotifyGenreArtists", {"genres": ["house"], "partial": True})
+    assert [a['id'] for a in json.loads(found[0].text)['artists']] == ['a2', 'a1']
+
+    listed = await server.handle_call_tool("SpotifyGenreArtists", {"format": "table"})
+    assert json.loads(listed[0].text)['genres']['columns'] == ['genre', 'artists']
+    client.close()
@@ -0,0 +1,123 @@
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+from spotify_mcp.history import compact_history, ensure_history_schema, iter_history
+
+NOW = datetime(2025, 6, 30, 12, 0, 0)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """Create a database with the artist_stats_history table the update triggers write to"""
+    conn = sqlite3.connect(str(tmp_path / "artists.db"))
+    conn.execute('''
+        CREATE TABLE artist_stats_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            artist_id TEXT NOT NULL,
+            snapshot_date TIMESTAMP NOT NULL,
+            popularity INTEGER,
+            follower_count INTEGER,
+            monthly_listeners INTEGER,
+            genres TEXT, top_tracks_total_plays BIGINT, upcoming_tours_count INTEGER, upcoming_tours_json TEXT,
+            UNIQUE(artist_id, snapshot_date)
+        )
+    ''')
+    yield conn
+    conn.close()
+
+
+def add_snapshot(conn, artist_id: str, age: timedelta, popularity: int, tours=None):
+    """Insert a history row taken `age` before NOW"""
+    conn.execute(
+        'INSERT INTO artist_stats_history (artist_id, snapshot_date, popularity, genres, upcoming_tours_json) '
+        'VALUES (?, ?, ?, ?, ?)',
+        (artist_id, (NOW - age).strftime('%Y-%m-%d %H:%M:%S'), popularity, json.dumps(['house']),
+         json.dumps(tours) if tours is not None else None)
+    )
+    conn.commit()
+
+
+def test_rolls_up_by_age_and_keeps_recent_rows(conn):
+    for hours in (1, 2, 3):
+        add_snapshot(conn, 'a1', timedelta(days=5, hours=hours), popularity=70 + hours)
+    for hours in (1, 2):
+        add_snapshot(conn, 'a1', timedelta(days=60, hours=hours), popularity=60 + hours)
+    # Wednesday to Friday of one week
+    for days in (402, 403, 404):
+        add_snapshot(conn, 'a1', timedelta(days=days), popularity=days - 400)
+
+    report = compact_history(conn, raw_days=30, daily_days=180, now=NOW)
+    rows = conn.execute('SELECT resolution, samples, popularity FROM artist_stats_history '
+                        'ORDER BY snapshot_date').fetchall()
+    assert rows[0] == ('weekly', 3, 2)
+    assert ('daily', 2, 61) in rows
+    assert [r for r in rows if r[0] == 'raw'] == [('raw', 1, 73), ('raw', 1, 72), ('raw', 1, 71)]
+    assert sum(r[1] for r in rows) == 8
+    aggregates = conn.execute('SELECT resolution, popularity_min, popularity_max, popularity_avg, '
+                              'monthly_listeners_avg FROM artist_stats_history ORDER BY snapshot_date').fetchall()
+    assert aggregates[0] == ('weekly', 2, 4, 3.0, None)
+    assert ('daily', 61, 62, 61.5, None) in aggregates
+    assert ('raw', None, None, None, None) in aggregates
+    assert report['rows_before'] - report['rows_after'] == report['rows_deleted']
+
+    again = compact_history(conn, raw_days=30, daily_days=180, now=NOW)
+    assert (again['rolled_up'], again['rows_deleted'], again['json_rows_moved']) == (0, 0, 0)
+
+
+def test_rolled_up_rows_merge_by_sample_weight(conn):
+    # Two snapshots on Monday and one on Tuesday become two daily rows, then one weekly row
+    for age, popularity in ((timedelta(days=35, hours=2), 10), (timedelta(days=35, hours=1), 20),
+                            (timedelta(days=34), 60)):
+        add_snapshot(conn, 'a1', age, popularity)
+    compact_history(conn, raw_days=30, daily_days=180, now=NOW)
+    assert conn.execute('SELECT COUNT(*) FROM artist_stats_history').fetchone()[0] == 2
+
+    compact_history(conn, raw_days=30, daily_days=180, now=NOW + timedelta(days=180))
+    assert conn.execute('SELECT resolution, samples, popularity, popularity_min, popularity_max, popularity_avg '
+                        'FROM artist_stats_history').fetchall() == [('weekly', 3, 60, 10, 60, 30.0)]
+
+
+def test_json_moved_out_once_per_document_and_restored(conn):
+    tours = [{'date': '2025-07-01', 'city': 'Ibiza'}]
+    for hours in range(4):
+        add_snapshot(conn, 'a1', timedelta(hours=hours), popularity=80, tours=tours)
+
+    report = compact_history(conn, now=NOW)
+    assert report['json_rows_moved'] == 4
+    assert report['json_documents_added'] == 2  # one tours list, one genres list
+    assert conn.execute('SELECT COUNT(upcoming_tours_json) FROM artist_stats_history').fetchone()[0] == 0
+    restored = list(iter_history(conn, 'a1'))
+    assert [json.loads(r['upcoming_tours_json']) for r in restored] == [tours] * 4
+    assert json.loads(restored[0]['genres']) == ['house']
+
+
+def test_works_in_chunks_of_artists(conn):
+    for i in range(7):
+        add_snapshot(conn, f'a{i}', timedelta(days=40), popularity=i)
+        add_snapshot(conn, f'a{i}', timedelta(days=40, minutes=5), popularity=i)
+
+    report = compact_history(conn, chunk_size=3, now=NOW)
+    assert report['chunks'] == 3
+    assert (report['rows_before'], report['rows_after']) == (14, 7)
+
+
+def test_compacts_inside_callers_transaction(conn):
+    ensure_history_schema(conn)
+    for minutes in (0, 5):
+        add_snapshot(conn, 'a1', timedelta(days=40, minutes=minutes), popularity=60 + minutes)
+    conn.execute("INSERT INTO artist_stats_history (artist_id, snapshot_date, popularity) "
+                 "VALUES ('a2', '2025-06-30 11:00:00', 50)")
+
+    report = compact_history(conn, now=NOW)
+    assert (report['rows_before'], report['rows_after']) == (3, 2)
+    assert conn.in_transaction
+    conn.rollback()
+    assert conn.execute('SELECT COUNT(*) FROM artist_stats_history').fetchone()[0] == 2
+
+
+def test_missing_history_table_is_a_no_op(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "empty.db"))
+    assert compact_history(conn)['rows_before'] == 0
+    conn.close()
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+from unittest.mock import Mock
+from spotify_mcp.metrics import MetricsRegistry, instrument
+
+
+def test_timer_records_latency_and_errors():
+    metrics = MetricsRegistry()
+    with metrics.timer('sqlite.get_artist'):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.timer('sqlite.get_artist'):
+            raise ValueError('boom')
+
+    snapshot = metrics.snapshot()
+    assert snapshot['latency']['sqlite.get_artist']['count'] == 2
+    assert snapshot['counters'] == {'sqlite.get_artist.errors': 1}
+
+
+def test_histogram_percentiles_use_bucket_bounds():
+    metrics = MetricsRegistry(buckets_ms=(10, 100))
+    for seconds in [0.005] * 9 + [0.05]:
+        metrics.observe('spotify.search', seconds)
+    latency = metrics.snapshot()['latency']['spotify.search']
+    assert (latency['p50_ms'], latency['p99_ms'], latency['max_ms']) == (10, 50.0, 50.0)
+
+
+def test_instrument_times_public_methods():
+    metrics = MetricsRegistry()
+    sp = instrument(Mock(**{'search.return_value': {'tracks': {}}}), 'spotify', metrics)
+    assert sp.search(q='x') == {'tracks': {}}
+    assert metrics.snapshot()['latency']['spotify.search']['count'] == 1
+
+
+@pytest.mark.asyncio
+async def test_stats_tool_reports_tool_latency(monkeypatch, tmp_path):
+    monkeypatch.setenv("SPOTIFY_CLIENT_ID", "test")
+    monkeypatch.setenv("SPOTIFY_CLIENT_SECRET", "test")
+    monkeypatch.setenv("SPOTIFY_REDIRECT_URI", "http://localhost:8888")
+    monkeypatch.setenv("SPOTIFY_DB_PATH", str(tmp_path / "artists.db"))
+    from spotify_mcp import server
+    server.metrics.reset()
+    monkeypatch.setattr(server.spotify_client, 'search', lambda **kwargs: {'tracks': {'items': []}})
+
+    await server.handle_call_tool("SpotifySearch", {"query": "q"})
+    stats = json.loads((await server.handle_call_tool("SpotifyStats", {"reset": True}))[0].text)
+    assert stats['latency']['tool.Search']['count'] == 1
+    assert stats['latency']['json.Search']['count'] == 1
+    assert 'search_cache' in stats
+    assert 'tool.Search' not in server.metrics.snapshot()['latency']
@@ -0,0 +1,94 @@
+import json
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import Mock
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from spotify_mcp.archive import ResponseArchive
+from spotify_mcp.artists import ArtistDatabase
+from spotify_mcp.models import Artist
+import reprocess_responses  # noqa: E402
+
+ARTIST_ID = '00sAT5YX8W3xNd1EuqyHw9'
+RESPONSE = Path(__file__).parent / 'output' / f'{ARTIST_ID}_spotify_response.json'
+
+
+def make_artist(artist_id: str) -> Artist:
+    return Artist.from_spotify_data({
+        'id': artist_id, 'name': f'Artist {artist_id}', 'external_urls': {'spotify': ''}, 'followers': {'total': 1},
+        'genres': [], 'href': '', 'images': [], 'popularity': 50, 'uri': f'spotify:artist:{artist_id}',
+        'type': 'artist'
+    })
+
+
+def test_reprocess_archived_responses(tmp_path):
+    db_path = str(tmp_path / "artists.db")
+    db = ArtistDatabase(db_path, Mock())
+    db.save_artist(make_artist(ARTIST_ID))
+    with sqlite3.connect(db_path) as conn:
+        last_updated = conn.execute('SELECT last_updated FROM artists WHERE id = ?', (ARTIST_ID,)).fetchone()[0]
+
+    response = json.loads(RESPONSE.read_text(encoding='utf-8'))
+    archive = ResponseArchive(str(tmp_path / "archive"))
+    archive.put(ARTIST_ID, 'response', {'data': {}}, fetched_at=datetime(2025, 1, 1))
+    archive.put(ARTIST_ID, 'response', response, fetched_at=datetime(2025, 3, 1))
+    archive.put('0000000000000000000000', 'response', response, fetched_at=datetime(2025, 3, 1))
+    archive.close()
+
+    sources = reprocess_responses.find_archived_responses(str(tmp_path / "archive"))
+    assert sources[ARTIST_ID][1] == '2025-03-01 00:00:00'
+    results = reprocess_responses.reprocess(db_path, sources, workers=1)
+    assert results['updated'] == [ARTIST_ID]
+    assert results['missing'] == ['0000000000000000000000']
+    assert results['failed'] == []
+
+    # Running again replaces the top cities instead of adding to them
+    reprocess_responses.reprocess(db_path, sources, workers=1)
+    stats = response['data']['artistUnion']['stats']
+    with sqlite3.connect(db_path) as conn:
+        listeners, plays, sources_json, updated = conn.execute(
+            'SELECT monthly_listeners, top_tracks_total_plays, data_sources, last_updated FROM artists WHERE id = ?',
+            (ARTIST_ID,)).fetchone()
+        cities = conn.execute('SELECT COUNT(*), MIN(snapshot_date) FROM artist_top_cities').fetchone()
+    assert listeners == stats['monthlyListeners']
+    assert plays > 0
+    assert json.loads(sources_json)['monthly_listeners'] == 'partner_api'
+    assert updated == last_updated  # the refresh schedule is untouched
+    assert cities == (len(stats['topCities']['items']), '2025-03-01 00:00:00')
+
+
+def test_reprocess_skips_newer_data_and_writes_no_history(tmp_path):
+    db_path = str(tmp_path / "artists.db")
+    db = ArtistDatabase(db_path, Mock())
+    db.save_artists_batch([make_artist('a' * 22), make_artist('b' * 22)])
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript('''
+            CREATE TABLE artist_stats_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, artist_id TEXT NOT NULL, snapshot_date TIMESTAMP NOT NULL,
+                monthly_listeners INTEGER
+            );
+            CREATE TRIGGER track_artist_updates AFTER UPDATE ON artists
+            WHEN NEW.monthly_listeners != OLD.monthly_listeners OR OLD.monthly_listeners IS NULL
+            BEGIN
+                INSERT INTO artist_stats_history (artist_id, snapshot_date, monthly_listeners)
+                VALUES (NEW.id, DATETIME('now'), NEW.monthly_listeners);
+            END;
+        ''')
+        # The Partner API data of the second artist is newer than the saved response
+        conn.execute("UPDATE artists SET monthly_listeners = 42, enhanced_data_updated = '2025-03-02T00:00:00' "
+                     "WHERE id = ?", ('b' * 22,))
+    for artist_id in ('a' * 22, 'b' * 22):
+        (tmp_path / f'{artist_id}_response_20250301_120000.json').write_text(RESPONSE.read_text(encoding='utf-8'))
+
+    sources = reprocess_responses.find_response_files(str(tmp_path))
+    results = reprocess_responses.reprocess(db_path, sources, workers=1)
+    assert (results['updated'], results['stale']) == (['a' * 22], ['b' * 22])
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM artist_stats_history').fetchone()[0] == 1
+        assert conn.execute('SELECT monthly_listeners FROM artists WHERE id = ?', ('b' * 22,)).fetchone()[0] == 42
+        # The trigger is back for every other writer
+        conn.execute("UPDATE artists SET monthly_listeners = 7 WHERE id = ?", ('a' * 22,))
+        assert conn.execute('SELECT COUNT(*) FROM artist_stats_history').fetchone()[0] == 2
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+from spotify_mcp.response import project, render, to_table
+
+
+def create_mock_track(track_id: str) -> dict:
+    """Helper to create mock track data"""
+    return {
+        'id': track_id,
+        'name': f'Track {track_id}',
+        'album': {'id': 'album1', 'name': 'Album', 'images': [{'url': 'http://example.com/image.jpg'}]},
+        'artists': [{'id': 'artist1', 'name': 'Artist'}],
+        'available_markets': ['US', 'GB']
+    }
+
+
+def test_project_dotted_fields_through_containers():
+    payload = {'tracks': [create_mock_track('t1'), create_mock_track('t2')]}
+    result = project(payload, ['id', 'album.name'])
+    assert result == {'tracks': [{'id': 't1', 'album': {'name': 'Album'}},
+                                 {'id': 't2', 'album': {'name': 'Album'}}]}
+
+
+def test_project_does_not_modify_payload():
+    track = create_mock_track('t1')
+    project(track, ['id'])
+    render(track, fields=['id'], fmt='table')
+    assert track == create_mock_track('t1')
+
+
+def test_to_table_unions_columns_in_order():
+    table = to_table([{'id': 'a', 'name': 'A'}, {'id': 'b', 'popularity': 5}])
+    assert table == {'columns': ['id', 'name', 'popularity'],
+                     'rows': [['a', 'A', None], ['b', None, 5]]}
+
+
+def test_render_is_compact_and_tabulates_lists():
+    text = render({'tracks': [{'id': 't1', 'name': 'Ünïcode'}]}, fmt='table')
+    assert ' ' not in text.replace('Ünïcode', '')
+    assert json.loads(text) == {'tracks': {'columns': ['id', 'name'], 'rows': [['t1', 'Ünïcode']]}}
+
+
+def test_render_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        render({}, fmt='xml')
+
+
+@pytest.mark.asyncio
+async def test_search_tool_defaults_to_compact(monkeypatch, tmp_path):
+    monkeypatch.setenv("SPOTIFY_CLIENT_ID", "test")
+    monkeypatch.setenv("SPOTIFY_CLIENT_SECRET", "test")
+    monkeypatch.setenv("SPOTIFY_REDIRECT_URI", "http://localhost:8888")
+    monkeypatch.setenv("SPOTIFY_DB_PATH", str(tmp_path / "artists.db"))
+    from spotify_mcp import server
+    results = {'tracks': {'items': [create_mock_track('t1')], 'total': 1}}
+    monkeypatch.setattr(server.spotify_client, 'search', lambda **kwargs: results)
+
+    compact = await server.handle_call_tool("SpotifySearch", {"query": "q"})
+    assert json.loads(compact[0].text) == {'tracks': [{'name': 'Track t1', 'id': 't1', 'artist': 'Artist'}]}
+
+    full = await server.handle_call_tool("SpotifySearch", {"query": "q", "detail": "full", "fields": ["available_markets"]})
+    assert json.loads(full[0].text) == {'tracks': [{'available_markets': ['US', 'GB']}]}
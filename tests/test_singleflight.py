@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+from spotify_mcp.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_do_many_shares_in_flight_keys():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch(keys):
+        calls.append(keys)
+        await asyncio.sleep(0.05)
+        return {key: key.upper() for key in keys}
+
+    first, second = await asyncio.gather(flight.do_many(['a', 'b'], fetch), flight.do_many(['b', 'c'], fetch))
+    assert first == {'a': 'A', 'b': 'B'}
+    assert second == {'b': 'B', 'c': 'C'}
+    assert calls == [['a', 'b'], ['c']]
+    assert flight.shared == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_shared_keys():
+    flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def fetch(keys):
+        started.set()
+        await asyncio.sleep(0.05)
+        return {key: key.upper() for key in keys}
+
+    leader = asyncio.create_task(flight.do_many(['a', 'b'], fetch))
+    await started.wait()
+    joiner = asyncio.create_task(flight.do_many(['b'], fetch))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await joiner == {'b': 'B'}
+    with pytest.raises(asyncio.CancelledError):
+        await leader
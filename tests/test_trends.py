@@ -0,0 +1,111 @@
+import json
+import math
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import Mock
+from spotify_mcp.artists import ArtistDatabase
+from spotify_mcp.models import Artist
+
+pytest.importorskip("numpy")
+from spotify_mcp import trends  # noqa: E402
+
+START = datetime(2025, 1, 1)
+
+HISTORY_DDL = '''
+    CREATE TABLE IF NOT EXISTS artist_stats_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        artist_id TEXT NOT NULL,
+        snapshot_date TIMESTAMP NOT NULL,
+        popularity INTEGER,
+        follower_count INTEGER,
+        monthly_listeners INTEGER,
+        genres TEXT, top_tracks_total_plays BIGINT, upcoming_tours_count INTEGER, upcoming_tours_json TEXT,
+        UNIQUE(artist_id, snapshot_date)
+    )
+'''
+
+
+def add_history(conn, artist_id: str, listeners: list, step_days: int = 1, start: datetime = START):
+    """Insert one snapshot every step_days with the given monthly listeners (None for missing)"""
+    conn.executemany(
+        'INSERT INTO artist_stats_history (artist_id, snapshot_date, popularity, follower_count, monthly_listeners) '
+        'VALUES (?, ?, ?, ?, ?)',
+        [(artist_id, (start + timedelta(days=i * step_days)).strftime('%Y-%m-%d %H:%M:%S'), 50, 1000, value)
+         for i, value in enumerate(listeners)]
+    )
+    conn.commit()
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute(HISTORY_DDL)
+    yield conn
+    conn.close()
+
+
+def test_changes_over_each_window(conn):
+    # Inserted out of order: rows are sorted by artist and time after loading
+    add_history(conn, 'b', [100 + 10 * day for day in range(15)])
+    add_history(conn, 'a', [1000] * 8 + [None, 900])
+    add_history(conn, 'c', [500, 600], step_days=60)  # only a long gap
+
+    computed = trends.compute_trends(trends.load_history(conn), windows=(7,))
+    assert list(computed['artist_id']) == ['a', 'b', 'c']
+    assert list(computed['monthly_listeners']) == [900, 240, 600]
+
+    delta = computed['monthly_listeners_delta_7d']
+    assert delta[1] == 70 and math.isclose(computed['monthly_listeners_pct_7d'][1], 70 / 170 * 100)
+    assert computed['monthly_listeners_accel_7d'][1] == 0  # steady growth
+    assert delta[0] == -100  # the missing day is skipped, not read as zero
+    assert math.isnan(delta[2])
+    assert computed['monthly_listeners_z_7d'][1] > 0 > computed['monthly_listeners_z_7d'][0]
+    assert math.isnan(computed['monthly_listeners_accel_7d'][0])  # not 14 days of history
+
+
+def test_top_movers(conn):
+    add_history(conn, 'riser', [100, 100] + [200] * 7)
+    add_history(conn, 'faller', [100] * 8 + [50])
+    add_history(conn, 'small', [1, 1] + [3] * 7)
+    computed = trends.compute_trends(trends.load_history(conn))
+
+    movers = trends.top_movers(computed, window=7, names={'riser': 'Riser'})
+    assert [m['id'] for m in movers['risers']] == ['small', 'riser']
+    assert movers['risers'][1]['name'] == 'Riser'
+    assert [m['id'] for m in movers['fallers']] == ['faller']
+    assert movers['fallers'][0]['pct'] == -50.0
+    assert [m['id'] for m in trends.top_movers(computed, window=7, min_value=10)['risers']] == ['riser']
+    with pytest.raises(ValueError):
+        trends.top_movers(computed, metric='plays')
+
+
+@pytest.mark.asyncio
+async def test_trends_tool(monkeypatch, tmp_path):
+    monkeypatch.setenv("SPOTIFY_CLIENT_ID", "test")
+    monkeypatch.setenv("SPOTIFY_CLIENT_SECRET", "test")
+    monkeypatch.setenv("SPOTIFY_REDIRECT_URI", "http://localhost:8888")
+    from spotify_mcp import server
+    client = server.spotify_client
+    db = ArtistDatabase(str(tmp_path / "tool.db"), Mock())
+    monkeypatch.setattr(client, 'db', db)
+    db.save_artist(Artist.from_spotify_data({
+        'id': 'a1', 'name': 'Rising Artist', 'external_urls': {'spotify': ''}, 'followers': {'total': 1},
+        'genres': [], 'href': '', 'images': [], 'popularity': 50, 'uri': 'spotify:artist:a1', 'type': 'artist'
+    }))
+    with db.get_connection() as conn:
+        conn.execute(HISTORY_DDL)
+        add_history(conn, 'a1', [1000 + 100 * day for day in range(31)])
+    load = Mock(side_effect=trends.load_history)
+    monkeypatch.setattr(trends, 'load_history', load)
+
+    result = await server.handle_call_tool("SpotifyTrends", {"window": 30})
+    riser = json.loads(result[0].text)['risers'][0]
+    assert (riser['name'], riser['delta'], riser['pct']) == ('Rising Artist', 3000.0, 300.0)
+    await server.handle_call_tool("SpotifyTrends", {"window": 7, "metric": "followers"})
+    assert load.call_count == 1  # trends reused until the history changes
+
+    result = await server.handle_call_tool("SpotifyTrends", {"rank_by": "speed"})
+    assert "Unknown ranking" in result[0].text
+    client.close()
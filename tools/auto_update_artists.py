@@ -14,6 +14,11 @@ import argparse
 import subprocess
 from datetime import datetime
 
+# Add project root to the path for the shared staleness query
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.spotify_mcp import schedule
+from src.spotify_mcp.artists import ensure_refresh_schedule, select_due_artists
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -30,85 +35,44 @@ def connect_db(db_path):
     try:
         conn = sqlite3.connect(db_path)
         conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        ensure_refresh_schedule(conn)
         logger.info(f"Connected to database: {db_path}")
         return conn
     except Exception as e:
         logger.error(f"Error connecting to database: {str(e)}")
         return None
 
+def tier_bounds(tier_index):
+    """Popularity range (min inclusive, max exclusive) of the tier at tier_index in the schedule."""
+    tiers = schedule.load_tiers()
+    tier_index = min(tier_index, len(tiers) - 1) if tier_index >= 0 else len(tiers) - 1
+    upper = tiers[tier_index - 1].popularity_threshold if tier_index > 0 else None
+    return tiers[tier_index].popularity_threshold, upper
+
 def get_artists_needing_update(conn, top_tier_only=False, mid_tier_only=False, lower_tier_only=False, 
                               standard_only=False, partner_only=False, limit=None):
     """Get artists that need updates based on their tier."""
     try:
-        cursor = conn.cursor()
-        
-        # Base conditions for the WHERE clause
-        where_clauses = []
-        
-        # Standard API update criteria if not partner-only
-        if not partner_only:
-            where_clauses.append("""
-                (popularity >= 75 AND (last_updated IS NULL OR last_updated < datetime('now', '-3 days')))
-                OR (popularity >= 50 AND popularity < 75 AND (last_updated IS NULL OR last_updated < datetime('now', '-7 days')))
-                OR (popularity < 50 AND (last_updated IS NULL OR last_updated < datetime('now', '-14 days')))
-            """)
-        
-        # Partner API update criteria if not standard-only
-        if not standard_only:
-            where_clauses.append("""
-                (popularity >= 75 AND (enhanced_data_updated IS NULL OR enhanced_data_updated < datetime('now', '-7 days')))
-                OR (popularity >= 50 AND popularity < 75 AND (enhanced_data_updated IS NULL OR enhanced_data_updated < datetime('now', '-14 days')))
-                OR (popularity < 50 AND (enhanced_data_updated IS NULL OR enhanced_data_updated < datetime('now', '-30 days')))
-            """)
-        
-        # Combine where clauses with OR
-        where_clause = " OR ".join(f"({clause})" for clause in where_clauses)
-        
         # Additional tier filtering if specified
-        tier_filter = ""
+        min_popularity = max_popularity = None
         if top_tier_only:
-            tier_filter = " AND popularity >= 75"
+            min_popularity, max_popularity = tier_bounds(0)
         elif mid_tier_only:
-            tier_filter = " AND popularity >= 50 AND popularity < 75"
+            min_popularity, max_popularity = tier_bounds(1)
         elif lower_tier_only:
-            tier_filter = " AND popularity < 50"
-        
-        # Combine with tier filter if needed
-        if tier_filter:
-            where_clause = f"({where_clause}){tier_filter}"
-        
-        # Build the complete query
-        query = f"""
-            SELECT id, name, popularity, last_updated, enhanced_data_updated,
-                CASE 
-                    WHEN popularity >= 75 THEN 'Top Tier'
-                    WHEN popularity >= 50 THEN 'Mid Tier'
-                    ELSE 'Lower Tier'
-                END as tier
-            FROM artists
-            WHERE {where_clause}
-            ORDER BY 
-                CASE 
-                    WHEN popularity >= 75 THEN 1
-                    WHEN popularity >= 50 THEN 2
-                    ELSE 3
-                END,
-                popularity DESC
-        """
-        
-        if limit:
-            query += f" LIMIT {limit}"
+            min_popularity, max_popularity = tier_bounds(-1)
         
-        cursor.execute(query)
-        artists = cursor.fetchall()
+        artists = select_due_artists(conn, standard=not partner_only, partner=not standard_only, limit=limit,
+                                     min_popularity=min_popularity, max_popularity=max_popularity)
         
         # Group by tier for reporting
-        tiers = {"Top Tier": 0, "Mid Tier": 0, "Lower Tier": 0}
+        tiers = {}
         artist_ids = []
         
         for artist in artists:
             artist_ids.append(artist['id'])
-            tiers[artist['tier']] += 1
+            tier = schedule.tier_label(artist['tier'])
+            tiers[tier] = tiers.get(tier, 0) + 1
         
         # Log breakdown by tier
         logger.info(f"Found {len(artist_ids)} artists needing updates:")
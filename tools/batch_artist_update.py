@@ -1,185 +1,4 @@
-def get_artists_needing_update(conn, standard_check=True, partner_check=True, limit=None):
-    """Find artists needing updates based on their tier and last update time."""
-    try:
-        cursor = conn.cursor()
-        
-        # Build query conditions based on update types
-        conditions = []
-        
-        if standard_check:
-            # Artists needing standard API updates based on tier
-            conditions.append(
-                "(" +
-                "(popularity >= 75 AND last_updated < datetime('now', '-3 days')) OR " +
-                "(popularity >= 50 AND popularity < 75 AND last_updated < datetime('now', '-7 days')) OR " +
-                "(popularity < 50 AND last_updated < datetime('now', '-14 days')) OR " +
-                "last_updated IS NULL" +
-                ")"
-            )
-        
-        if partner_check:
-            # Artists needing Partner API updates based on tier
-            conditions.append(
-                "(" +
-                "(popularity >= 75 AND (enhanced_data_updated < datetime('now', '-7 days') OR enhanced_data_updated IS NULL)) OR " +
-                "(popularity >= 50 AND popularity < 75 AND (enhanced_data_updated < datetime('now', '-14 days') OR enhanced_data_updated IS NULL)) OR " +
-                "(popularity < 50 AND (enhanced_data_updated < datetime('now', '-30 days') OR enhanced_data_updated IS NULL))" +
-                ")"
-            )
-        
-        if not conditions:
-            return []
-        
-        # Combine conditions with OR
-        where_clause = " OR ".join(conditions)
-        
-        # Build the query
-        query = f"""
-        SELECT id, name, popularity, last_updated, enhanced_data_updated,
-            CASE 
-                WHEN popularity >= 75 THEN 'Top Tier'
-                WHEN popularity >= 50 THEN 'Mid Tier'
-                ELSE 'Lower Tier'
-            END as tier
-        FROM artists
-        WHERE {where_clause}
-        ORDER BY popularity DESC, last_updated ASC
-        """
-        
-        if limit is not None and limit > 0:
-            query += f" LIMIT {limit}"
-        
-        cursor.execute(query)
-        artists = cursor.fetchall()
-        
-        # Convert to list of artist IDs and log details
-        artist_ids = []
-        logger.info(f"Found {len(artists)} artists needing updates:")
-        
-        for artist in artists:
-            artist_dict = dict(artist)
-            artist_ids.append(artist_dict['id'])
-            
-            # Determine why this artist needs an update
-            needs_standard = False
-            needs_partner = False
-            
-            if standard_check:
-                if artist_dict['popularity'] >= 75 and (artist_dict['last_updated'] is None or 
-                                                      datetime.fromisoformat(artist_dict['last_updated']) < 
-                                                      datetime.now() - timedelta(days=3)):
-                    needs_standard = True
-                elif artist_dict['popularity'] >= 50 and artist_dict['popularity'] < 75 and (artist_dict['last_updated'] is None or 
-                                                                                            datetime.fromisoformat(artist_dict['last_updated']) < 
-                                                                                            datetime.now() - timedelta(days=7)):
-                    needs_standard = True
-                elif artist_dict['popularity'] < 50 and (artist_dict['last_updated'] is None or 
-                                                       datetime.fromisoformat(artist_dict['last_updated']) < 
-                                                       datetime.now() - timedelta(days=14)):
-                    needs_standard = True
-            
-            if partner_check:
-                if artist_dict['popularity'] >= 75 and (artist_dict['enhanced_data_updated'] is None or 
-                                                       datetime.fromisoformat(artist_dict['enhanced_data_updated']) < 
-                                                       datetime.now() - timedelta(days=7)):
-                    needs_partner = True
-                elif artist_dict['popularity'] >= 50 and artist_dict['popularity'] < 75 and (artist_dict['enhanced_data_updated'] is None or 
-                                                                                             datetime.fromisoformat(artist_dict['enhanced_data_updated']) < 
-                                                                                             datetime.now() - timedelta(days=14)):
-                    needs_partner = True
-                elif artist_dict['popularity'] < 50 and (artist_dict['enhanced_data_updated'] is None or 
-                                                        datetime.fromisoformat(artist_dict['enhanced_data_updated']) < 
-                                                        datetime.now() - timedelta(days=30)):
-                    needs_partner = True
-            
-            # Log artist details
-            update_types = []
-            if needs_standard:
-                update_types.append("Standard API")
-            if needs_partner:
-                update_types.append("Partner API")
-                
-            logger.info(f"  - {artist_dict['name']} ({artist_dict['tier']}): Needs {', '.join(update_types)}")
-        
-        return artist_ids
-        
-    except Exception as e:
-        logger.error(f"Error finding artists needing updates: {str(e)}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
-        return []
-        
-        # Build where clauses based on tier update schedules
-        where_clauses = []
-        
-        # Standard API update criteria
-        if not partner_only:
-            where_clauses.append("""
-                (popularity >= 75 AND (last_updated IS NULL OR last_updated < datetime('now', '-3 days')))
-                OR (popularity >= 50 AND popularity < 75 AND (last_updated IS NULL OR last_updated < datetime('now', '-7 days')))
-                OR (popularity < 50 AND (last_updated IS NULL OR last_updated < datetime('now', '-14 days')))
-            """)
-        
-        # Partner API update criteria
-        if not standard_only:
-            where_clauses.append("""
-                (popularity >= 75 AND (enhanced_data_updated IS NULL OR enhanced_data_updated < datetime('now', '-7 days')))
-                OR (popularity >= 50 AND popularity < 75 AND (enhanced_data_updated IS NULL OR enhanced_data_updated < datetime('now', '-14 days')))
-                OR (popularity < 50 AND (enhanced_data_updated IS NULL OR enhanced_data_updated < datetime('now', '-30 days')))
-            """)
-        
-        # Combine where clauses with OR
-        where_clause = " OR ".join(f"({clause})" for clause in where_clauses)
-        
-        # Build the query
-        query = f"""
-            SELECT id, name, popularity, 
-                   last_updated, enhanced_data_updated,
-                   CASE 
-                       WHEN popularity >= 75 THEN 'Top Tier'
-                       WHEN popularity >= 50 THEN 'Mid Tier'
-                       ELSE 'Lower Tier'
-                   END as tier
-            FROM artists
-            WHERE {where_clause}
-            ORDER BY 
-                CASE 
-                    WHEN popularity >= 75 THEN 1
-                    WHEN popularity >= 50 THEN 2
-                    ELSE 3
-                END,
-                COALESCE(last_updated, '1970-01-01'),
-                COALESCE(enhanced_data_updated, '1970-01-01')
-        """
-        
-        if limit:
-            query += f" LIMIT {limit}"
-        
-        cursor.execute(query)
-        artists = cursor.fetchall()
-        
-        # Extract the artist IDs and additional information
-        result = []
-        for row in artists:
-            # Convert row to dict for easier access
-            artist = dict(row)
-            result.append({
-                "id": artist["id"],
-                "name": artist["name"],
-                "popularity": artist["popularity"],
-                "tier": artist["tier"],
-                "last_updated": artist["last_updated"],
-                "enhanced_data_updated": artist["enhanced_data_updated"]
-            })
-        
-        conn.close()
-        return result
-        
-    except Exception as e:
-        logger.error(f"Error getting artists needing updates: {str(e)}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
-        return []#!/usr/bin/env python3
+#!/usr/bin/env python3
 """
 Batch Artist Update Tool for DJVIBE
 Updates multiple artists using both standard Spotify API and Partner API.
@@ -197,6 +16,11 @@ from datetime import datetime
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 
+# Add project root to the path for the shared staleness query
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.spotify_mcp import schedule
+from src.spotify_mcp.artists import ensure_refresh_schedule, select_due_artists
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -213,73 +37,21 @@ def get_artists_needing_updates(db_path, limit=None, standard_only=False, partne
     """Get artists that need updates based on their tier and last update time."""
     try:
         conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Build where clauses based on tier update schedules
-        where_clauses = []
-        
-        # Standard API update criteria
-        if not partner_only:
-            where_clauses.append("""
-                (popularity >= 75 AND (last_updated IS NULL OR last_updated < datetime('now', '-3 days')))
-                OR (popularity >= 50 AND popularity < 75 AND (last_updated IS NULL OR last_updated < datetime('now', '-7 days')))
-                OR (popularity < 50 AND (last_updated IS NULL OR last_updated < datetime('now', '-14 days')))
-            """)
-        
-        # Partner API update criteria
-        if not standard_only:
-            where_clauses.append("""
-                (popularity >= 75 AND (enhanced_data_updated IS NULL OR enhanced_data_updated < datetime('now', '-7 days')))
-                OR (popularity >= 50 AND popularity < 75 AND (enhanced_data_updated IS NULL OR enhanced_data_updated < datetime('now', '-14 days')))
-                OR (popularity < 50 AND (enhanced_data_updated IS NULL OR enhanced_data_updated < datetime('now', '-30 days')))
-            """)
-        
-        # Combine where clauses with OR
-        where_clause = " OR ".join(f"({clause})" for clause in where_clauses)
-        
-        # Build the query
-        query = f"""
-            SELECT id, name, popularity, 
-                   last_updated, enhanced_data_updated,
-                   CASE 
-                       WHEN popularity >= 75 THEN 'Top Tier'
-                       WHEN popularity >= 50 THEN 'Mid Tier'
-                       ELSE 'Lower Tier'
-                   END as tier
-            FROM artists
-            WHERE {where_clause}
-            ORDER BY 
-                CASE 
-                    WHEN popularity >= 75 THEN 1
-                    WHEN popularity >= 50 THEN 2
-                    ELSE 3
-                END,
-                COALESCE(last_updated, '1970-01-01'),
-                COALESCE(enhanced_data_updated, '1970-01-01')
-        """
-        
-        if limit:
-            query += f" LIMIT {limit}"
-        
-        cursor.execute(query)
-        artists = cursor.fetchall()
+        try:
+            ensure_refresh_schedule(conn)
+            artists = select_due_artists(conn, standard=not partner_only, partner=not standard_only, limit=limit)
+        finally:
+            conn.close()
         
         # Extract the artist IDs and additional information
-        result = []
-        for row in artists:
-            # Convert row to dict for easier access
-            artist = dict(row)
-            result.append({
-                "id": artist["id"],
-                "name": artist["name"],
-                "popularity": artist["popularity"],
-                "tier": artist["tier"],
-                "last_updated": artist["last_updated"],
-                "enhanced_data_updated": artist["enhanced_data_updated"]
-            })
-        
-        conn.close()
-        return result
+        return [{
+            "id": artist["id"],
+            "name": artist["name"],
+            "popularity": artist["popularity"],
+            "tier": schedule.tier_label(artist["tier"]),
+            "last_updated": artist["last_updated"],
+            "enhanced_data_updated": artist["enhanced_data_updated"]
+        } for artist in artists]
         
     except Exception as e:
         logger.error(f"Error getting artists needing updates: {str(e)}")
@@ -295,6 +67,7 @@ def connect_db(db_path):
     try:
         conn = sqlite3.connect(db_path)
         conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        ensure_refresh_schedule(conn)
         logger.info(f"Connected to database: {db_path}")
         return conn
     except Exception as e:
@@ -304,57 +77,17 @@ def connect_db(db_path):
 def get_artists_needing_update(conn, limit=None, standard_only=False, partner_only=False):
     """Get artists that need updates based on their tier."""
     try:
-        cursor = conn.cursor()
-        
-        # Build the query based on what updates are needed
-        where_clauses = []
-        
-        if not partner_only:  # Include standard API update criteria
-            where_clauses.append("""
-                (popularity >= 75 AND last_updated < datetime('now', '-3 days'))
-                OR (popularity >= 50 AND popularity < 75 AND last_updated < datetime('now', '-7 days'))
-                OR (popularity < 50 AND last_updated < datetime('now', '-14 days'))
-                OR last_updated IS NULL
-            """)
-        
-        if not standard_only:  # Include partner API update criteria
-            where_clauses.append("""
-                (popularity >= 75 AND enhanced_data_updated < datetime('now', '-7 days'))
-                OR (popularity >= 50 AND popularity < 75 AND enhanced_data_updated < datetime('now', '-14 days'))
-                OR (popularity < 50 AND enhanced_data_updated < datetime('now', '-30 days'))
-                OR enhanced_data_updated IS NULL
-            """)
-        
-        # Combine with OR if both types of updates are included
-        where_clause = " OR ".join(where_clauses)
-        
-        # Build the complete query
-        query = f"""
-            SELECT id, name, popularity, last_updated, enhanced_data_updated,
-                CASE 
-                    WHEN popularity >= 75 THEN 'Top Tier'
-                    WHEN popularity >= 50 THEN 'Mid Tier'
-                    ELSE 'Lower Tier'
-                END as tier
-            FROM artists
-            WHERE {where_clause}
-            ORDER BY popularity DESC, last_updated ASC
-        """
-        
-        if limit:
-            query += f" LIMIT {limit}"
-        
         logger.info(f"Executing query to find artists needing updates")
-        cursor.execute(query)
-        artists = cursor.fetchall()
+        artists = select_due_artists(conn, standard=not partner_only, partner=not standard_only, limit=limit)
         
         # Group by tier for reporting
-        tiers = {"Top Tier": 0, "Mid Tier": 0, "Lower Tier": 0}
+        tiers = {}
         artist_ids = []
         
         for artist in artists:
             artist_ids.append(artist['id'])
-            tiers[artist['tier']] += 1
+            tier = schedule.tier_label(artist['tier'])
+            tiers[tier] = tiers.get(tier, 0) + 1
         
         # Log breakdown by tier
         logger.info(f"Found {len(artist_ids)} artists needing updates:")
@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Spotify MCP server.
+
+Spotify is replaced by an in-process fake with a fixed per-call latency, so the
+numbers measure the server's own overhead and concurrency rather than the
+network.
+
+Usage:
+    python tools/benchmark.py concurrency --callers 1 2 4 8 16 --latency 0.1
+    python tools/benchmark.py response --limit 50
+    python tools/benchmark.py startup --runs 5
+    python tools/benchmark.py db --artists 1000
+    python tools/benchmark.py trends --rows 1000000 --artists 10000
+    python tools/benchmark.py reprocess --artists 2000 --workers 1 4
+    python tools/benchmark.py models --artists 100000
+"""
+import os
+import sys
+import time
+import asyncio
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+import threading
+
+# Add src directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# The server builds its Spotify client from the environment; the fake replaces
+# it before any request is made
+os.environ.setdefault("SPOTIFY_CLIENT_ID", "benchmark")
+os.environ.setdefault("SPOTIFY_CLIENT_SECRET", "benchmark")
+os.environ.setdefault("SPOTIFY_REDIRECT_URI", "http://localhost:8888")
+os.environ.setdefault("SPOTIFY_DB_PATH", os.path.join(tempfile.mkdtemp(), "benchmark.db"))
+
+
+class FakeSpotify:
+    """Stands in for spotipy.Spotify with a blocking, fixed-latency API."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def _artist(self, artist_id):
+        return {
+            'id': artist_id,
+            'name': f"Artist {artist_id}",
+            'external_urls': {'spotify': f"https://open.spotify.com/artist/{artist_id}"},
+            'followers': {'href': None, 'total': 1000},
+            'genres': ['house'],
+            'href': f"https://api.spotify.com/v1/artists/{artist_id}",
+            'images': [],
+            'popularity': 60,
+            'uri': f"spotify:artist:{artist_id}",
+            'type': 'artist'
+        }
+
+    def search(self, q, type="track", limit=10):
+        time.sleep(self.latency)
+        return {'tracks': {'items': [], 'total': 0}}
+
+    def artist(self, artist_id):
+        time.sleep(self.latency)
+        return self._artist(artist_id)
+
+    def artists(self, artist_ids):
+        time.sleep(self.latency)
+        return {'artists': [self._artist(aid) for aid in artist_ids]}
+
+
+MARKETS = ["AD", "AE", "AR", "AT", "AU", "BE", "BG", "BR", "CA", "CH", "CL", "CO", "CZ", "DE", "DK", "ES",
+           "FI", "FR", "GB", "GR", "HK", "ID", "IE", "IL", "IN", "IT", "JP", "MX", "NL", "NO", "NZ", "US"]
+
+
+def fake_search_results(limit: int) -> dict:
+    """A search response shaped like Spotify's, including markets and images."""
+    images = [{'height': size, 'url': f"https://i.scdn.co/image/{size}", 'width': size} for size in (640, 300, 64)]
+
+    def artist(i):
+        return {'id': f"artist{i}", 'name': f"Artist {i}", 'type': 'artist', 'uri': f"spotify:artist:artist{i}",
+                'href': f"https://api.spotify.com/v1/artists/artist{i}",
+                'external_urls': {'spotify': f"https://open.spotify.com/artist/artist{i}"}}
+
+    def album(i):
+        return {'id': f"album{i}", 'name': f"Album {i}", 'album_type': 'album', 'artists': [artist(i)],
+                'available_markets': MARKETS, 'images': images, 'release_date': '2024-01-01',
+                'total_tracks': 12, 'uri': f"spotify:album:album{i}"}
+
+    def track(i):
+        return {'id': f"track{i}", 'name': f"Track {i}", 'album': album(i), 'artists': [artist(i)],
+                'available_markets': MARKETS, 'duration_ms': 200000, 'popularity': 50,
+                'track_number': 1, 'uri': f"spotify:track:track{i}"}
+
+    return {
+        'tracks': {'items': [track(i) for i in range(limit)], 'total': limit},
+        'albums': {'items': [album(i) for i in range(limit)], 'total': limit}
+    }
+
+
+def benchmark_response(args):
+    from src.spotify_mcp import server
+    from src.spotify_mcp.response import render
+
+    results = fake_search_results(args.limit)
+    qtype = "track,album"
+    encodings = [
+        ("indent=2 (previous)", lambda: json.dumps(results, indent=2)),
+        ("full", lambda: render(server._full_search(results, qtype))),
+        ("compact", lambda: render(server._compact_search(results, qtype))),
+        ("compact table", lambda: render(server._compact_search(results, qtype), fmt="table")),
+        ("fields name,id table", lambda: render(server._compact_search(results, qtype),
+                                                fields=["name", "id"], fmt="table")),
+    ]
+
+    print(f"Search result with {args.limit} tracks and {args.limit} albums, {args.iterations} iterations")
+    print(f"{'encoding':<22} {'bytes':>10} {'ms/response':>12}")
+    for label, encode in encodings:
+        size = len(encode().encode("utf-8"))
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            encode()
+        elapsed = (time.perf_counter() - start) / args.iterations
+        print(f"{label:<22} {size:>10} {elapsed * 1000:>12.3f}")
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Each snippet runs in a fresh interpreter and prints the elapsed seconds
+STARTUP_SNIPPETS = [
+    ("import models", "import src.spotify_mcp.models"),
+    ("import server", "import src.spotify_mcp.server"),
+    ("first list_tools", "import asyncio\n"
+                         "from src.spotify_mcp import server\n"
+                         "asyncio.run(server.handle_list_tools())"),
+]
+
+
+def time_in_subprocess(code: str) -> float:
+    script = ("import time\n"
+              "start = time.perf_counter()\n"
+              f"{code}\n"
+              "print(time.perf_counter() - start)")
+    output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=os.environ.copy(),
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def benchmark_startup(args):
+    print(f"Cold start, median of {args.runs} fresh interpreters")
+    print(f"{'step':<18} {'median ms':>10} {'min ms':>8}")
+    for label, code in STARTUP_SNIPPETS:
+        timings = [time_in_subprocess(code) for _ in range(args.runs)]
+        print(f"{label:<18} {statistics.median(timings) * 1000:>10.1f} {min(timings) * 1000:>8.1f}")
+
+
+def fake_artist(artist_id: str, popularity: int = 60) -> dict:
+    return {
+        'id': artist_id,
+        'name': f"Artist {artist_id}",
+        'external_urls': {'spotify': f"https://open.spotify.com/artist/{artist_id}"},
+        'followers': {'href': None, 'total': 1000},
+        'genres': ['house', 'tech house'],
+        'href': f"https://api.spotify.com/v1/artists/{artist_id}",
+        'images': [{'height': 640, 'url': f"https://i.scdn.co/image/{artist_id}", 'width': 640}],
+        'popularity': popularity,
+        'uri': f"spotify:artist:{artist_id}",
+        'type': 'artist'
+    }
+
+
+def benchmark_db(args):
+    import logging
+    from src.spotify_mcp.artists import ArtistDatabase
+    from src.spotify_mcp.models import Artist
+
+    logger = logging.getLogger("benchmark")
+    logger.disabled = True
+    db = ArtistDatabase(os.path.join(tempfile.mkdtemp(), "artists.db"), logger, cache_size=args.artists)
+    artists = [Artist.from_spotify_data(fake_artist(f"a{i}")) for i in range(args.artists)]
+
+    def timed(label, func, items):
+        start = time.perf_counter()
+        failures = sum(1 for item in items if not func(item))
+        elapsed = time.perf_counter() - start
+        print(f"{label:<28} {len(items) / elapsed:>10.0f} {elapsed / len(items) * 1e6:>10.1f} {failures:>9}")
+
+    print(f"{args.artists} artists")
+    print(f"{'operation':<28} {'ops/s':>10} {'us/op':>10} {'failures':>9}")
+    timed("save_artist (insert)", db.save_artist, artists)
+    timed("save_artist (update)", db.save_artist, artists)
+    timed("get_artist", lambda a: db.get_artist(a.id) is not None, artists)
+    timed("get_artist (cached)", lambda a: db.get_artist(a.id) is not None, artists)
+
+    chunks = [artists[i:i + 50] for i in range(0, len(artists), 50)]
+    start = time.perf_counter()
+    failures = sum(len(db.save_artists_batch(chunk)['failed']) for chunk in chunks)
+    elapsed = time.perf_counter() - start
+    print(f"{'save_artists_batch (x50)':<28} {len(artists) / elapsed:>10.0f} "
+          f"{elapsed / len(artists) * 1e6:>10.1f} {failures:>9}")
+
+    # A second writer (as a batch tool would be) runs while the server reads
+    done = threading.Event()
+    write_failures = []
+
+    def writer():
+        while not done.is_set():
+            result = db.save_artists_batch(artists[:50])
+            write_failures.extend(result['failed'])
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        timed("get_artist during writes", lambda a: db.get_artist(a.id) is not None, artists)
+    finally:
+        done.set()
+        thread.join()
+    print(f"writer failures during reads: {len(write_failures)}")
+
+    # Concurrent updaters saving one artist each: one thread per save taking
+    # turns on the write lock, then the same saves group-committed
+    from concurrent.futures import ThreadPoolExecutor
+    from src.spotify_mcp.async_artists import AsyncArtistDatabase
+    from src.spotify_mcp.metrics import registry
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        start = time.perf_counter()
+        failures = sum(1 for saved in pool.map(db.save_artist, artists) if not saved)
+        elapsed = time.perf_counter() - start
+    print(f"{'save_artist (16 threads)':<28} {len(artists) / elapsed:>10.0f} "
+          f"{elapsed / len(artists) * 1e6:>10.1f} {failures:>9}")
+
+    async def save_concurrently(adb):
+        return await asyncio.gather(*(adb.save_artist(a) for a in artists))
+
+    adb = AsyncArtistDatabase(db)
+    commits_before = registry.snapshot()['counters'].get('sqlite.group_commits', 0)
+    start = time.perf_counter()
+    failures = sum(1 for saved in asyncio.run(save_concurrently(adb)) if not saved)
+    elapsed = time.perf_counter() - start
+    commits = registry.snapshot()['counters'].get('sqlite.group_commits', 0) - commits_before
+    adb.close()
+    print(f"{'async save_artist (grouped)':<28} {len(artists) / elapsed:>10.0f} "
+          f"{elapsed / len(artists) * 1e6:>10.1f} {failures:>9}   ({commits} commits)")
+
+    stats = db.cache.stats()
+    print(f"artist cache: {stats['size']} entries, {stats['bytes'] / 1024:.0f} KiB, "
+          f"hit rate {stats['hit_rate']:.1%}, {stats['invalidations']} invalidations")
+    db.close()
+
+
+def python_trends(rows, window: int):
+    """Per-artist delta and percentage change over `window` days in plain Python, as computed before trends.py."""
+    import bisect
+    by_artist = {}
+    for artist_id, day, listeners in rows:
+        days, values = by_artist.setdefault(artist_id, ([], []))
+        days.append(day)
+        values.append(listeners)
+    result = {}
+    for artist_id, (days, values) in by_artist.items():
+        i = bisect.bisect_right(days, days[-1] - window) - 1
+        if i >= 0 and days[i] >= days[-1] - 2 * window and values[i]:
+            delta = values[-1] - values[i]
+            result[artist_id] = (delta, delta / values[i] * 100)
+    return result
+
+
+def benchmark_trends(args):
+    import random
+    import sqlite3
+    from src.spotify_mcp import trends
+    from src.spotify_mcp.history import HISTORY_TABLE
+
+    # Synthetic history: each artist has snapshots on consecutive days, listeners on a random walk
+    conn = sqlite3.connect(os.path.join(tempfile.mkdtemp(), "history.db"))
+    conn.execute(f'''
+        CREATE TABLE {HISTORY_TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, artist_id TEXT NOT NULL, snapshot_date TIMESTAMP NOT NULL,
+            popularity INTEGER, follower_count INTEGER, monthly_listeners INTEGER, genres TEXT,
+            top_tracks_total_plays BIGINT, upcoming_tours_count INTEGER, upcoming_tours_json TEXT,
+            UNIQUE(artist_id, snapshot_date)
+        )
+    ''')
+    conn.execute(f'CREATE INDEX idx_artist_stats_history_dates ON {HISTORY_TABLE}(artist_id, snapshot_date)')
+    per_artist = args.rows // args.artists
+    rng = random.Random(0)
+
+    def snapshots():
+        for a in range(args.artists):
+            listeners = rng.randint(1000, 1000000)
+            growth = rng.gauss(0, 0.01)
+            for day in range(per_artist):
+                listeners = max(0, int(listeners * (1 + growth + rng.gauss(0, 0.005))))
+                yield (f"a{a:07d}", "2024-01-01 00:00:00", day, rng.randint(0, 100), listeners // 10, listeners)
+
+    start = time.perf_counter()
+    conn.executemany(f"INSERT INTO {HISTORY_TABLE} (artist_id, snapshot_date, popularity, follower_count, "
+                     f"monthly_listeners) VALUES (?, datetime(?, '+' || ? || ' days'), ?, ?, ?)", snapshots())
+    conn.commit()
+    print(f"{args.artists} artists x {per_artist} daily snapshots = {args.artists * per_artist} rows "
+          f"(generated in {time.perf_counter() - start:.1f} s)")
+
+    def timed(label, func):
+        start = time.perf_counter()
+        result = func()
+        print(f"{label:<34} {(time.perf_counter() - start) * 1000:>10.1f} ms")
+        return result
+
+    print(f"{'step':<34} {'time':>13}")
+    history = timed("load_history (SQLite -> NumPy)", lambda: trends.load_history(conn))
+    computed = timed("compute_trends (3 metrics x 3 windows)", lambda: trends.compute_trends(history))
+    timed("top_movers (30 days, top 10)", lambda: trends.top_movers(computed, window=30))
+
+    rows = timed("fetch rows for plain Python", lambda: conn.execute(
+        f"SELECT artist_id, julianday(snapshot_date), monthly_listeners FROM {HISTORY_TABLE} "
+        f"ORDER BY artist_id, snapshot_date").fetchall())
+    baseline = timed("plain Python (1 metric x 1 window)", lambda: python_trends(rows, 30))
+
+    # Both approaches agree
+    sample = next(iter(baseline))
+    index = list(computed['artist_id']).index(sample)
+    assert abs(computed['monthly_listeners_delta_30d'][index] - baseline[sample][0]) < 1e-6
+    conn.close()
+
+
+def benchmark_reprocess(args):
+    import copy
+    import glob
+    import logging
+    import random
+    import sqlite3
+    from src.spotify_mcp.archive import ResponseArchive
+    from src.spotify_mcp.artists import ArtistDatabase
+    from src.spotify_mcp.models import Artist
+    import reprocess_responses
+
+    # A catalog of archived responses, cloned from the saved ones in tests/output
+    samples = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "tests", "output", "*_spotify_response.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            samples.append(json.load(f))
+    if not samples:
+        print("No saved responses in tests/output")
+        return
+
+    directory = tempfile.mkdtemp()
+    logger = logging.getLogger("benchmark")
+    logger.disabled = True
+    db = ArtistDatabase(os.path.join(directory, "artists.db"), logger)
+    ids = [f"{i:022d}" for i in range(args.artists)]
+    db.save_artists_batch([Artist.from_spotify_data(fake_artist(artist_id)) for artist_id in ids])
+    db.close()
+
+    archive = ResponseArchive(os.path.join(directory, "archive"))
+    rng = random.Random(0)
+    raw_bytes = 0
+    start = time.perf_counter()
+    for i, artist_id in enumerate(ids):
+        response = copy.deepcopy(samples[i % len(samples)])
+        response["data"]["artistUnion"]["id"] = artist_id
+        response["data"]["artistUnion"]["stats"]["monthlyListeners"] = rng.randint(1000, 10000000)
+        raw_bytes += len(json.dumps(response))
+        archive.put(artist_id, "response", response)
+    stats = archive.stats()
+    archive.close()
+    print(f"{args.artists} archived responses, {raw_bytes / args.artists / 1024:.0f} KiB each, "
+          f"{stats['stored_bytes'] / 1024 / 1024:.1f} MiB compressed (archived in {time.perf_counter() - start:.1f} s)")
+
+    sources = reprocess_responses.find_archived_responses(os.path.join(directory, "archive"))
+    print(f"{'workers':>8} {'seconds':>9} {'artists/s':>10} {'updated':>8}")
+    for workers in args.workers:
+        results = reprocess_responses.reprocess(os.path.join(directory, "artists.db"), sources, workers=workers)
+        print(f"{workers:>8} {results['elapsed']:>9.2f} {len(results['updated']) / results['elapsed']:>10.0f} "
+              f"{len(results['updated']):>8}")
+    print(f"CPUs available: {os.cpu_count()}")
+
+
+def benchmark_models(args):
+    import gc
+    import tracemalloc
+    from src.spotify_mcp.models import Artist, ArtistSummary
+
+    def db_row(i):
+        """A row as ArtistDatabase reads it back from the artists table, with the Partner API fields filled in"""
+        row = Artist.from_spotify_data(fake_artist(f"a{i:07d}", popularity=i % 100)).to_db_dict()
+        row.update(monthly_listeners=i * 10, social_links_json='{"instagram": "x"}', upcoming_tours_count=0,
+                   upcoming_tours_json='{"total_count": 0, "dates": []}',
+                   enhanced_data_updated=row['last_updated'], json_ok=1)
+        return row
+
+    # Rows are built one at a time, so (as with rows fetched from SQLite) an
+    # artist's strings are only kept alive by the artist
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    artists = [Artist.from_db_dict(db_row(i)) for i in range(args.artists)]
+    held = tracemalloc.get_traced_memory()[0] - before
+    print(f"{args.artists} artists loaded: {held / 1024 / 1024:.1f} MiB, {held / args.artists:.0f} bytes/artist")
+    for artist in artists:
+        artist.to_dict()
+    held = tracemalloc.get_traced_memory()[0] - before
+    print(f"  every field read: {held / 1024 / 1024:.1f} MiB, {held / args.artists:.0f} bytes/artist")
+    tracemalloc.stop()
+    del artists
+    rows = [db_row(i) for i in range(args.artists)]
+    summary_rows = [tuple(row.get(column) for column in ArtistSummary.COLUMNS) for row in rows]
+
+    def timed(label, func):
+        start = time.perf_counter()
+        for artist in artists:
+            func(artist)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<40} {args.artists / elapsed:>10.0f} {elapsed / args.artists * 1e6:>8.2f}")
+
+    def changed(artist):
+        artist.followers.total += 1
+        artist.genres.append('deep house')
+        return artist.to_db_dict()
+
+    print(f"{'operation':<40} {'ops/s':>10} {'us/op':>8}")
+    start = time.perf_counter()
+    artists = [Artist.from_db_dict(row) for row in rows]
+    elapsed = time.perf_counter() - start
+    print(f"{'from_db_dict':<40} {args.artists / elapsed:>10.0f} {elapsed / args.artists * 1e6:>8.2f}")
+    start = time.perf_counter()
+    summaries = [ArtistSummary.from_db_row(row) for row in summary_rows]
+    elapsed = time.perf_counter() - start
+    print(f"{'ArtistSummary.from_db_row':<40} {len(summaries) / elapsed:>10.0f} {elapsed / len(summaries) * 1e6:>8.2f}")
+    timed("to_db_dict (unchanged)", Artist.to_db_dict)
+    timed("copy", Artist.copy)
+    timed("read every field (to_dict)", Artist.to_dict)
+    timed("to_db_dict (followers, genres changed)", changed)
+    timed("copy (decoded)", Artist.copy)
+
+
+async def run_callers(handle_call_tool, callers: int, requests_per_caller: int, tool: str):
+    """Run `callers` concurrent callers, each issuing requests back to back."""
+    async def caller(caller_id):
+        for i in range(requests_per_caller):
+            if tool == "GetInfo":
+                arguments = {"item_id": f"c{caller_id}r{i}", "qtype": "artist"}
+            else:
+                arguments = {"query": f"caller {caller_id} request {i}", "qtype": "track"}
+            await handle_call_tool(f"Spotify{tool}", arguments)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller(c) for c in range(callers)))
+    return time.perf_counter() - start
+
+
+async def benchmark_concurrency(args):
+    from src.spotify_mcp import server
+
+    server.spotify_client.sp = FakeSpotify(args.latency)
+    server.logger.disabled = True
+
+    print(f"Tool: Spotify{args.tool}, latency per Spotify call: {args.latency * 1000:.0f} ms, "
+          f"pool size: {server.dispatcher.max_workers}, "
+          f"tool limit: {server.dispatcher.tool_limits.get(args.tool, server.dispatcher.default_limit)}")
+    print(f"{'callers':>8} {'requests':>9} {'seconds':>9} {'req/s':>9} {'speedup':>8}")
+
+    baseline = None
+    for callers in args.callers:
+        elapsed = await run_callers(server.handle_call_tool, callers, args.requests, args.tool)
+        total = callers * args.requests
+        throughput = total / elapsed
+        baseline = baseline or throughput
+        print(f"{callers:>8} {total:>9} {elapsed:>9.3f} {throughput:>9.1f} {throughput / baseline:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the Spotify MCP server")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    concurrency = subparsers.add_parser("concurrency", help="Throughput of handle_call_tool with N simultaneous callers")
+    concurrency.add_argument("--callers", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="Caller counts to measure")
+    concurrency.add_argument("--requests", type=int, default=10, help="Requests issued by each caller")
+    concurrency.add_argument("--latency", type=float, default=0.05, help="Simulated Spotify latency in seconds")
+    concurrency.add_argument("--tool", choices=["Search", "GetInfo"], default="Search", help="Tool to call")
+
+    response = subparsers.add_parser("response", help="Size and encoding time of a Search response")
+    response.add_argument("--limit", type=int, default=50, help="Items per search category")
+    response.add_argument("--iterations", type=int, default=100, help="Encodings to time per variant")
+
+    startup = subparsers.add_parser("startup", help="Cold import time and time to the first list_tools response")
+    startup.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time per step")
+
+    db = subparsers.add_parser("db", help="save_artist/get_artist throughput, alone and with a concurrent writer")
+    db.add_argument("--artists", type=int, default=1000, help="Artists to save and read")
+
+    trends = subparsers.add_parser("trends", help="Trend analytics over a synthetic artist_stats_history")
+    trends.add_argument("--rows", type=int, default=1000000, help="History rows to generate")
+    trends.add_argument("--artists", type=int, default=10000, help="Artists the rows are spread over")
+
+    reprocess = subparsers.add_parser("reprocess", help="Re-deriving Partner API metrics from archived responses")
+    reprocess.add_argument("--artists", type=int, default=2000, help="Archived responses to re-process")
+    reprocess.add_argument("--workers", type=int, nargs="+", default=[1, 4], help="Worker process counts to measure")
+
+    models = subparsers.add_parser("models", help="Memory and load/save encoding cost of Artist objects")
+    models.add_argument("--artists", type=int, default=100000, help="Artists to load")
+
+    args = parser.parse_args()
+
+    if args.command == "concurrency":
+        asyncio.run(benchmark_concurrency(args))
+    elif args.command == "response":
+        benchmark_response(args)
+    elif args.command == "startup":
+        benchmark_startup(args)
+    elif args.command == "db":
+        benchmark_db(args)
+    elif args.command == "trends":
+        benchmark_trends(args)
+    elif args.command == "reprocess":
+        benchmark_reprocess(args)
+    elif args.command == "models":
+        benchmark_models(args)
+
+
+if __name__ == "__main__":
+    main()
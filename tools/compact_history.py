@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+DJVIBE Spotify MCP - Artist History Compaction
+Rolls old artist_stats_history snapshots up to daily and weekly rows and moves
+their JSON columns into a compressed, deduplicated table. Safe to run while
+the server and update tools are writing; rerun it on a schedule.
+"""
+import os
+import sys
+import json
+import sqlite3
+import logging
+import argparse
+
+# Add project root to the path for the compaction module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.spotify_mcp import history
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("compact_history")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Downsample artist_stats_history and reclaim space")
+    parser.add_argument("--db-path", default=os.getenv("SPOTIFY_DB_PATH", "spotify_artists.db"),
+                        help="Path to SQLite database")
+    parser.add_argument("--raw-days", type=int, default=history.RAW_DAYS,
+                        help="Keep every snapshot younger than this many days")
+    parser.add_argument("--daily-days", type=int, default=history.DAILY_DAYS,
+                        help="Roll snapshots up to one row per day up to this age, one per week after it")
+    parser.add_argument("--chunk-size", type=int, default=50, help="Artists compacted per transaction")
+    parser.add_argument("--pause", type=float, default=0.05, help="Seconds to wait between transactions")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="VACUUM afterwards to shrink the file (locks the database while it runs)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        logger.error(f"Database file does not exist: {args.db_path}")
+        return 1
+    if args.daily_days < args.raw_days:
+        logger.error("--daily-days must not be less than --raw-days")
+        return 1
+
+    conn = sqlite3.connect(args.db_path, timeout=30)
+    try:
+        report = history.compact_history(conn, raw_days=args.raw_days, daily_days=args.daily_days,
+                                         chunk_size=args.chunk_size, pause=args.pause,
+                                         vacuum=args.vacuum, logger=logger)
+    finally:
+        conn.close()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+DJVIBE Spotify MCP - Columnar Export
+Streams artists, artist_stats_history and artist_top_cities into Parquet or
+Arrow IPC files with JSON columns flattened into typed columns. Each run only
+writes rows added or updated since the previous one; use --full to start over.
+Needs pyarrow: pip install "spotify-mcp[export]"
+"""
+import os
+import sys
+import json
+import sqlite3
+import logging
+import argparse
+
+# Add project root to the path for the export module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.spotify_mcp import export
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("export_columnar")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the artist database to Parquet or Arrow files")
+    parser.add_argument("--db-path", default=os.getenv("SPOTIFY_DB_PATH", "spotify_artists.db"),
+                        help="Path to SQLite database")
+    parser.add_argument("--out-dir", default="export", help="Directory for the exported files and watermarks")
+    parser.add_argument("--format", choices=sorted(export.FORMATS), default="parquet", help="Output file format")
+    parser.add_argument("--tables", nargs="+", choices=list(export.TABLES),
+                        help="Tables to export (default: all)")
+    parser.add_argument("--full", action="store_true", help="Ignore saved watermarks and export every row")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per record batch")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        logger.error(f"Database file does not exist: {args.db_path}")
+        return 1
+
+    conn = sqlite3.connect(args.db_path, timeout=30)
+    try:
+        report = export.export_tables(conn, args.out_dir, fmt=args.format, tables=args.tables,
+                                      full=args.full, batch_size=args.batch_size, logger=logger)
+    except ImportError as e:
+        logger.error(str(e))
+        return 1
+    finally:
+        conn.close()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
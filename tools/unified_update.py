@@ -14,6 +14,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 # Import the UnifiedSpotifyAPI class
 from src.spotify_mcp.unified_api import UnifiedSpotifyAPI
+from src.spotify_mcp.artists import ensure_refresh_schedule, select_due_artists
 
 # Set up logging
 logging.basicConfig(
@@ -117,45 +118,13 @@ def get_artists_needing_update(db_path: str, limit: int = None,
     """Get artists that need updates based on their tier."""
     try:
         conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        try:
+            ensure_refresh_schedule(conn)
+            artists = select_due_artists(conn, standard=not partner_only, partner=not standard_only, limit=limit)
+        finally:
+            conn.close()
         
-        # Build the query based on what updates are needed
-        where_clauses = []
-        
-        if not partner_only:  # Include standard API update criteria
-            where_clauses.append("""(
-                (popularity >= 75 AND last_updated < datetime('now', '-3 days'))
-                OR (popularity >= 50 AND popularity < 75 AND last_updated < datetime('now', '-7 days')) 
-                OR (popularity < 50 AND last_updated < datetime('now', '-14 days'))
-                OR last_updated IS NULL
-            )""")
-        
-        if not standard_only:  # Include partner API update criteria
-            where_clauses.append("""(
-                (popularity >= 75 AND enhanced_data_updated < datetime('now', '-7 days'))
-                OR (popularity >= 50 AND popularity < 75 AND enhanced_data_updated < datetime('now', '-14 days'))
-                OR (popularity < 50 AND enhanced_data_updated < datetime('now', '-30 days'))
-                OR enhanced_data_updated IS NULL
-            )""")
-        
-        # Combine with OR if both types of updates are included
-        where_clause = " OR ".join(where_clauses)
-        
-        query = f"""
-            SELECT id, name, popularity, last_updated, enhanced_data_updated
-            FROM artists
-            WHERE {where_clause}
-            ORDER BY popularity DESC, last_updated ASC
-        """
-        
-        if limit:
-            query += f" LIMIT {limit}"
-        
-        cursor.execute(query)
-        artists = cursor.fetchall()
-        conn.close()
-        
-        return [row[0] for row in artists]  # Return just the IDs
+        return [artist["id"] for artist in artists]  # Return just the IDs
             
     except sqlite3.Error as e:
         logger.error(f"Database error: {str(e)}")